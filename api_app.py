@@ -1,319 +1,72 @@
 import sys
-import requests
 import time
 import json
-import concurrent.futures
-import random
+import sqlite3
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QComboBox, QPushButton, QProgressBar, QTableWidget,
-                             QTableWidgetItem, QHeaderView, QSplitter, QTextEdit, 
+                             QTableWidgetItem, QTableView, QHeaderView, QSplitter, QTextEdit, 
                              QMessageBox, QGroupBox, QSpinBox, QTabWidget, QStyleFactory,
-                             QLineEdit, QCheckBox, QFormLayout, QStackedWidget)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+                             QLineEdit, QCheckBox, QFormLayout, QStackedWidget, QDoubleSpinBox,
+                             QFileDialog)
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QPalette
+from stats import percentile_tooltip
+from result_models import TaskTableModel
+from benchmark_engine import (create_engine, DEFAULT_API_CONFIG, CONCURRENCY_LEVEL, ENGINE_TYPES,
+                              ARRIVAL_PROCESSES, list_ollama_models, format_server_timing,
+                              format_token_rates)
+from sweep import SweepRunner, ConcurrencySweep, concurrency_levels
+from context_sweep import ContextSweep
+from charts import LineChart
+from result_log import load_result_log
+from balancer import BALANCERS, SLOW_REPLICA, parse_endpoints
+from corpus import BUCKETS
+from results_store import DEFAULT_STORE, RUN_METRICS, ResultStore
 
-# Default configuration
-DEFAULT_API_CONFIG = {
-    "Ollama": {
-        "endpoint": "http://localhost:11434",
-        "api_key": "",
-        "path": "/api/generate"
-    },
-    "OpenAI": {
-        "endpoint": "https://api.openai.com",
-        "api_key": "",
-        "path": "/v1/chat/completions"
-    },
-    "Anthropic": {
-        "endpoint": "https://api.anthropic.com",
-        "api_key": "",
-        "path": "/v1/messages"
-    },
-    "Mistral": {
-        "endpoint": "https://api.mistral.ai",
-        "api_key": "",
-        "path": "/v1/chat/completions"
-    },
-    "Custom": {
-        "endpoint": "http://localhost:8000",
-        "api_key": "",
-        "path": "/v1/chat/completions"
-    }
-}
-
-# Generate 100 diverse benchmark prompts
-BENCHMARK_PROMPTS = [
-    "Explain quantum computing in simple terms",
-    "Write a Python function to calculate Fibonacci sequence",
-    "write a short story",
-    "write a poem",
-    "Describe three benefits of renewable energy",
-    "What is the capital of France? Just state the city name.",
-    "How does photosynthesis work in plants?",
-    "Create a short poem about the changing seasons",
-    "Describe the process of cellular respiration",
-    "What are the main differences between Python and JavaScript?",
-    "Explain the concept of object-oriented programming",
-    "How does a neural network learn from data?",
-    "Describe the water cycle in nature",
-    "What causes earthquakes and how are they measured?",
-    "Explain the theory of relativity in simple terms",
-    "How do vaccines work to protect against diseases?",
-    "Describe the structure of DNA and its role in genetics",
-    "What is blockchain technology and how does it work?",
-    "Explain the difference between HTTP and HTTPS",
-    "How do clouds form in the atmosphere?",
-    "Describe the process of evolution by natural selection",
-    "What are black holes and how are they formed?",
-    "Explain how a CPU processes instructions",
-    "Describe the lifecycle of a butterfly",
-    "What is machine learning and give an example of its application",
-    "Explain the greenhouse effect and its impact on climate",
-    "How do batteries store and release electrical energy?",
-    "Describe the human digestive system",
-    "What are the main layers of the Earth's atmosphere?",
-    "Explain how solar panels convert sunlight into electricity",
-    "Describe the process of mitosis in cell division",
-    "What is the difference between RAM and ROM?",
-    "Explain how GPS technology determines location",
-    "Describe the structure and function of the human heart",
-    "What causes the tides in Earth's oceans?",
-    "Explain the concept of supply and demand in economics",
-    "How do airplanes generate lift to fly?",
-    "Describe the process of protein synthesis in cells",
-    "What is artificial intelligence and what are its main branches?",
-    "Explain how the immune system fights infections",
-    "Describe the water treatment process for making it drinkable",
-    "What are the main components of a computer network?",
-    "Explain the difference between kinetic and potential energy",
-    "How do electric motors convert electricity into motion?",
-    "Describe the process of fossil fuel formation",
-    "What is the carbon cycle and why is it important?",
-    "Explain how microwave ovens heat food",
-    "Describe the structure of the solar system",
-    "What causes the phases of the moon?",
-    "Explain how antibiotics fight bacterial infections",
-    "Describe the process of DNA replication",
-    "What is cryptography and how is it used in cybersecurity?",
-    "Explain how nuclear power plants generate electricity",
-    "Describe the human respiratory system",
-    "What are enzymes and what role do they play in metabolism?",
-    "Explain the concept of natural selection with an example",
-    "How do optical fibers transmit data?",
-    "Describe the process of soil formation",
-    "What are the main types of renewable energy sources?",
-    "Explain how the Doppler effect changes sound frequency",
-    "Describe the structure and function of the human brain",
-    "What causes volcanic eruptions?",
-    "Explain how digital cameras capture images",
-    "Describe the nitrogen cycle in ecosystems",
-    "What is the difference between weather and climate?",
-    "Explain how hybrid cars save fuel",
-    "Describe the process of osmosis in cells",
-    "What are stem cells and why are they important?",
-    "Explain how radar systems detect objects",
-    "Describe the process of fermentation in food production",
-    "What is the big bang theory in cosmology?",
-    "Explain how touchscreens detect input",
-    "Describe the human circulatory system",
-    "What causes lightning and thunder during storms?",
-    "Explain the concept of opportunity cost in economics",
-    "How do wind turbines generate electricity?",
-    "Describe the process of metamorphosis in frogs",
-    "What is the difference between analog and digital signals?",
-    "Explain how vaccines create immunity",
-    "Describe the structure of an atom",
-    "What are the main types of rocks and how do they form?",
-    "Explain how refrigerators keep food cold",
-    "Describe the process of pollination in plants",
-    "What causes the aurora borealis (northern lights)?",
-    "Explain how voice recognition software works",
-    "Describe the human skeletal system",
-    "What is the difference between mass and weight?",
-    "How do submarines dive and surface?",
-    "Describe the process of eutrophication in water bodies",
-    "What is machine translation and how does it work?",
-    "Explain how solar eclipses occur",
-    "Describe the process of cellular differentiation",
-    "What causes ocean currents?",
-    "Explain how biometric authentication systems work",
-    "Describe the structure and function of the liver",
-    "What is dark matter in astronomy?",
-    "How do speakers convert electrical signals into sound?",
-    "Describe the process of erosion and deposition",
-    "What is the difference between AC and DC electricity?",
-    "Explain how 3D printing creates objects",
-    "Describe the human nervous system",
-    "What causes seasons on Earth?"
-]
+PROGRESS_REFRESH_MS = 100  # How often the window shows the latest progress
+LIVE_REFRESH_MS = 1000  # How often the live charts are redrawn
 
 class BenchmarkWorker(QThread):
-    progress_updated = pyqtSignal(int, str)
     benchmark_completed = pyqtSignal(dict)
+    benchmark_cancelled = pyqtSignal()
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, api_config, model_name, task_count):
+    def __init__(self, runner, *args, **options):
+        # runner: create_engine, or a sweep class such as ConcurrencySweep;
+        # it is called with the arguments and this worker's progress callback
         super().__init__()
-        self.api_config = api_config
-        self.model_name = model_name
-        self.task_count = task_count
-        self.cancelled = False
+        self.progress = None
+        self.engine = runner(*args, progress_callback=self.record_progress, **options)
     
     def run(self):
         try:
-            # Warm-up runs
-            for i in range(1):
-                if self.cancelled:
-                    return
-                self.progress_updated.emit(0, f"Warming up model ({i+1}/1)...")
-                self._run_benchmark("Warm up run")
-            
-            # Select random prompts for the benchmark
-            selected_prompts = random.sample(BENCHMARK_PROMPTS, self.task_count)
-            
-            # Prepare for benchmark
-            self.progress_updated.emit(0, f"Preparing {self.task_count} tasks...")
-            start_time = time.time()
-            results = []
-            completed = 0
-            
-            # Run benchmark with thread pool
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                futures = {executor.submit(self._run_benchmark, prompt): prompt for prompt in selected_prompts}
-                
-                for future in concurrent.futures.as_completed(futures):
-                    if self.cancelled:
-                        return
-                    
-                    completed += 1
-                    progress = int((completed / self.task_count) * 100)
-                    status = f"Completed {completed}/{self.task_count} tasks"
-                    self.progress_updated.emit(progress, status)
-                    
-                    try:
-                        metrics = future.result()
-                        if metrics:
-                            results.append(metrics)
-                    except Exception as e:
-                        print(f"Task failed: {str(e)}")
-            
-            # Calculate overall metrics
-            total_time = time.time() - start_time
-            throughput = self.task_count / total_time
-            latency_avg = sum(r['latency'] for r in results) / len(results) if results else 0
-            tokens_sec_avg = sum(r['tokens_sec'] for r in results) / len(results) if results else 0
-            
-            # Emit results
-            self.benchmark_completed.emit({
-                "api_type": self.api_config["type"],
-                "model": self.model_name,
-                "task_count": self.task_count,
-                "total_time": total_time,
-                "throughput": throughput,
-                "latency_avg": latency_avg,
-                "tokens_sec_avg": tokens_sec_avg,
-                "results": results
-            })
-            
+            results = self.engine.run()
+            # Runs cancelled mid-way still return the tasks finished so far
+            if results is not None:
+                self.benchmark_completed.emit(results)
+            else:
+                self.benchmark_cancelled.emit()
         except Exception as e:
             self.error_occurred.emit(str(e))
     
-    def _run_benchmark(self, prompt):
-        api_type = self.api_config["type"]
-        endpoint = self.api_config["endpoint"]
-        api_key = self.api_config["api_key"]
-        path = self.api_config["path"]
-        
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {api_key}" if api_key else ""
-        }
-        
-        # API-specific payloads
-        if api_type == "Ollama":
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
-                "options": {"temperature": 0.0}
-            }
-        elif api_type in ["OpenAI", "Mistral"]:
-            payload = {
-                "model": self.model_name,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 512,
-                "temperature": 0.0,
-                "stream": False
-            }
-        elif api_type == "Anthropic":
-            payload = {
-                "model": self.model_name,
-                "messages": [{"role": "user", "content": prompt}],
-                "max_tokens": 512,
-                "temperature": 0.0
-            }
-        else:  # Custom API
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "max_tokens": 512,
-                "temperature": 0.0,
-                "stream": False
-            }
-        
-        start_time = time.perf_counter()
-        try:
-            response = requests.post(
-                f"{endpoint}{path}",
-                json=payload,
-                headers=headers,
-                timeout=60
-            )
-            end_time = time.perf_counter()
-            
-            if response.status_code != 200:
-                raise Exception(f"API Error ({response.status_code}): {response.text}")
-            
-            data = response.json()
-            
-            # Calculate tokens per second based on API response
-            tokens_per_sec = 0
-            latency = end_time - start_time
-            
-            if api_type == "Ollama":
-                eval_duration = data.get('eval_duration', 0) / 1e9  # ns to seconds
-                eval_count = data.get('eval_count', 0)
-                tokens_per_sec = eval_count / eval_duration if eval_duration > 0 else 0
-            elif api_type in ["OpenAI", "Mistral"]:
-                total_tokens = data.get('usage', {}).get('total_tokens', 0)
-                tokens_per_sec = total_tokens / latency if latency > 0 else 0
-            elif api_type == "Anthropic":
-                input_tokens = data.get('usage', {}).get('input_tokens', 0)
-                output_tokens = data.get('usage', {}).get('output_tokens', 0)
-                total_tokens = input_tokens + output_tokens
-                tokens_per_sec = total_tokens / latency if latency > 0 else 0
-            else:  # Custom API
-                # Try to get token count from response
-                total_tokens = data.get('usage', {}).get('total_tokens', 0)
-                tokens_per_sec = total_tokens / latency if latency > 0 and total_tokens > 0 else 0
-            
-            return {
-                "prompt": prompt,
-                "latency": latency,
-                "tokens_sec": tokens_per_sec
-            }
-            
-        except Exception as e:
-            end_time = time.perf_counter()
-            return {
-                "prompt": prompt,
-                "latency": end_time - start_time,
-                "tokens_sec": 0,
-                "error": str(e)
-            }
+    def record_progress(self, value, message):
+        # Called by the engine once per task. Only the latest value is kept
+        # and the window picks it up on a timer, so the GUI does the same
+        # work at 10 or 10,000 tasks/s.
+        self.progress = (value, message)
     
     def cancel(self):
-        self.cancelled = True
+        self.engine.cancel()
+
+class SweepWorker(BenchmarkWorker):
+    # Also shows each level's run as soon as it finishes
+    level_completed = pyqtSignal(dict)
+    
+    def __init__(self, runner, *args, **options):
+        super().__init__(runner, *args, level_callback=self.emit_level, **options)
+    
+    def emit_level(self, summary):
+        self.level_completed.emit(summary)
 
 class OllamaBenchmarkApp(QMainWindow):
     def __init__(self):
@@ -388,6 +141,14 @@ class OllamaBenchmarkApp(QMainWindow):
                 color: #eee;
             }
         """)
+        self.api_endpoint_edit.setToolTip("Separate several replicas with commas to benchmark them as one fleet")
+        
+        # Load balancing across the replicas in the endpoint list
+        self.balancer_combo = QComboBox()
+        self.balancer_combo.addItems(BALANCERS)
+        self.balancer_combo.setFont(QFont("Arial", 10))
+        self.balancer_combo.setStyleSheet(self.api_type_combo.styleSheet())
+        self.balancer_combo.setToolTip("How requests are spread when the endpoint lists several replicas")
         
         # API Key
         self.api_key_edit = QLineEdit()
@@ -419,6 +180,7 @@ class OllamaBenchmarkApp(QMainWindow):
         # Add API fields to form
         api_layout.addRow("API Type:", self.api_type_combo)
         api_layout.addRow("Endpoint URL:", self.api_endpoint_edit)
+        api_layout.addRow("Load Balancer:", self.balancer_combo)
         api_layout.addRow("API Key:", self.api_key_edit)
         api_layout.addRow("API Path:", self.api_path_edit)
         
@@ -489,8 +251,9 @@ class OllamaBenchmarkApp(QMainWindow):
         
         self.tasks_spin = QSpinBox()
         self.tasks_spin.setFont(QFont("Arial", 10))
-        self.tasks_spin.setRange(1, 200)
+        self.tasks_spin.setRange(0, 10000000)
         self.tasks_spin.setValue(20)
+        self.tasks_spin.setSpecialValueText("Unlimited")
         self.tasks_spin.setStyleSheet("""
             QSpinBox {
                 padding: 6px;
@@ -505,8 +268,19 @@ class OllamaBenchmarkApp(QMainWindow):
             }
         """)
         
+        # Soak test duration; prompts are cycled when the task count exceeds them
+        self.duration_spin = QSpinBox()
+        self.duration_spin.setFont(QFont("Arial", 10))
+        self.duration_spin.setRange(0, 10080)
+        self.duration_spin.setValue(0)
+        self.duration_spin.setSuffix(" min")
+        self.duration_spin.setSpecialValueText("No time limit")
+        self.duration_spin.setToolTip("Stop starting new tasks after this many minutes (soak test)")
+        self.duration_spin.setStyleSheet(self.tasks_spin.styleSheet())
+        
         tasks_layout.addWidget(tasks_label)
         tasks_layout.addWidget(self.tasks_spin)
+        tasks_layout.addWidget(self.duration_spin)
         
         # Concurrency level
         concurrency_layout = QVBoxLayout()
@@ -516,17 +290,138 @@ class OllamaBenchmarkApp(QMainWindow):
         
         self.concurrency_spin = QSpinBox()
         self.concurrency_spin.setFont(QFont("Arial", 10))
-        self.concurrency_spin.setRange(1, 50)
-        self.concurrency_spin.setValue(10)
+        self.concurrency_spin.setRange(1, 5000)
+        self.concurrency_spin.setValue(CONCURRENCY_LEVEL)
         self.concurrency_spin.setStyleSheet(self.tasks_spin.styleSheet())
         
+        # Load engine
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItems(ENGINE_TYPES)
+        self.engine_combo.setFont(QFont("Arial", 10))
+        self.engine_combo.setToolTip("thread: blocking thread pool\nasyncio: event loop, scales to thousands of in-flight requests")
+        self.engine_combo.setStyleSheet(self.api_type_combo.styleSheet())
+        
+        # Load generator processes; more than one gets past the GIL
+        self.processes_spin = QSpinBox()
+        self.processes_spin.setFont(QFont("Arial", 10))
+        self.processes_spin.setRange(1, 64)
+        self.processes_spin.setValue(1)
+        self.processes_spin.setSuffix(" process(es)")
+        self.processes_spin.setToolTip("Split the tasks, concurrency and arrival rate over this many processes.\n"
+                                       "Their results are merged into one summary.")
+        self.processes_spin.setStyleSheet(self.tasks_spin.styleSheet())
+        
         concurrency_layout.addWidget(concurrency_label)
         concurrency_layout.addWidget(self.concurrency_spin)
+        concurrency_layout.addWidget(self.engine_combo)
+        concurrency_layout.addWidget(self.processes_spin)
+        
+        # Open-loop arrival rate (0 = closed loop)
+        arrival_layout = QVBoxLayout()
+        arrival_label = QLabel("Arrival Rate (req/s):")
+        arrival_label.setFont(QFont("Arial", 10))
+        arrival_label.setStyleSheet("color: #ddd;")
+        
+        self.arrival_rate_spin = QDoubleSpinBox()
+        self.arrival_rate_spin.setFont(QFont("Arial", 10))
+        self.arrival_rate_spin.setRange(0, 100000)
+        self.arrival_rate_spin.setDecimals(1)
+        self.arrival_rate_spin.setValue(0)
+        self.arrival_rate_spin.setSpecialValueText("Closed loop")
+        self.arrival_rate_spin.setToolTip("Fire requests at this rate regardless of outstanding ones.\n"
+                                          "Latency is measured from each request's scheduled send time.")
+        self.arrival_rate_spin.setStyleSheet(self.tasks_spin.styleSheet().replace("QSpinBox", "QDoubleSpinBox"))
+        
+        self.arrival_combo = QComboBox()
+        self.arrival_combo.addItems(ARRIVAL_PROCESSES)
+        self.arrival_combo.setFont(QFont("Arial", 10))
+        self.arrival_combo.setStyleSheet(self.api_type_combo.styleSheet())
+        
+        arrival_layout.addWidget(arrival_label)
+        arrival_layout.addWidget(self.arrival_rate_spin)
+        arrival_layout.addWidget(self.arrival_combo)
+        
+        # Streaming mode
+        stream_layout = QVBoxLayout()
+        stream_label = QLabel("Response Mode:")
+        stream_label.setFont(QFont("Arial", 10))
+        stream_label.setStyleSheet("color: #ddd;")
+        
+        self.stream_check = QCheckBox("Streaming (TTFT / ITL)")
+        self.stream_check.setFont(QFont("Arial", 10))
+        self.stream_check.setStyleSheet("color: #eee;")
+        
+        stream_layout.addWidget(stream_label)
+        self.prewarm_check = QCheckBox("Pre-open connections")
+        self.prewarm_check.setFont(QFont("Arial", 10))
+        self.prewarm_check.setStyleSheet("color: #eee;")
+        self.prewarm_check.setToolTip("Open one keep-alive connection per worker before timing starts")
+        
+        # Output length limit: num_predict for Ollama, max_tokens elsewhere
+        self.max_tokens_spin = QSpinBox()
+        self.max_tokens_spin.setFont(QFont("Arial", 10))
+        self.max_tokens_spin.setRange(0, 131072)
+        self.max_tokens_spin.setValue(0)
+        self.max_tokens_spin.setPrefix("Max ")
+        self.max_tokens_spin.setSuffix(" tokens")
+        self.max_tokens_spin.setSpecialValueText("Default output length")
+        self.max_tokens_spin.setToolTip("Pin the generation length: num_predict for Ollama, max_tokens for the\n"
+                                        "other APIs. The default is no limit for Ollama and 512 elsewhere.")
+        self.max_tokens_spin.setStyleSheet(self.tasks_spin.styleSheet())
+        
+        stream_layout.addWidget(self.stream_check)
+        stream_layout.addWidget(self.prewarm_check)
+        stream_layout.addWidget(self.max_tokens_spin)
+        
+        # Prompt corpus; blank uses the built-in prompts
+        prompts_layout = QVBoxLayout()
+        prompts_label = QLabel("Prompts:")
+        prompts_label.setFont(QFont("Arial", 10))
+        prompts_label.setStyleSheet("color: #ddd;")
+        
+        prompt_file_layout = QHBoxLayout()
+        self.prompt_file_edit = QLineEdit()
+        self.prompt_file_edit.setFont(QFont("Arial", 10))
+        self.prompt_file_edit.setPlaceholderText("Built-in prompts")
+        self.prompt_file_edit.setToolTip("Text file with one prompt per line, or JSON Lines with a \"prompt\" "
+                                         "or \"text\" key.\nLarge corpora are indexed, not loaded into memory.")
+        self.prompt_file_edit.setStyleSheet(self.api_endpoint_edit.styleSheet())
+        self.prompt_browse_btn = QPushButton("...")
+        self.prompt_browse_btn.setFont(QFont("Arial", 10))
+        self.prompt_browse_btn.setStyleSheet(self.refresh_btn.styleSheet())
+        self.prompt_browse_btn.clicked.connect(self.browse_prompt_file)
+        prompt_file_layout.addWidget(self.prompt_file_edit)
+        prompt_file_layout.addWidget(self.prompt_browse_btn)
+        
+        self.prompt_bucket_combo = QComboBox()
+        self.prompt_bucket_combo.addItem("Any length")
+        self.prompt_bucket_combo.addItems([f"{bucket} tokens" for bucket in BUCKETS])
+        self.prompt_bucket_combo.setFont(QFont("Arial", 10))
+        self.prompt_bucket_combo.setToolTip("Only send corpus prompts of this estimated token length")
+        self.prompt_bucket_combo.setStyleSheet(self.api_type_combo.styleSheet())
+        
+        # The same seed sends the same prompts in the same order
+        self.seed_spin = QSpinBox()
+        self.seed_spin.setFont(QFont("Arial", 10))
+        self.seed_spin.setRange(-1, 2147483647)
+        self.seed_spin.setValue(-1)
+        self.seed_spin.setPrefix("Seed ")
+        self.seed_spin.setSpecialValueText("Random order")
+        self.seed_spin.setToolTip("Runs with the same seed send exactly the same prompts")
+        self.seed_spin.setStyleSheet(self.tasks_spin.styleSheet())
+        
+        prompts_layout.addWidget(prompts_label)
+        prompts_layout.addLayout(prompt_file_layout)
+        prompts_layout.addWidget(self.prompt_bucket_combo)
+        prompts_layout.addWidget(self.seed_spin)
         
         # Add layouts to model group
-        model_layout.addLayout(model_select_layout, 60)
-        model_layout.addLayout(tasks_layout, 20)
-        model_layout.addLayout(concurrency_layout, 20)
+        model_layout.addLayout(model_select_layout, 28)
+        model_layout.addLayout(tasks_layout, 12)
+        model_layout.addLayout(concurrency_layout, 12)
+        model_layout.addLayout(prompts_layout, 16)
+        model_layout.addLayout(arrival_layout, 14)
+        model_layout.addLayout(stream_layout, 18)
         main_layout.addWidget(model_group)
         
         # Benchmark controls
@@ -572,8 +467,44 @@ class OllamaBenchmarkApp(QMainWindow):
         self.cancel_btn.clicked.connect(self.cancel_benchmark)
         self.cancel_btn.setEnabled(False)
         
+        self.sweep_btn = QPushButton("Concurrency Sweep")
+        self.sweep_btn.setFont(QFont("Arial", 10))
+        self.sweep_btn.setToolTip("Run at concurrency 1, 2, 4 ... up to the configured level and find the saturation knee")
+        self.sweep_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #1a5fb4;
+                color: white;
+                border: none;
+                padding: 10px 20px;
+                border-radius: 4px;
+            }
+            QPushButton:hover {
+                background-color: #1c71d8;
+            }
+            QPushButton:disabled {
+                background-color: #555;
+            }
+        """)
+        self.sweep_btn.clicked.connect(self.start_sweep)
+        
+        self.context_sweep_btn = QPushButton("Context Sweep")
+        self.context_sweep_btn.setFont(QFont("Arial", 10))
+        self.context_sweep_btn.setToolTip("Run with synthetic prompts of 128, 256 ... tokens up to the model's "
+                                          "context length and find where throughput falls off")
+        self.context_sweep_btn.setStyleSheet(self.sweep_btn.styleSheet())
+        self.context_sweep_btn.clicked.connect(self.start_context_sweep)
+        
+        self.load_log_btn = QPushButton("Load Run Log")
+        self.load_log_btn.setFont(QFont("Arial", 10))
+        self.load_log_btn.setToolTip("Open a api_run_*.jsonl log, including runs that were interrupted")
+        self.load_log_btn.setStyleSheet(self.sweep_btn.styleSheet())
+        self.load_log_btn.clicked.connect(self.load_run_log)
+        
         controls_layout.addWidget(self.start_btn)
+        controls_layout.addWidget(self.sweep_btn)
+        controls_layout.addWidget(self.context_sweep_btn)
         controls_layout.addWidget(self.cancel_btn)
+        controls_layout.addWidget(self.load_log_btn)
         controls_layout.addStretch()
         main_layout.addLayout(controls_layout)
         
@@ -614,8 +545,8 @@ class OllamaBenchmarkApp(QMainWindow):
         summary_label.setStyleSheet("color: #61dafb;")
         
         self.summary_table = QTableWidget()
-        self.summary_table.setColumnCount(6)
-        self.summary_table.setHorizontalHeaderLabels(["API", "Model", "Tasks", "Total Time", "Throughput (tasks/s)", "Avg Tokens/s"])
+        self.summary_table.setColumnCount(11)
+        self.summary_table.setHorizontalHeaderLabels(["API", "Model", "Tasks", "Load", "Total Time", "Throughput (tasks/s)", "Latency p50/p95/p99 (s)", "Avg Output Tok/s", "Avg TTFT (s)", "Conn Reuse", "Harness Overhead"])
         self.summary_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.summary_table.setRowCount(0)
         self.summary_table.setEditTriggers(QTableWidget.NoEditTriggers)
@@ -649,17 +580,17 @@ class OllamaBenchmarkApp(QMainWindow):
         results_label.setFont(QFont("Arial", 10, QFont.Bold))
         results_label.setStyleSheet("color: #61dafb;")
         
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(5)
-        self.results_table.setHorizontalHeaderLabels(["Prompt", "Latency (s)", "Tokens/s", "Status", "Error"])
+        # Model/view, so only the visible rows of a long run are ever formatted
+        self.task_model = TaskTableModel()
+        self.results_table = QTableView()
+        self.results_table.setModel(self.task_model)
         self.results_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
-        self.results_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        self.results_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        self.results_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        self.results_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeToContents)
-        self.results_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for column in range(1, 8):
+            self.results_table.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.results_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.results_table.setEditTriggers(QTableView.NoEditTriggers)
         self.results_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #444;
                 background-color: #252525;
                 color: #ddd;
@@ -671,7 +602,7 @@ class OllamaBenchmarkApp(QMainWindow):
                 padding: 5px;
                 border: none;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
         """)
@@ -679,15 +610,158 @@ class OllamaBenchmarkApp(QMainWindow):
         results_layout.addWidget(results_label)
         results_layout.addWidget(self.results_table)
         
+        # Concurrency sweep panel
+        sweep_panel = QWidget()
+        sweep_layout = QVBoxLayout(sweep_panel)
+        sweep_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.sweep_label = QLabel("Run a concurrency sweep to find the throughput/latency knee")
+        self.sweep_label.setFont(QFont("Arial", 10, QFont.Bold))
+        self.sweep_label.setStyleSheet("color: #61dafb;")
+        
+        sweep_charts_layout = QHBoxLayout()
+        self.sweep_throughput_chart = LineChart("Throughput", "Concurrency", "tasks/s", log_x=True)
+        self.sweep_latency_chart = LineChart("Latency Percentiles", "Concurrency", "seconds", log_x=True)
+        sweep_charts_layout.addWidget(self.sweep_throughput_chart)
+        sweep_charts_layout.addWidget(self.sweep_latency_chart)
+        
+        sweep_layout.addWidget(self.sweep_label)
+        sweep_layout.addLayout(sweep_charts_layout, 1)
+        
+        # Context-length sweep panel
+        context_panel = QWidget()
+        context_layout = QVBoxLayout(context_panel)
+        context_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.context_label = QLabel("Run a context sweep to see how prompt length affects prefill and throughput")
+        self.context_label.setFont(QFont("Arial", 10, QFont.Bold))
+        self.context_label.setStyleSheet("color: #61dafb;")
+        
+        context_charts_layout = QHBoxLayout()
+        self.context_throughput_chart = LineChart("Throughput", "Prompt tokens", "tasks/s", log_x=True)
+        self.context_latency_chart = LineChart("Prefill and Latency", "Prompt tokens", "seconds", log_x=True)
+        context_charts_layout.addWidget(self.context_throughput_chart)
+        context_charts_layout.addWidget(self.context_latency_chart)
+        
+        context_layout.addWidget(self.context_label)
+        context_layout.addLayout(context_charts_layout, 1)
+        
+        # Throughput and latency over the course of the run (soak tests)
+        timeline_panel = QWidget()
+        timeline_layout = QHBoxLayout(timeline_panel)
+        timeline_layout.setContentsMargins(0, 0, 0, 0)
+        self.timeline_throughput_chart = LineChart("Throughput over Time", "Elapsed (s)", "tasks/s")
+        self.timeline_latency_chart = LineChart("Latency over Time", "Elapsed (s)", "seconds")
+        timeline_layout.addWidget(self.timeline_throughput_chart)
+        timeline_layout.addWidget(self.timeline_latency_chart)
+        
+        # Rolling per-second view of the run in progress
+        live_panel = QWidget()
+        live_layout = QVBoxLayout(live_panel)
+        live_layout.setContentsMargins(0, 0, 0, 0)
+        live_top_layout = QHBoxLayout()
+        live_bottom_layout = QHBoxLayout()
+        self.live_requests_chart = LineChart("Requests/s", "Elapsed (s)", "req/s")
+        self.live_tokens_chart = LineChart("Tokens/s", "Elapsed (s)", "tok/s")
+        self.live_in_flight_chart = LineChart("In-flight Requests", "Elapsed (s)", "requests")
+        self.live_latency_chart = LineChart("Latency", "Elapsed (s)", "seconds")
+        live_top_layout.addWidget(self.live_requests_chart)
+        live_top_layout.addWidget(self.live_tokens_chart)
+        live_bottom_layout.addWidget(self.live_in_flight_chart)
+        live_bottom_layout.addWidget(self.live_latency_chart)
+        live_layout.addLayout(live_top_layout, 1)
+        live_layout.addLayout(live_bottom_layout, 1)
+        
+        # Past runs from the history database, one metric over time
+        history_panel = QWidget()
+        history_layout = QVBoxLayout(history_panel)
+        history_layout.setContentsMargins(0, 0, 0, 0)
+        history_controls = QHBoxLayout()
+        self.history_model_combo = QComboBox()
+        self.history_host_combo = QComboBox()
+        self.history_metric_combo = QComboBox()
+        self.history_metric_combo.addItems(RUN_METRICS)
+        self.history_metric_combo.setCurrentText("latency_p99")
+        for combo in (self.history_model_combo, self.history_host_combo, self.history_metric_combo):
+            combo.setFont(QFont("Arial", 10))
+            combo.setStyleSheet(self.api_type_combo.styleSheet())
+        self.history_days_spin = QSpinBox()
+        self.history_days_spin.setFont(QFont("Arial", 10))
+        self.history_days_spin.setRange(0, 3650)
+        self.history_days_spin.setValue(30)
+        self.history_days_spin.setPrefix("Last ")
+        self.history_days_spin.setSuffix(" days")
+        self.history_days_spin.setSpecialValueText("All time")
+        self.history_days_spin.setStyleSheet(self.tasks_spin.styleSheet())
+        history_controls.addWidget(self.history_model_combo, 1)
+        history_controls.addWidget(self.history_host_combo, 1)
+        history_controls.addWidget(self.history_days_spin)
+        history_controls.addWidget(self.history_metric_combo)
+        self.history_label = QLabel(f"Finished runs are saved to {DEFAULT_STORE}")
+        self.history_label.setFont(QFont("Arial", 10, QFont.Bold))
+        self.history_label.setStyleSheet("color: #61dafb;")
+        self.history_chart = LineChart("History", "Days (0 = now)")
+        history_layout.addLayout(history_controls)
+        history_layout.addWidget(self.history_label)
+        history_layout.addWidget(self.history_chart, 1)
+        
+        # Per-replica breakdown of fleet runs
+        endpoints_panel = QWidget()
+        endpoints_layout = QVBoxLayout(endpoints_panel)
+        endpoints_layout.setContentsMargins(0, 0, 0, 0)
+        
+        self.endpoints_label = QLabel("Benchmark several comma-separated endpoints to compare replicas")
+        self.endpoints_label.setFont(QFont("Arial", 10, QFont.Bold))
+        self.endpoints_label.setStyleSheet("color: #61dafb;")
+        
+        self.endpoints_table = QTableWidget()
+        self.endpoints_table.setColumnCount(8)
+        self.endpoints_table.setHorizontalHeaderLabels(["Endpoint", "Tasks", "Share", "Tasks/s", "p50 (s)", "p90 (s)", "p99 (s)", "Errors"])
+        self.endpoints_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for column in range(1, 8):
+            self.endpoints_table.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.endpoints_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.endpoints_table.setStyleSheet(self.results_table.styleSheet())
+        
+        endpoints_layout.addWidget(self.endpoints_label)
+        endpoints_layout.addWidget(self.endpoints_table)
+        
+        results_tabs = QTabWidget()
+        results_tabs.addTab(results_panel, "Task Details")
+        results_tabs.addTab(sweep_panel, "Concurrency Sweep")
+        results_tabs.addTab(context_panel, "Context Sweep")
+        self.context_tab_index = results_tabs.count() - 1
+        results_tabs.addTab(timeline_panel, "Timeline")
+        results_tabs.addTab(endpoints_panel, "Endpoints")
+        results_tabs.addTab(live_panel, "Live")
+        self.live_tab_index = results_tabs.count() - 1
+        results_tabs.addTab(history_panel, "History")
+        self.results_tabs = results_tabs
+        
         # Add panels to splitter
         results_splitter.addWidget(summary_panel)
-        results_splitter.addWidget(results_panel)
+        results_splitter.addWidget(results_tabs)
         results_splitter.setSizes([200, 400])
         main_layout.addWidget(results_splitter, 1)
         
+        # Progress is polled rather than signalled per task
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(PROGRESS_REFRESH_MS)
+        self.progress_timer.timeout.connect(self.poll_progress)
+        self.live_timer = QTimer(self)
+        self.live_timer.setInterval(LIVE_REFRESH_MS)
+        self.live_timer.timeout.connect(self.update_live_charts)
+        
         # Initialize
         self.benchmark_worker = None
         self.benchmark_results = []
+        self.sweep_results = []
+        self.store = ResultStore(DEFAULT_STORE)
+        self.refresh_history_filters()
+        for combo in (self.history_model_combo, self.history_host_combo, self.history_metric_combo):
+            combo.currentIndexChanged.connect(self.show_history)
+        self.history_days_spin.valueChanged.connect(self.show_history)
+        self.show_history()
         self.api_type_changed(0)  # Initialize UI for Ollama
         
     def apply_dark_theme(self):
@@ -753,13 +827,57 @@ class OllamaBenchmarkApp(QMainWindow):
             return ["custom-model"]
     
     def get_current_api_config(self):
+        endpoints = parse_endpoints(self.api_endpoint_edit.text())
         return {
             "type": self.api_type_combo.currentText(),
-            "endpoint": self.api_endpoint_edit.text().strip(),
+            "endpoint": endpoints[0] if endpoints else "",
+            "endpoints": endpoints,
             "api_key": self.api_key_edit.text().strip(),
             "path": self.api_path_edit.text().strip()
         }
     
+    def get_engine_options(self):
+        return {
+            "stream": self.stream_check.isChecked(),
+            "prewarm": self.prewarm_check.isChecked(),
+            "max_tokens": self.max_tokens_spin.value() or None,
+            "arrival_rate": self.arrival_rate_spin.value() or None,
+            "arrival_process": self.arrival_combo.currentText(),
+            "duration": self.duration_spin.value() * 60 or None,
+            "balancer": self.balancer_combo.currentText(),
+            "processes": self.processes_spin.value(),
+            "prompt_file": self.prompt_file_edit.text().strip() or None,
+            "prompt_bucket": BUCKETS[self.prompt_bucket_combo.currentIndex() - 1]
+                             if self.prompt_bucket_combo.currentIndex() > 0 else None,
+            "seed": self.seed_spin.value() if self.seed_spin.value() >= 0 else None,
+            # Every finished task is appended here, so a crash loses at most a second of results
+            "result_log": f"api_run_{time.strftime('%Y%m%d-%H%M%S')}.jsonl"
+        }
+    
+    def browse_prompt_file(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Prompt Corpus", "",
+                                                  "Prompt files (*.txt *.jsonl);;All files (*)")
+        if filename:
+            self.prompt_file_edit.setText(filename)
+    
+    def load_run_log(self):
+        filename, _ = QFileDialog.getOpenFileName(self, "Load Run Log", "", "Run logs (*.jsonl);;All files (*)")
+        if not filename:
+            return
+        try:
+            runs = load_result_log(filename)
+        except Exception as e:
+            QMessageBox.critical(self, "Load Error", f"Could not read {filename}:\n\n{e}")
+            return
+        if not runs:
+            QMessageBox.warning(self, "Empty Log", f"{filename} does not contain any runs.")
+            return
+        for run in runs:
+            self.display_results(run)
+        partial = sum(1 for run in runs if run.get("partial"))
+        self.status_label.setText(f"Loaded {len(runs)} run(s) from {filename}" +
+                                  (f", {partial} interrupted" if partial else ""))
+    
     def load_models(self):
         if self.api_type_combo.currentText() != "Ollama":
             return
@@ -768,10 +886,9 @@ class OllamaBenchmarkApp(QMainWindow):
         self.status_label.setText("Loading installed models...")
         
         try:
-            endpoint = self.api_endpoint_edit.text().strip()
-            response = requests.get(f"{endpoint}/api/tags", timeout=5)
-            response.raise_for_status()
-            models = [model['name'] for model in response.json().get('models', [])]
+            # Replicas of a fleet are expected to serve the same models
+            endpoint = self.get_current_api_config()["endpoint"]
+            models = list_ollama_models(endpoint)
             
             if models:
                 self.model_combo.addItems(models)
@@ -790,48 +907,261 @@ class OllamaBenchmarkApp(QMainWindow):
             return
         
         # Reset UI
-        self.results_table.setRowCount(0)
+        self.task_model.clear()
+        self.clear_live_charts()
+        self.results_tabs.setCurrentIndex(self.live_tab_index)
         
         # Disable controls during benchmark
-        self.start_btn.setEnabled(False)
-        self.cancel_btn.setEnabled(True)
-        self.api_type_combo.setEnabled(False)
-        self.api_endpoint_edit.setEnabled(False)
-        self.api_key_edit.setEnabled(False)
-        self.api_path_edit.setEnabled(False)
-        self.model_combo.setEnabled(False)
-        self.refresh_btn.setEnabled(False)
-        self.tasks_spin.setEnabled(False)
-        self.concurrency_spin.setEnabled(False)
+        self.set_controls_enabled(False)
         
         # Create and start worker thread
         api_config = self.get_current_api_config()
         model_name = self.model_combo.currentText()
         task_count = self.tasks_spin.value()
-        
-        self.benchmark_worker = BenchmarkWorker(api_config, model_name, task_count)
-        self.benchmark_worker.progress_updated.connect(self.update_progress)
+        concurrency = self.concurrency_spin.value()
+        stream = self.stream_check.isChecked()
+        engine_type = self.engine_combo.currentText()
+        
+        self.benchmark_worker = BenchmarkWorker(create_engine, engine_type, api_config, model_name, task_count,
+                                                concurrency=concurrency,
+                                                **self.get_engine_options())
+        self.progress_timer.start()
+        self.live_timer.start()
         self.benchmark_worker.benchmark_completed.connect(self.benchmark_finished)
+        self.benchmark_worker.benchmark_cancelled.connect(self.benchmark_aborted)
+        self.benchmark_worker.error_occurred.connect(self.handle_error)
+        self.benchmark_worker.start()
+    
+    def start_sweep(self):
+        if self.model_combo.currentText() == "":
+            QMessageBox.warning(self, "No Model Selected", "Please select a model to benchmark.")
+            return
+        if self.tasks_spin.value() == 0 and self.duration_spin.value() == 0:
+            QMessageBox.warning(self, "No Limit Set", "A sweep needs a task count or a duration per level.")
+            return
+        
+        # Reset UI
+        self.task_model.clear()
+        self.sweep_throughput_chart.clear()
+        self.sweep_latency_chart.clear()
+        self.clear_live_charts()
+        self.sweep_label.setText("Concurrency sweep running...")
+        self.results_tabs.setCurrentIndex(1)
+        self.set_controls_enabled(False)
+        
+        # Sweep 1, 2, 4 ... up to the configured concurrency
+        levels = concurrency_levels(self.concurrency_spin.value())
+        self.benchmark_worker = SweepWorker(ConcurrencySweep,
+                                            self.engine_combo.currentText(),
+                                            self.get_current_api_config(),
+                                            self.model_combo.currentText(),
+                                            self.tasks_spin.value(),
+                                            levels,
+                                            **self.get_engine_options())
+        self.progress_timer.start()
+        self.live_timer.start()
+        self.benchmark_worker.level_completed.connect(self.display_results)
+        self.benchmark_worker.level_completed.connect(self.store_run)
+        self.benchmark_worker.benchmark_completed.connect(self.sweep_finished)
+        self.benchmark_worker.benchmark_cancelled.connect(self.benchmark_aborted)
+        self.benchmark_worker.error_occurred.connect(self.handle_error)
+        self.benchmark_worker.start()
+    
+    def start_context_sweep(self):
+        if self.model_combo.currentText() == "":
+            QMessageBox.warning(self, "No Model Selected", "Please select a model to benchmark.")
+            return
+        if self.tasks_spin.value() == 0 and self.duration_spin.value() == 0:
+            QMessageBox.warning(self, "No Limit Set", "A sweep needs a task count or a duration per level.")
+            return
+        
+        # Reset UI
+        self.task_model.clear()
+        self.context_throughput_chart.clear()
+        self.context_latency_chart.clear()
+        self.clear_live_charts()
+        self.context_label.setText("Context sweep running...")
+        self.results_tabs.setCurrentIndex(self.context_tab_index)
+        self.set_controls_enabled(False)
+        
+        # Synthetic prompts replace the built-in ones or the corpus
+        self.benchmark_worker = SweepWorker(ContextSweep,
+                                            self.engine_combo.currentText(),
+                                            self.get_current_api_config(),
+                                            self.model_combo.currentText(),
+                                            self.tasks_spin.value(),
+                                            concurrency=self.concurrency_spin.value(),
+                                            **self.get_engine_options())
+        self.progress_timer.start()
+        self.live_timer.start()
+        self.benchmark_worker.level_completed.connect(self.display_results)
+        self.benchmark_worker.level_completed.connect(self.store_run)
+        self.benchmark_worker.benchmark_completed.connect(self.context_sweep_finished)
+        self.benchmark_worker.benchmark_cancelled.connect(self.benchmark_aborted)
         self.benchmark_worker.error_occurred.connect(self.handle_error)
         self.benchmark_worker.start()
     
     def cancel_benchmark(self):
         if self.benchmark_worker and self.benchmark_worker.isRunning():
+            # The engine drops queued tasks and cuts off the requests in
+            # flight, then the worker reports what finished before the cancel
             self.benchmark_worker.cancel()
-            self.benchmark_worker.terminate()
-            self.status_label.setText("Benchmark cancelled")
-            self.progress_bar.setValue(0)
-            self.reset_ui()
+            self.cancel_btn.setEnabled(False)
+            self.status_label.setText("Cancelling...")
+    
+    def benchmark_aborted(self):
+        # Cancelled before any task was timed
+        self.status_label.setText("Benchmark cancelled")
+        self.progress_bar.setValue(0)
+        self.reset_ui()
+    
+    def poll_progress(self):
+        if self.benchmark_worker and self.benchmark_worker.progress is not None:
+            self.update_progress(*self.benchmark_worker.progress)
+    
+    def live_stats(self):
+        # The running engine's per-second buckets; a sweep shows its current level
+        engine = self.benchmark_worker.engine if self.benchmark_worker else None
+        if isinstance(engine, SweepRunner):
+            engine = engine.engine
+        return getattr(engine, "live", None)
+    
+    def update_live_charts(self):
+        live = self.live_stats()
+        if live is None:
+            return
+        series = live.series()
+        self.live_requests_chart.set_series([("req/s", series["requests"])])
+        self.live_tokens_chart.set_series([("tok/s", series["tokens"])])
+        self.live_in_flight_chart.set_series([("in flight", series["in_flight"])])
+        self.live_latency_chart.set_series([("p50", series["p50"]), ("p99", series["p99"])])
+    
+    def clear_live_charts(self):
+        for chart in (self.live_requests_chart, self.live_tokens_chart, self.live_in_flight_chart,
+                      self.live_latency_chart):
+            chart.clear()
     
     def update_progress(self, value, message):
         self.progress_bar.setValue(value)
         self.status_label.setText(message)
     
     def benchmark_finished(self, results):
-        self.status_label.setText("Benchmark completed successfully")
-        self.progress_bar.setValue(100)
+        if results.get("cancelled"):
+            self.status_label.setText(f"Benchmark cancelled; showing the {results['completed']} tasks "
+                                      f"finished before it")
+        else:
+            self.status_label.setText("Benchmark completed successfully")
+            self.progress_bar.setValue(100)
         self.reset_ui()
         self.display_results(results)
+        self.store_run(results)
+    
+    def store_run(self, results):
+        # Every finished run (and sweep level) goes into the history database
+        try:
+            self.store.add_run(results)
+        except sqlite3.Error as e:
+            self.status_label.setText(f"Could not save the run to {DEFAULT_STORE}: {e}")
+            return
+        self.refresh_history_filters()
+        self.show_history()
+    
+    def refresh_history_filters(self):
+        # Keeps the current selections; signals are held so the chart is only
+        # redrawn once
+        for combo, values, everything in ((self.history_model_combo, self.store.models(), "All models"),
+                                          (self.history_host_combo, self.store.hosts(), "All hosts")):
+            current = combo.currentText()
+            combo.blockSignals(True)
+            combo.clear()
+            combo.addItem(everything)
+            combo.addItems([value for value in values if value])
+            combo.setCurrentText(current)
+            combo.blockSignals(False)
+    
+    def show_history(self):
+        model = self.history_model_combo.currentText() if self.history_model_combo.currentIndex() > 0 else None
+        host = self.history_host_combo.currentText() if self.history_host_combo.currentIndex() > 0 else None
+        metric = self.history_metric_combo.currentText()
+        now = time.time()
+        try:
+            points = self.store.history(metric, model, host, self.history_days_spin.value() or None)
+        except sqlite3.Error as e:
+            self.history_label.setText(f"Could not read {DEFAULT_STORE}: {e}")
+            return
+        self.history_chart.title = f"{metric} history"
+        self.history_chart.set_series([(metric, [((started - now) / 86400, value) for started, value in points])])
+        self.history_label.setText(f"{len(points)} runs in {DEFAULT_STORE}" if points else
+                                   f"No saved runs match; finished runs are saved to {DEFAULT_STORE}")
+    
+    def sweep_finished(self, report):
+        if report["cancelled"]:
+            self.status_label.setText("Concurrency sweep cancelled")
+        else:
+            self.status_label.setText("Concurrency sweep completed")
+            self.progress_bar.setValue(100)
+        self.reset_ui()
+        
+        # Per-task results are already stored with each level's summary
+        report = {key: value for key, value in report.items() if key != "runs"}
+        self.sweep_results.append(report)
+        
+        points = report["points"]
+        self.sweep_throughput_chart.set_series([
+            ("Throughput (tasks/s)", [(p["concurrency"], p["throughput"]) for p in points])
+        ])
+        self.sweep_latency_chart.set_series([
+            ("p50", [(p["concurrency"], p["latency_p50"]) for p in points]),
+            ("p90", [(p["concurrency"], p["latency_p90"]) for p in points]),
+            ("p99", [(p["concurrency"], p["latency_p99"]) for p in points])
+        ])
+        
+        knee = report["knee"]
+        if report["cancelled"]:
+            self.sweep_label.setText("Sweep cancelled; only levels that ran to completion are charted")
+        elif knee:
+            for chart in (self.sweep_throughput_chart, self.sweep_latency_chart):
+                chart.set_marker(knee["concurrency"], "knee")
+            self.sweep_label.setText(f"Throughput saturates at concurrency {knee['concurrency']} "
+                                     f"({knee['throughput']:.2f} tasks/s, p99 {knee['latency_p99']:.3f} s)")
+        else:
+            self.sweep_label.setText("Throughput was still rising at the highest level; raise the concurrency to find the knee")
+    
+    def context_sweep_finished(self, report):
+        if report["cancelled"]:
+            self.status_label.setText("Context sweep cancelled")
+        else:
+            self.status_label.setText("Context sweep completed")
+            self.progress_bar.setValue(100)
+        self.reset_ui()
+        
+        report = {key: value for key, value in report.items() if key != "runs"}
+        self.sweep_results.append(report)
+        
+        # Prefill is only known for Ollama and TTFT only when streaming;
+        # series without values are left out
+        points = report["points"]
+        self.context_throughput_chart.set_series([
+            ("Throughput (tasks/s)", [(p["context_tokens"], p["throughput"]) for p in points])
+        ])
+        self.context_latency_chart.set_series([
+            (label, [(p["context_tokens"], p[key]) for p in points if p[key] is not None])
+            for label, key in (("prefill avg", "prefill_avg"), ("TTFT p50", "ttft_p50"),
+                               ("latency p50", "latency_p50"), ("latency p99", "latency_p99"))
+        ])
+        
+        falloff = report["falloff"]
+        if report["cancelled"]:
+            self.context_label.setText("Sweep cancelled; only lengths that ran to completion are charted")
+        elif falloff:
+            for chart in (self.context_throughput_chart, self.context_latency_chart):
+                chart.set_marker(falloff["context_tokens"], "falloff")
+            self.context_label.setText(f"Throughput falls below {report['falloff_share'] * 100:.0f}% of the "
+                                       f"shortest prompts' at {falloff['context_tokens']} tokens "
+                                       f"({falloff['throughput']:.2f} tasks/s)")
+        else:
+            self.context_label.setText(f"Throughput stayed above {report['falloff_share'] * 100:.0f}% of the "
+                                       f"shortest prompts' up to {points[-1]['context_tokens']} tokens")
     
     def handle_error(self, error_message):
         self.status_label.setText(f"Error: {error_message}")
@@ -840,132 +1170,155 @@ class OllamaBenchmarkApp(QMainWindow):
         QMessageBox.critical(self, "Benchmark Error", f"An error occurred:\n\n{error_message}")
     
     def reset_ui(self):
-        self.start_btn.setEnabled(True)
-        self.cancel_btn.setEnabled(False)
-        self.api_type_combo.setEnabled(True)
-        self.api_endpoint_edit.setEnabled(True)
-        self.api_key_edit.setEnabled(True)
-        self.api_path_edit.setEnabled(True)
-        self.model_combo.setEnabled(True)
-        self.refresh_btn.setEnabled(True)
-        self.tasks_spin.setEnabled(True)
-        self.concurrency_spin.setEnabled(True)
+        self.progress_timer.stop()
+        self.live_timer.stop()
+        # Last redraw, so the charts end where the run did
+        self.update_live_charts()
+        self.set_controls_enabled(True)
+    
+    def set_controls_enabled(self, enabled):
+        self.start_btn.setEnabled(enabled)
+        self.sweep_btn.setEnabled(enabled)
+        self.context_sweep_btn.setEnabled(enabled)
+        self.load_log_btn.setEnabled(enabled)
+        self.cancel_btn.setEnabled(not enabled)
+        self.api_type_combo.setEnabled(enabled)
+        self.api_endpoint_edit.setEnabled(enabled)
+        self.balancer_combo.setEnabled(enabled)
+        self.api_key_edit.setEnabled(enabled)
+        self.api_path_edit.setEnabled(enabled)
+        self.model_combo.setEnabled(enabled)
+        self.refresh_btn.setEnabled(enabled)
+        self.tasks_spin.setEnabled(enabled)
+        self.concurrency_spin.setEnabled(enabled)
+        self.engine_combo.setEnabled(enabled)
+        self.processes_spin.setEnabled(enabled)
+        self.arrival_rate_spin.setEnabled(enabled)
+        self.duration_spin.setEnabled(enabled)
+        self.arrival_combo.setEnabled(enabled)
+        self.stream_check.setEnabled(enabled)
+        self.prewarm_check.setEnabled(enabled)
+        self.max_tokens_spin.setEnabled(enabled)
+        self.prompt_file_edit.setEnabled(enabled)
+        self.prompt_browse_btn.setEnabled(enabled)
+        self.prompt_bucket_combo.setEnabled(enabled)
+        self.seed_spin.setEnabled(enabled)
     
     def display_results(self, results):
         # Store results
         self.benchmark_results.append(results)
         
-        # Update summary table
+        # Only the new run's row is filled in; earlier rows stay as they are
+        i = len(self.benchmark_results) - 1
+        result = results
         self.summary_table.setRowCount(len(self.benchmark_results))
         
-        for i, result in enumerate(self.benchmark_results):
-            api_item = QTableWidgetItem(result["api_type"])
-            model_item = QTableWidgetItem(result["model"])
-            tasks_item = QTableWidgetItem(str(result["task_count"]))
-            time_item = QTableWidgetItem(f"{result['total_time']:.2f}")
-            throughput_item = QTableWidgetItem(f"{result['throughput']:.2f}")
-            tokens_item = QTableWidgetItem(f"{result['tokens_sec_avg']:.2f}")
-            
-            # Color code throughput for performance
-            throughput = result['throughput']
-            if throughput > 5:
-                throughput_item.setForeground(QColor(144, 238, 144))  # Light green
-            elif throughput > 2:
-                throughput_item.setForeground(QColor(173, 216, 230))  # Light blue
-            
-            # Color code tokens per second
-            tokens_sec = result['tokens_sec_avg']
-            if tokens_sec > 100:
-                tokens_item.setForeground(QColor(144, 238, 144))  # Light green
-            elif tokens_sec > 50:
-                tokens_item.setForeground(QColor(173, 216, 230))  # Light blue
-            
-            self.summary_table.setItem(i, 0, api_item)
-            self.summary_table.setItem(i, 1, model_item)
-            self.summary_table.setItem(i, 2, tasks_item)
-            self.summary_table.setItem(i, 3, time_item)
-            self.summary_table.setItem(i, 4, throughput_item)
-            self.summary_table.setItem(i, 5, tokens_item)
+        api_item = QTableWidgetItem(result["api_type"])
+        model_item = QTableWidgetItem(result["model"])
+        tasks_item = QTableWidgetItem(str(result["completed"]))
+        if result.get("load_mode") == "open":
+            load_item = QTableWidgetItem(f"{result['arrival_rate']:g}/s {result['arrival_process']}")
+            load_item.setToolTip(f"Avg queue delay {result['queue_delay_avg']:.3f}s, "
+                                 f"max {result['queue_delay_max']:.3f}s")
+        else:
+            load_item = QTableWidgetItem(f"closed x{result['concurrency']}")
+        if result.get("processes", 1) > 1:
+            load_item.setText(f"{load_item.text()}, {result['processes']} procs")
+        time_item = QTableWidgetItem(f"{result['total_time']:.2f}")
+        throughput_item = QTableWidgetItem(f"{result['throughput']:.2f}")
+        latency_item = QTableWidgetItem(f"{result['latency_p50']:.3f} / {result['latency_p95']:.3f} / "
+                                        f"{result['latency_p99']:.3f}")
+        latency_tooltip = percentile_tooltip(result)
+        if "server_timing" in result:
+            latency_tooltip += "\n" + "\n".join(format_server_timing(result))
+        latency_item.setToolTip(latency_tooltip)
+        tokens_item = QTableWidgetItem(f"{result['tokens_sec_avg']:.2f}")
+        # Hosted APIs have no server timings; the tooltip says what was measured
+        tokens_item.setToolTip("\n".join(format_token_rates(result)))
+        ttft_item = QTableWidgetItem(f"{result['ttft_avg']:.3f}" if result.get("stream") else "-")
+        reuse_item = QTableWidgetItem(f"{result['connections']['reuse_rate'] * 100:.1f}%" if "connections" in result else "-")
+        if "connections" in result:
+            reuse_item.setToolTip(f"{result['connections']['connections_opened']} connections opened, "
+                                  f"{result['connections']['connections_prewarmed']} before timing")
+        
+        # Client-side share of task time; above 5% the tool is skewing the numbers
+        overhead_item = QTableWidgetItem(f"{result['harness_overhead_share'] * 100:.1f}%" if "phases" in result else "-")
+        if "phases" in result:
+            overhead_item.setToolTip("Average per phase (ms):\n" + "\n".join(
+                f"{name}: {phase['avg'] * 1000:.2f}" for name, phase in result["phases"].items()))
+            if result["harness_overhead_share"] > 0.05:
+                overhead_item.setForeground(QColor(255, 128, 128))  # Light red
+        
+        # Color code throughput for performance
+        throughput = result['throughput']
+        if throughput > 5:
+            throughput_item.setForeground(QColor(144, 238, 144))  # Light green
+        elif throughput > 2:
+            throughput_item.setForeground(QColor(173, 216, 230))  # Light blue
+        
+        # Color code tokens per second
+        tokens_sec = result['tokens_sec_avg']
+        if tokens_sec > 100:
+            tokens_item.setForeground(QColor(144, 238, 144))  # Light green
+        elif tokens_sec > 50:
+            tokens_item.setForeground(QColor(173, 216, 230))  # Light blue
+        
+        self.summary_table.setItem(i, 0, api_item)
+        self.summary_table.setItem(i, 1, model_item)
+        self.summary_table.setItem(i, 2, tasks_item)
+        self.summary_table.setItem(i, 3, load_item)
+        self.summary_table.setItem(i, 4, time_item)
+        self.summary_table.setItem(i, 5, throughput_item)
+        self.summary_table.setItem(i, 6, latency_item)
+        self.summary_table.setItem(i, 7, tokens_item)
+        self.summary_table.setItem(i, 8, ttft_item)
+        self.summary_table.setItem(i, 9, reuse_item)
+        self.summary_table.setItem(i, 10, overhead_item)
         
         # Auto-select last result
         if self.benchmark_results:
             self.summary_table.selectRow(len(self.benchmark_results) - 1)
             self.show_task_details(self.benchmark_results[-1])
+            self.show_timeline(self.benchmark_results[-1])
+            self.show_endpoints(self.benchmark_results[-1])
+    
+    def show_timeline(self, results):
+        # Plot each window at its midpoint
+        timeline = results.get("timeline", [])
+        midpoints = [(row["start"] + row["end"]) / 2 for row in timeline]
+        self.timeline_throughput_chart.set_series([
+            ("tasks/s", [(x, row["throughput"]) for x, row in zip(midpoints, timeline)])
+        ])
+        self.timeline_latency_chart.set_series([
+            ("p50", [(x, row["latency_p50"]) for x, row in zip(midpoints, timeline)]),
+            ("p99", [(x, row["latency_p99"]) for x, row in zip(midpoints, timeline)])
+        ])
+    
+    def show_endpoints(self, results):
+        endpoint_stats = results.get("endpoint_stats", {})
+        if endpoint_stats:
+            self.endpoints_label.setText(f"{len(endpoint_stats)} endpoints, {results['balancer']} balancing")
+        self.endpoints_table.setRowCount(len(endpoint_stats))
+        for i, (endpoint, stats) in enumerate(endpoint_stats.items()):
+            values = [endpoint, str(stats["completed"]), f"{stats['share'] * 100:.1f}%",
+                      f"{stats['throughput']:.2f}", f"{stats['latency_p50']:.3f}",
+                      f"{stats['latency_p90']:.3f}", f"{stats['latency_p99']:.3f}", str(stats["error_count"])]
+            # Highlight replicas whose median latency is well above the fleet's
+            slow = stats["slowdown"] > SLOW_REPLICA
+            for column, value in enumerate(values):
+                item = QTableWidgetItem(value)
+                if slow:
+                    item.setForeground(QColor(255, 128, 128))  # Light red
+                    item.setToolTip(f"Median latency {stats['slowdown']:.1f}x the fleet's")
+                self.endpoints_table.setItem(i, column, item)
     
     def show_task_details(self, results):
-        self.results_table.setRowCount(len(results["results"]))
-        
-        for i, task in enumerate(results["results"]):
-            # Truncate long prompts
-            prompt_text = task["prompt"]
-            if len(prompt_text) > 60:
-                prompt_text = prompt_text[:57] + "..."
-            
-            prompt_item = QTableWidgetItem(prompt_text)
-            prompt_item.setToolTip(task["prompt"])
-            
-            latency_item = QTableWidgetItem(f"{task['latency']:.4f}")
-            latency_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            
-            tokens_item = QTableWidgetItem(f"{task['tokens_sec']:.2f}")
-            tokens_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            
-            # Color code tokens/s for performance
-            tokens_per_sec = task['tokens_sec']
-            if tokens_per_sec > 100:
-                tokens_item.setForeground(QColor(144, 238, 144))  # Light green
-            elif tokens_per_sec > 50:
-                tokens_item.setForeground(QColor(173, 216, 230))  # Light blue
-            
-            # Status and error handling
-            status = "✅ Success"
-            status_color = QColor(144, 238, 144)  # Green
-            error_text = ""
-            
-            if "error" in task:
-                status = "❌ Failed"
-                status_color = QColor(255, 128, 128)  # Light red
-                error_text = task["error"]
-            
-            status_item = QTableWidgetItem(status)
-            status_item.setForeground(status_color)
-            
-            error_item = QTableWidgetItem(error_text)
-            
-            self.results_table.setItem(i, 0, prompt_item)
-            self.results_table.setItem(i, 1, latency_item)
-            self.results_table.setItem(i, 2, tokens_item)
-            self.results_table.setItem(i, 3, status_item)
-            self.results_table.setItem(i, 4, error_item)
-        
-        # Add overall metrics row
-        self.results_table.insertRow(0)
-        
-        avg_latency = sum(t["latency"] for t in results["results"]) / len(results["results"]) if results["results"] else 0
-        avg_tokens = sum(t["tokens_sec"] for t in results["results"]) / len(results["results"]) if results["results"] else 0
-        
-        avg_latency_item = QTableWidgetItem(f"{avg_latency:.4f}")
-        avg_latency_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        avg_latency_item.setBackground(QColor(70, 70, 70))
-        
-        avg_tokens_item = QTableWidgetItem(f"{avg_tokens:.2f}")
-        avg_tokens_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        avg_tokens_item.setBackground(QColor(70, 70, 70))
-        
-        self.results_table.setItem(0, 0, QTableWidgetItem("AVERAGE"))
-        self.results_table.setItem(0, 1, avg_latency_item)
-        self.results_table.setItem(0, 2, avg_tokens_item)
-        self.results_table.setItem(0, 3, QTableWidgetItem("Aggregate"))
-        self.results_table.setItem(0, 4, QTableWidgetItem(""))
-        self.results_table.item(0, 0).setBackground(QColor(70, 70, 70))
-        self.results_table.item(0, 3).setBackground(QColor(70, 70, 70))
-        self.results_table.item(0, 4).setBackground(QColor(70, 70, 70))
+        self.task_model.set_run(results)
     
     def closeEvent(self, event):
         if self.benchmark_worker and self.benchmark_worker.isRunning():
             self.benchmark_worker.cancel()
-            self.benchmark_worker.terminate()
-            self.benchmark_worker.wait(2000)
+            self.benchmark_worker.wait(5000)
         
         # Save results to JSON
         if self.benchmark_results:
@@ -975,6 +1328,15 @@ class OllamaBenchmarkApp(QMainWindow):
                 json.dump(self.benchmark_results, f, indent=2)
             print(f"Benchmark results saved to {filename}")
         
+        # Save sweep curves separately; their per-level runs are in the file above
+        if self.sweep_results:
+            timestamp = time.strftime("%Y%m%d-%H%M%S")
+            filename = f"api_sweep_{timestamp}.json"
+            with open(filename, 'w') as f:
+                json.dump(self.sweep_results, f, indent=2)
+            print(f"Sweep results saved to {filename}")
+        
+        self.store.close()
         event.accept()
 
 if __name__ == "__main__":
@@ -1,231 +1,86 @@
 import sys
-import requests
 import time
 import json
-import concurrent.futures
-import random
+import sqlite3
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QComboBox, QPushButton, QProgressBar, QTableWidget,
-                             QTableWidgetItem, QHeaderView, QSplitter, QTextEdit, 
-                             QMessageBox, QGroupBox, QSpinBox, QTabWidget, QStyleFactory)
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
+                             QTableWidgetItem, QTableView, QHeaderView, QSplitter, QTextEdit, 
+                             QMessageBox, QGroupBox, QSpinBox, QTabWidget, QStyleFactory,
+                             QCheckBox)
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QColor, QPalette
+from stats import percentile_tooltip
+from result_models import TaskTableModel
+from benchmark_engine import create_engine, make_api_config, list_ollama_models, format_server_timing
+from results_store import ResultStore
+from charts import LineChart
 
 # Configuration
-OLLAMA_HOST = "http://localhost:11434"
+OLLAMA_HOST = "http://localhost:11434"  # Comma-separate several replicas to benchmark them as one fleet
 WARMUP_RUNS = 1  # Initial runs to warm up the model
 CONCURRENCY_LEVEL = 10  # Fixed concurrency level
+ENGINE_TYPE = "thread"  # Load engine: "thread" or "asyncio" (requires aiohttp)
+LOAD_PROCESSES = 1  # Split the load over this many processes to get past the GIL
+PREWARM_CONNECTIONS = False  # Open one keep-alive connection per worker before timing
+STREAM_MODE = False  # Stream tokens to measure time-to-first-token and inter-token latency
+ARRIVAL_RATE = None  # Requests/s for open-loop load; None keeps the closed loop
+ARRIVAL_PROCESS = "poisson"  # Open-loop inter-arrival times: "poisson" or "constant"
+RESULT_LOG = True  # Append every finished task to ollama_run_<timestamp>.jsonl during the run
+LOAD_BALANCER = "round_robin"  # Across replicas: "round_robin", "least_outstanding" or "consistent_hash"
+PROMPT_FILE = None  # Prompt corpus (text, one prompt per line, or .jsonl); None uses the built-in prompts
+PROMPT_BUCKET = None  # Only corpus prompts of this estimated token length, e.g. "256-1024"
+PROMPT_SEED = None  # Same seed, same prompts in the same order; None for a random order
+MAX_OUTPUT_TOKENS = None  # Pin the generation length (num_predict); None lets the model decide
+RESULT_STORE = "benchmark_history.db"  # SQLite history of finished runs (see cli.py --history); None to disable
 
-# Generate 100 diverse benchmark prompts
-BENCHMARK_PROMPTS = [
-    "Explain quantum computing in simple terms",
-    "Write a Python function to calculate Fibonacci sequence",
-    "write a short story",
-    "write a poem",
-    "Describe three benefits of renewable energy",
-    "What is the capital of France? Just state the city name.",
-    "How does photosynthesis work in plants?",
-    "Create a short poem about the changing seasons",
-    "Describe the process of cellular respiration",
-    "What are the main differences between Python and JavaScript?",
-    "Explain the concept of object-oriented programming",
-    "How does a neural network learn from data?",
-    "Describe the water cycle in nature",
-    "What causes earthquakes and how are they measured?",
-    "Explain the theory of relativity in simple terms",
-    "How do vaccines work to protect against diseases?",
-    "Describe the structure of DNA and its role in genetics",
-    "What is blockchain technology and how does it work?",
-    "Explain the difference between HTTP and HTTPS",
-    "How do clouds form in the atmosphere?",
-    "Describe the process of evolution by natural selection",
-    "What are black holes and how are they formed?",
-    "Explain how a CPU processes instructions",
-    "Describe the lifecycle of a butterfly",
-    "What is machine learning and give an example of its application",
-    "Explain the greenhouse effect and its impact on climate",
-    "How do batteries store and release electrical energy?",
-    "Describe the human digestive system",
-    "What are the main layers of the Earth's atmosphere?",
-    "Explain how solar panels convert sunlight into electricity",
-    "Describe the process of mitosis in cell division",
-    "What is the difference between RAM and ROM?",
-    "Explain how GPS technology determines location",
-    "Describe the structure and function of the human heart",
-    "What causes the tides in Earth's oceans?",
-    "Explain the concept of supply and demand in economics",
-    "How do airplanes generate lift to fly?",
-    "Describe the process of protein synthesis in cells",
-    "What is artificial intelligence and what are its main branches?",
-    "Explain how the immune system fights infections",
-    "Describe the water treatment process for making it drinkable",
-    "What are the main components of a computer network?",
-    "Explain the difference between kinetic and potential energy",
-    "How do electric motors convert electricity into motion?",
-    "Describe the process of fossil fuel formation",
-    "What is the carbon cycle and why is it important?",
-    "Explain how microwave ovens heat food",
-    "Describe the structure of the solar system",
-    "What causes the phases of the moon?",
-    "Explain how antibiotics fight bacterial infections",
-    "Describe the process of DNA replication",
-    "What is cryptography and how is it used in cybersecurity?",
-    "Explain how nuclear power plants generate electricity",
-    "Describe the human respiratory system",
-    "What are enzymes and what role do they play in metabolism?",
-    "Explain the concept of natural selection with an example",
-    "How do optical fibers transmit data?",
-    "Describe the process of soil formation",
-    "What are the main types of renewable energy sources?",
-    "Explain how the Doppler effect changes sound frequency",
-    "Describe the structure and function of the human brain",
-    "What causes volcanic eruptions?",
-    "Explain how digital cameras capture images",
-    "Describe the nitrogen cycle in ecosystems",
-    "What is the difference between weather and climate?",
-    "Explain how hybrid cars save fuel",
-    "Describe the process of osmosis in cells",
-    "What are stem cells and why are they important?",
-    "Explain how radar systems detect objects",
-    "Describe the process of fermentation in food production",
-    "What is the big bang theory in cosmology?",
-    "Explain how touchscreens detect input",
-    "Describe the human circulatory system",
-    "What causes lightning and thunder during storms?",
-    "Explain the concept of opportunity cost in economics",
-    "How do wind turbines generate electricity?",
-    "Describe the process of metamorphosis in frogs",
-    "What is the difference between analog and digital signals?",
-    "Explain how vaccines create immunity",
-    "Describe the structure of an atom",
-    "What are the main types of rocks and how do they form?",
-    "Explain how refrigerators keep food cold",
-    "Describe the process of pollination in plants",
-    "What causes the aurora borealis (northern lights)?",
-    "Explain how voice recognition software works",
-    "Describe the human skeletal system",
-    "What is the difference between mass and weight?",
-    "How do submarines dive and surface?",
-    "Describe the process of eutrophication in water bodies",
-    "What is machine translation and how does it work?",
-    "Explain how solar eclipses occur",
-    "Describe the process of cellular differentiation",
-    "What causes ocean currents?",
-    "Explain how biometric authentication systems work",
-    "Describe the structure and function of the liver",
-    "What is dark matter in astronomy?",
-    "How do speakers convert electrical signals into sound?",
-    "Describe the process of erosion and deposition",
-    "What is the difference between AC and DC electricity?",
-    "Explain how 3D printing creates objects",
-    "Describe the human nervous system",
-    "What causes seasons on Earth?"
-]
+PROGRESS_REFRESH_MS = 100  # How often the window shows the latest progress
+LIVE_REFRESH_MS = 1000  # How often the live charts are redrawn
 
 class BenchmarkWorker(QThread):
-    progress_updated = pyqtSignal(int, str)
     benchmark_completed = pyqtSignal(dict)
+    benchmark_cancelled = pyqtSignal()
     error_occurred = pyqtSignal(str)
     
-    def __init__(self, model_name, task_count):
+    def __init__(self, model_name, task_count, stream=STREAM_MODE, duration=None):
         super().__init__()
-        self.model_name = model_name
-        self.task_count = task_count
-        self.cancelled = False
+        self.progress = None
+        api_config = make_api_config("Ollama", OLLAMA_HOST)
+        self.engine = create_engine(ENGINE_TYPE, api_config, model_name, task_count,
+                                    concurrency=CONCURRENCY_LEVEL,
+                                    stream=stream,
+                                    duration=duration,
+                                    warmup_runs=WARMUP_RUNS,
+                                    prewarm=PREWARM_CONNECTIONS,
+                                    arrival_rate=ARRIVAL_RATE,
+                                    arrival_process=ARRIVAL_PROCESS,
+                                    balancer=LOAD_BALANCER,
+                                    processes=LOAD_PROCESSES,
+                                    prompt_file=PROMPT_FILE,
+                                    prompt_bucket=PROMPT_BUCKET,
+                                    seed=PROMPT_SEED,
+                                    max_tokens=MAX_OUTPUT_TOKENS,
+                                    result_log=f"ollama_run_{time.strftime('%Y%m%d-%H%M%S')}.jsonl" if RESULT_LOG else None,
+                                    progress_callback=self.record_progress)
     
     def run(self):
         try:
-            # Warm-up runs
-            for i in range(WARMUP_RUNS):
-                if self.cancelled:
-                    return
-                self.progress_updated.emit(0, f"Warming up model ({i+1}/{WARMUP_RUNS})...")
-                self._run_benchmark("Warm up run")
-            
-            # Select random prompts for the benchmark
-            selected_prompts = random.sample(BENCHMARK_PROMPTS, self.task_count)
-            
-            # Prepare for benchmark
-            self.progress_updated.emit(0, f"Preparing {self.task_count} tasks...")
-            start_time = time.time()
-            results = []
-            completed = 0
-            
-            # Run benchmark with thread pool
-            with concurrent.futures.ThreadPoolExecutor(max_workers=CONCURRENCY_LEVEL) as executor:
-                futures = {executor.submit(self._run_benchmark, prompt): prompt for prompt in selected_prompts}
-                
-                for future in concurrent.futures.as_completed(futures):
-                    if self.cancelled:
-                        return
-                    
-                    completed += 1
-                    progress = int((completed / self.task_count) * 100)
-                    status = f"Completed {completed}/{self.task_count} tasks"
-                    self.progress_updated.emit(progress, status)
-                    
-                    try:
-                        metrics = future.result()
-                        if metrics:
-                            results.append(metrics)
-                    except Exception as e:
-                        print(f"Task failed: {str(e)}")
-            
-            # Calculate overall metrics
-            total_time = time.time() - start_time
-            throughput = self.task_count / total_time
-            latency_avg = sum(r['latency'] for r in results) / len(results) if results else 0
-            tokens_sec_avg = sum(r['tokens_sec'] for r in results) / len(results) if results else 0
-            
-            # Emit results
-            self.benchmark_completed.emit({
-                "model": self.model_name,
-                "task_count": self.task_count,
-                "total_time": total_time,
-                "throughput": throughput,
-                "latency_avg": latency_avg,
-                "tokens_sec_avg": tokens_sec_avg,
-                "results": results
-            })
-            
+            results = self.engine.run()
+            # Runs cancelled mid-way still return the tasks finished so far
+            if results is not None:
+                self.benchmark_completed.emit(results)
+            else:
+                self.benchmark_cancelled.emit()
         except Exception as e:
             self.error_occurred.emit(str(e))
     
-    def _run_benchmark(self, prompt):
-        payload = {
-            "model": self.model_name,
-            "prompt": prompt,
-            "stream": False,
-            "options": {"temperature": 0.0}  # For consistent results
-        }
-        
-        start_time = time.perf_counter()
-        response = requests.post(
-            f"{OLLAMA_HOST}/api/generate",
-            json=payload,
-            headers={"Content-Type": "application/json"},
-            timeout=60
-        )
-        end_time = time.perf_counter()
-        
-        if response.status_code != 200:
-            raise Exception(f"API Error: {response.text}")
-        
-        data = response.json()
-        eval_duration = data.get('eval_duration', 0) / 1e9  # ns to seconds
-        eval_count = data.get('eval_count', 0)
-        tokens_sec = eval_count / eval_duration if eval_duration > 0 else 0
-        
-        return {
-            "prompt": prompt,
-            "latency": end_time - start_time,
-            "eval_duration": eval_duration,
-            "eval_count": eval_count,
-            "tokens_sec": tokens_sec
-        }
+    def record_progress(self, value, message):
+        # Called by the engine once per task. Only the latest value is kept
+        # and the window picks it up on a timer, so the GUI does the same
+        # work at 10 or 10,000 tasks/s.
+        self.progress = (value, message)
     
     def cancel(self):
-        self.cancelled = True
+        self.engine.cancel()
 
 class OllamaBenchmarkApp(QMainWindow):
     def __init__(self):
@@ -329,8 +184,9 @@ class OllamaBenchmarkApp(QMainWindow):
         
         self.tasks_spin = QSpinBox()
         self.tasks_spin.setFont(QFont("Arial", 10))
-        self.tasks_spin.setRange(1, 200)
+        self.tasks_spin.setRange(0, 10000000)
         self.tasks_spin.setValue(100)
+        self.tasks_spin.setSpecialValueText("Unlimited")
         self.tasks_spin.setStyleSheet("""
             QSpinBox {
                 padding: 6px;
@@ -345,12 +201,38 @@ class OllamaBenchmarkApp(QMainWindow):
             }
         """)
         
+        # Soak test duration; prompts are cycled when the task count exceeds them
+        self.duration_spin = QSpinBox()
+        self.duration_spin.setFont(QFont("Arial", 10))
+        self.duration_spin.setRange(0, 10080)
+        self.duration_spin.setValue(0)
+        self.duration_spin.setSuffix(" min")
+        self.duration_spin.setSpecialValueText("No time limit")
+        self.duration_spin.setToolTip("Stop starting new tasks after this many minutes (soak test)")
+        self.duration_spin.setStyleSheet(self.tasks_spin.styleSheet())
+        
         tasks_layout.addWidget(tasks_label)
         tasks_layout.addWidget(self.tasks_spin)
+        tasks_layout.addWidget(self.duration_spin)
+        
+        # Streaming mode
+        stream_layout = QVBoxLayout()
+        stream_label = QLabel("Response Mode:")
+        stream_label.setFont(QFont("Arial", 10))
+        stream_label.setStyleSheet("color: #ddd;")
+        
+        self.stream_check = QCheckBox("Streaming (TTFT / ITL)")
+        self.stream_check.setFont(QFont("Arial", 10))
+        self.stream_check.setStyleSheet("color: #eee;")
+        self.stream_check.setChecked(STREAM_MODE)
+        
+        stream_layout.addWidget(stream_label)
+        stream_layout.addWidget(self.stream_check)
         
         # Add layouts to config group
         config_layout.addLayout(model_layout)
         config_layout.addLayout(tasks_layout)
+        config_layout.addLayout(stream_layout)
         config_layout.addStretch()
         main_layout.addWidget(config_group)
         
@@ -439,8 +321,8 @@ class OllamaBenchmarkApp(QMainWindow):
         summary_label.setStyleSheet("color: #61dafb;")
         
         self.summary_table = QTableWidget()
-        self.summary_table.setColumnCount(4)
-        self.summary_table.setHorizontalHeaderLabels(["Model", "Tasks", "Total Time", "Throughput (tasks/s)"])
+        self.summary_table.setColumnCount(7)
+        self.summary_table.setHorizontalHeaderLabels(["Model", "Tasks", "Total Time", "Throughput (tasks/s)", "Latency p50/p95/p99 (s)", "Avg TTFT (s)", "Conn Reuse"])
         self.summary_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.summary_table.setRowCount(0)
         self.summary_table.setEditTriggers(QTableWidget.NoEditTriggers)
@@ -474,16 +356,17 @@ class OllamaBenchmarkApp(QMainWindow):
         results_label.setFont(QFont("Arial", 10, QFont.Bold))
         results_label.setStyleSheet("color: #61dafb;")
         
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(4)
-        self.results_table.setHorizontalHeaderLabels(["Prompt", "Latency (s)", "Tokens/s", "Status"])
+        # Model/view, so only the visible rows of a long run are ever formatted
+        self.task_model = TaskTableModel(error_column=False, tokens_sec_colors=(60, 30))
+        self.results_table = QTableView()
+        self.results_table.setModel(self.task_model)
         self.results_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
-        self.results_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.ResizeToContents)
-        self.results_table.horizontalHeader().setSectionResizeMode(2, QHeaderView.ResizeToContents)
-        self.results_table.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeToContents)
-        self.results_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        for column in range(1, 7):
+            self.results_table.horizontalHeader().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+        self.results_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.results_table.setEditTriggers(QTableView.NoEditTriggers)
         self.results_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 gridline-color: #444;
                 background-color: #252525;
                 color: #ddd;
@@ -495,7 +378,7 @@ class OllamaBenchmarkApp(QMainWindow):
                 padding: 5px;
                 border: none;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 5px;
             }
         """)
@@ -503,12 +386,40 @@ class OllamaBenchmarkApp(QMainWindow):
         results_layout.addWidget(results_label)
         results_layout.addWidget(self.results_table)
         
+        # Live charts, second by second while the run goes
+        live_panel = QWidget()
+        live_layout = QVBoxLayout(live_panel)
+        live_layout.setContentsMargins(0, 0, 0, 0)
+        live_top_layout = QHBoxLayout()
+        live_bottom_layout = QHBoxLayout()
+        self.live_requests_chart = LineChart("Requests/s", "Elapsed (s)", "req/s")
+        self.live_tokens_chart = LineChart("Tokens/s", "Elapsed (s)", "tok/s")
+        self.live_in_flight_chart = LineChart("In-flight Requests", "Elapsed (s)", "requests")
+        self.live_latency_chart = LineChart("Latency", "Elapsed (s)", "seconds")
+        live_top_layout.addWidget(self.live_requests_chart)
+        live_top_layout.addWidget(self.live_tokens_chart)
+        live_bottom_layout.addWidget(self.live_in_flight_chart)
+        live_bottom_layout.addWidget(self.live_latency_chart)
+        live_layout.addLayout(live_top_layout, 1)
+        live_layout.addLayout(live_bottom_layout, 1)
+        
         # Add panels to splitter
         results_splitter.addWidget(summary_panel)
+        results_splitter.addWidget(live_panel)
         results_splitter.addWidget(results_panel)
-        results_splitter.setSizes([200, 400])
+        results_splitter.setSizes([150, 400, 300])
         main_layout.addWidget(results_splitter, 1)
         
+        # Progress is polled rather than signalled per task
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(PROGRESS_REFRESH_MS)
+        self.progress_timer.timeout.connect(self.poll_progress)
+        
+        # The charts read the engine's per-second buckets on their own timer
+        self.live_timer = QTimer(self)
+        self.live_timer.setInterval(LIVE_REFRESH_MS)
+        self.live_timer.timeout.connect(self.update_live_charts)
+        
         # Initialize
         self.benchmark_worker = None
         self.benchmark_results = []
@@ -544,9 +455,7 @@ class OllamaBenchmarkApp(QMainWindow):
         self.status_label.setText("Loading installed models...")
         
         try:
-            response = requests.get(f"{OLLAMA_HOST}/api/tags", timeout=5)
-            response.raise_for_status()
-            models = [model['name'] for model in response.json().get('models', [])]
+            models = list_ollama_models(make_api_config("Ollama", OLLAMA_HOST)["endpoint"])
             
             if models:
                 self.model_combo.addItems(models)
@@ -565,7 +474,8 @@ class OllamaBenchmarkApp(QMainWindow):
             return
         
         # Reset UI
-        self.results_table.setRowCount(0)
+        self.task_model.clear()
+        self.clear_live_charts()
         
         # Disable controls during benchmark
         self.start_btn.setEnabled(False)
@@ -573,34 +483,77 @@ class OllamaBenchmarkApp(QMainWindow):
         self.model_combo.setEnabled(False)
         self.refresh_btn.setEnabled(False)
         self.tasks_spin.setEnabled(False)
+        self.duration_spin.setEnabled(False)
+        self.stream_check.setEnabled(False)
         
         # Create and start worker thread
         model_name = self.model_combo.currentText()
         task_count = self.tasks_spin.value()
+        stream = self.stream_check.isChecked()
+        duration = self.duration_spin.value() * 60 or None
         
-        self.benchmark_worker = BenchmarkWorker(model_name, task_count)
-        self.benchmark_worker.progress_updated.connect(self.update_progress)
+        self.benchmark_worker = BenchmarkWorker(model_name, task_count, stream, duration)
+        self.progress_timer.start()
+        self.live_timer.start()
         self.benchmark_worker.benchmark_completed.connect(self.benchmark_finished)
+        self.benchmark_worker.benchmark_cancelled.connect(self.benchmark_aborted)
         self.benchmark_worker.error_occurred.connect(self.handle_error)
         self.benchmark_worker.start()
     
     def cancel_benchmark(self):
         if self.benchmark_worker and self.benchmark_worker.isRunning():
+            # The engine drops queued tasks and cuts off the requests in
+            # flight, then the worker reports what finished before the cancel
             self.benchmark_worker.cancel()
-            self.benchmark_worker.terminate()
-            self.status_label.setText("Benchmark cancelled")
-            self.progress_bar.setValue(0)
-            self.reset_ui()
+            self.cancel_btn.setEnabled(False)
+            self.status_label.setText("Cancelling...")
+    
+    def benchmark_aborted(self):
+        # Cancelled before any task was timed
+        self.status_label.setText("Benchmark cancelled")
+        self.progress_bar.setValue(0)
+        self.reset_ui()
+    
+    def poll_progress(self):
+        if self.benchmark_worker and self.benchmark_worker.progress is not None:
+            self.update_progress(*self.benchmark_worker.progress)
+    
+    def update_live_charts(self):
+        # The running engine's per-second buckets; None before the timed phase
+        live = self.benchmark_worker.engine.live if self.benchmark_worker else None
+        if live is None:
+            return
+        series = live.series()
+        self.live_requests_chart.set_series([("req/s", series["requests"])])
+        self.live_tokens_chart.set_series([("tok/s", series["tokens"])])
+        self.live_in_flight_chart.set_series([("in flight", series["in_flight"])])
+        self.live_latency_chart.set_series([("p50", series["p50"]), ("p99", series["p99"])])
+    
+    def clear_live_charts(self):
+        for chart in (self.live_requests_chart, self.live_tokens_chart, self.live_in_flight_chart,
+                      self.live_latency_chart):
+            chart.clear()
     
     def update_progress(self, value, message):
         self.progress_bar.setValue(value)
         self.status_label.setText(message)
     
     def benchmark_finished(self, results):
-        self.status_label.setText("Benchmark completed successfully")
-        self.progress_bar.setValue(100)
+        if results.get("cancelled"):
+            self.status_label.setText(f"Benchmark cancelled; showing the {results['completed']} tasks "
+                                      f"finished before it")
+        else:
+            self.status_label.setText("Benchmark completed successfully")
+            self.progress_bar.setValue(100)
         self.reset_ui()
         self.display_results(results)
+        if RESULT_STORE:
+            try:
+                store = ResultStore(RESULT_STORE)
+                store.add_run(results)
+                store.close()
+            except sqlite3.Error as e:
+                self.status_label.setText(f"Could not save the run to {RESULT_STORE}: {e}")
     
     def handle_error(self, error_message):
         self.status_label.setText(f"Error: {error_message}")
@@ -609,36 +562,54 @@ class OllamaBenchmarkApp(QMainWindow):
         QMessageBox.critical(self, "Benchmark Error", f"An error occurred:\n\n{error_message}")
     
     def reset_ui(self):
+        self.progress_timer.stop()
+        self.live_timer.stop()
+        # Last redraw, so the charts end where the run did
+        self.update_live_charts()
         self.start_btn.setEnabled(True)
         self.cancel_btn.setEnabled(False)
         self.model_combo.setEnabled(True)
         self.refresh_btn.setEnabled(True)
         self.tasks_spin.setEnabled(True)
+        self.duration_spin.setEnabled(True)
+        self.stream_check.setEnabled(True)
     
     def display_results(self, results):
         # Store results
         self.benchmark_results.append(results)
         
-        # Update summary table
+        # Only the new run's row is filled in; earlier rows stay as they are
+        i = len(self.benchmark_results) - 1
+        result = results
         self.summary_table.setRowCount(len(self.benchmark_results))
         
-        for i, result in enumerate(self.benchmark_results):
-            model_item = QTableWidgetItem(result["model"])
-            tasks_item = QTableWidgetItem(str(result["task_count"]))
-            time_item = QTableWidgetItem(f"{result['total_time']:.2f}")
-            throughput_item = QTableWidgetItem(f"{result['throughput']:.2f}")
-            
-            # Color code throughput for performance
-            throughput = result['throughput']
-            if throughput > 5:
-                throughput_item.setForeground(QColor(144, 238, 144))  # Light green
-            elif throughput > 2:
-                throughput_item.setForeground(QColor(173, 216, 230))  # Light blue
-            
-            self.summary_table.setItem(i, 0, model_item)
-            self.summary_table.setItem(i, 1, tasks_item)
-            self.summary_table.setItem(i, 2, time_item)
-            self.summary_table.setItem(i, 3, throughput_item)
+        model_item = QTableWidgetItem(result["model"])
+        tasks_item = QTableWidgetItem(str(result["completed"]))
+        time_item = QTableWidgetItem(f"{result['total_time']:.2f}")
+        throughput_item = QTableWidgetItem(f"{result['throughput']:.2f}")
+        latency_item = QTableWidgetItem(f"{result['latency_p50']:.3f} / {result['latency_p95']:.3f} / "
+                                        f"{result['latency_p99']:.3f}")
+        latency_tooltip = percentile_tooltip(result)
+        if "server_timing" in result:
+            latency_tooltip += "\n" + "\n".join(format_server_timing(result))
+        latency_item.setToolTip(latency_tooltip)
+        ttft_item = QTableWidgetItem(f"{result['ttft_avg']:.3f}" if result.get("stream") else "-")
+        reuse_item = QTableWidgetItem(f"{result['connections']['reuse_rate'] * 100:.1f}%" if "connections" in result else "-")
+        
+        # Color code throughput for performance
+        throughput = result['throughput']
+        if throughput > 5:
+            throughput_item.setForeground(QColor(144, 238, 144))  # Light green
+        elif throughput > 2:
+            throughput_item.setForeground(QColor(173, 216, 230))  # Light blue
+        
+        self.summary_table.setItem(i, 0, model_item)
+        self.summary_table.setItem(i, 1, tasks_item)
+        self.summary_table.setItem(i, 2, time_item)
+        self.summary_table.setItem(i, 3, throughput_item)
+        self.summary_table.setItem(i, 4, latency_item)
+        self.summary_table.setItem(i, 5, ttft_item)
+        self.summary_table.setItem(i, 6, reuse_item)
         
         # Auto-select last result
         if self.benchmark_results:
@@ -646,65 +617,12 @@ class OllamaBenchmarkApp(QMainWindow):
             self.show_task_details(self.benchmark_results[-1])
     
     def show_task_details(self, results):
-        self.results_table.setRowCount(len(results["results"]))
-        
-        for i, task in enumerate(results["results"]):
-            # Truncate long prompts
-            prompt_text = task["prompt"]
-            if len(prompt_text) > 60:
-                prompt_text = prompt_text[:57] + "..."
-            
-            prompt_item = QTableWidgetItem(prompt_text)
-            prompt_item.setToolTip(task["prompt"])
-            
-            latency_item = QTableWidgetItem(f"{task['latency']:.4f}")
-            latency_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            
-            tokens_item = QTableWidgetItem(f"{task['tokens_sec']:.2f}")
-            tokens_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-            
-            # Color code tokens/s for performance
-            tokens_per_sec = task['tokens_sec']
-            if tokens_per_sec > 60:
-                tokens_item.setForeground(QColor(144, 238, 144))  # Light green
-            elif tokens_per_sec > 30:
-                tokens_item.setForeground(QColor(173, 216, 230))  # Light blue
-            
-            # Add status indicator
-            status_item = QTableWidgetItem("✅ Success")
-            status_item.setForeground(QColor(144, 238, 144))  # Green
-            
-            self.results_table.setItem(i, 0, prompt_item)
-            self.results_table.setItem(i, 1, latency_item)
-            self.results_table.setItem(i, 2, tokens_item)
-            self.results_table.setItem(i, 3, status_item)
-        
-        # Add overall metrics row
-        self.results_table.insertRow(0)
-        
-        avg_latency = sum(t["latency"] for t in results["results"]) / len(results["results"])
-        avg_tokens = sum(t["tokens_sec"] for t in results["results"]) / len(results["results"])
-        
-        avg_latency_item = QTableWidgetItem(f"{avg_latency:.4f}")
-        avg_latency_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        avg_latency_item.setBackground(QColor(70, 70, 70))
-        
-        avg_tokens_item = QTableWidgetItem(f"{avg_tokens:.2f}")
-        avg_tokens_item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-        avg_tokens_item.setBackground(QColor(70, 70, 70))
-        
-        self.results_table.setItem(0, 0, QTableWidgetItem("AVERAGE"))
-        self.results_table.setItem(0, 1, avg_latency_item)
-        self.results_table.setItem(0, 2, avg_tokens_item)
-        self.results_table.setItem(0, 3, QTableWidgetItem("Aggregate"))
-        self.results_table.item(0, 0).setBackground(QColor(70, 70, 70))
-        self.results_table.item(0, 3).setBackground(QColor(70, 70, 70))
+        self.task_model.set_run(results)
     
     def closeEvent(self, event):
         if self.benchmark_worker and self.benchmark_worker.isRunning():
             self.benchmark_worker.cancel()
-            self.benchmark_worker.terminate()
-            self.benchmark_worker.wait(2000)
+            self.benchmark_worker.wait(5000)
         
         # Save results to JSON
         if self.benchmark_results:
@@ -0,0 +1,240 @@
+import time
+import json
+import asyncio
+from benchmark_engine import (BenchmarkEngine, REQUEST_TIMEOUT, arrival_offsets, build_request, parse_metrics,
+                              task_phases)
+from streaming import read_stream_async
+
+# aiohttp is only needed for the asyncio engine
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# asyncio load engine. Every in-flight request is a coroutine rather than a
+# thread, so a single core can keep hundreds or thousands of requests open
+# against a gateway. Produces the same result dicts as BenchmarkEngine.
+
+
+class AsyncBenchmarkEngine(BenchmarkEngine):
+    loop = None
+    dispatch_task = None
+
+    def run(self):
+        if aiohttp is None:
+            raise Exception("The asyncio engine requires aiohttp (pip install aiohttp)")
+        try:
+            return asyncio.run(self._run())
+        finally:
+            self.close_log()
+
+    async def _run(self):
+        # Nothing else runs on the loop yet, so blocking here is fine
+        self.load_prompts()
+        # The connector limit matches the concurrency level so the number of
+        # open sockets never exceeds the number of workers
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=None, sock_read=REQUEST_TIMEOUT)
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                         trace_configs=[self._trace_config()]) as session:
+            # Warm-up runs, on every replica
+            for endpoint in self.endpoints:
+                for i in range(self.warmup_runs):
+                    if self.cancelled:
+                        return None
+                    self.report(0, self.warm_up_message(i, endpoint))
+                    metrics = await self.run_task_async(session, "Warm up run", endpoint=endpoint)
+                    if self.cancelled:
+                        return None
+                    if "error" in metrics:
+                        raise Exception(f"Warm-up failed: {metrics['error']}")
+
+            # Only the timed phase counts towards the connection statistics
+            self.connection_stats.reset()
+            if self.prewarm:
+                self.report(0, f"Opening {self.concurrency} connections...")
+                await self.prewarm_async(session)
+            # Nothing else runs on the loop yet, so blocking here is fine
+            self.wait_for_peers()
+            if self.cancelled:
+                return None
+
+            # Select random prompts for the benchmark
+            prompts = self.select_prompts()
+
+            # Prepare for benchmark
+            self.report(0, f"Preparing {self.task_count or 'unlimited'} tasks...")
+            start_time = time.time()
+            self.start_results()
+
+            if self.arrival_rate:
+                dispatch = self._dispatch_open_loop(session, prompts)
+            else:
+                # A fixed set of workers pull prompts from a shared iterator, so
+                # memory stays proportional to concurrency rather than task count
+                async def worker():
+                    for prompt in prompts:
+                        if self.cancelled or self.deadline_passed():
+                            return
+                        self.collect(await self.run_task_async(session, prompt))
+
+                dispatch = asyncio.gather(*(worker() for _ in range(min(self.concurrency, self.task_count or self.concurrency))))
+
+            # cancel() cancels this task from another thread; cancelling a
+            # request mid-flight closes its connection
+            self.loop = asyncio.get_running_loop()
+            self.dispatch_task = asyncio.ensure_future(dispatch)
+            if self.cancelled:
+                self.dispatch_task.cancel()
+            try:
+                await self.dispatch_task
+            except asyncio.CancelledError:
+                if not self.cancelled:
+                    raise
+
+        # Calculate overall metrics
+        total_time = time.time() - start_time
+        return self.summarize(total_time)
+
+    async def _dispatch_open_loop(self, session, prompts):
+        # Start each request at its scheduled time regardless of how many are
+        # outstanding. The semaphore caps in-flight requests at the
+        # concurrency level; time spent waiting for it counts towards latency
+        # because latency is measured from the scheduled send time.
+        loop = asyncio.get_running_loop()
+        in_flight = asyncio.Semaphore(self.concurrency)
+        run_start = time.perf_counter()
+        schedule = arrival_offsets(self.arrival_rate, self.task_count, self.arrival_process, self.arrival_phase)
+        pending = set()
+
+        async def fire(prompt, scheduled_time, submitted_time):
+            async with in_flight:
+                result = await self.run_task_async(session, prompt, scheduled_time, submitted_time)
+            self.collect(result)
+
+        try:
+            for prompt, offset in zip(prompts, schedule):
+                if self.cancelled or (self.duration is not None and offset >= self.duration):
+                    break
+                scheduled_time = run_start + offset
+                delay = scheduled_time - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                task = loop.create_task(fire(prompt, scheduled_time, time.perf_counter()))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            # On cancel, cut off the requests still in flight
+            tasks = list(pending)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _trace_config(self):
+        stats = self.connection_stats
+
+        async def on_connection_create_end(session, context, params):
+            stats.connection_opened()
+            if isinstance(context.trace_request_ctx, dict):
+                context.trace_request_ctx["new_connection"] = True
+
+        async def on_request_sent(session, context, params):
+            # Headers first, then each body chunk; the last one wins
+            if isinstance(context.trace_request_ctx, dict):
+                context.trace_request_ctx["sent_time"] = time.perf_counter()
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_request_headers_sent.append(on_request_sent)
+        trace_config.on_request_chunk_sent.append(on_request_sent)
+        return trace_config
+
+    async def prewarm_async(self, session):
+        # aiohttp cannot open idle connections directly, so send one cheap GET
+        # per worker at the same time; each leaves a keep-alive socket behind
+        async def touch(endpoint):
+            try:
+                async with session.get(endpoint) as response:
+                    await response.read()
+            except aiohttp.ClientError:
+                pass
+
+        await asyncio.gather(*(touch(endpoint) for endpoint in self.endpoints
+                               for _ in range(self.connections_per_endpoint())))
+        with self.connection_stats.lock:
+            self.connection_stats.prewarmed = self.connection_stats.opened
+
+    def cancel(self):
+        self.cancelled = True
+        if self.dispatch_task is not None:
+            try:
+                self.loop.call_soon_threadsafe(self.dispatch_task.cancel)
+            except RuntimeError:
+                pass  # The loop has already finished
+
+    async def run_task_async(self, session, prompt, scheduled_time=None, submitted_time=None, endpoint=None):
+        task_start = time.perf_counter()
+        balanced = endpoint is None
+        if balanced:
+            endpoint = self.acquire_endpoint(prompt)
+        try:
+            metrics = await self._run_task_async(session, prompt, endpoint, scheduled_time, submitted_time,
+                                                 task_start)
+        finally:
+            if balanced:
+                self.release_endpoint(endpoint)
+        if len(self.endpoints) > 1:
+            metrics["endpoint"] = endpoint
+        return metrics
+
+    async def _run_task_async(self, session, prompt, endpoint, scheduled_time, submitted_time, task_start):
+        api_type = self.api_config["type"]
+        url, headers, payload = build_request(self.api_config, self.model_name, prompt, self.stream, endpoint,
+                                              self.num_ctx, self.max_tokens)
+        body = json.dumps(payload).encode()
+
+        request_context = {"new_connection": False, "sent_time": None}
+        self.connection_stats.request_sent()
+        send_time = time.perf_counter()
+        # Open-loop runs measure from the scheduled send time
+        start_time = scheduled_time if scheduled_time is not None else send_time
+        try:
+            async with session.post(url, data=body, headers=headers,
+                                    trace_request_ctx=request_context) as response:
+                headers_time = time.perf_counter()
+                if response.status != 200:
+                    raise Exception(f"API Error ({response.status}): {await response.text()}")
+
+                stream_metrics = None
+                if self.stream:
+                    stream_metrics = await read_stream_async(response, api_type, start_time)
+                    end_time = stream_metrics["end_time"]
+                    # Ollama's final object carries the counters; SSE providers only send usage
+                    data = stream_metrics["final"] if api_type == "Ollama" else {"usage": stream_metrics["final"]}
+                else:
+                    body = await response.read()
+                    end_time = time.perf_counter()
+                    data = json.loads(body)
+
+            metrics = parse_metrics(api_type, prompt, data, end_time - start_time, stream_metrics)
+            metrics["connection_reused"] = not request_context["new_connection"]
+            if scheduled_time is not None:
+                metrics["queue_delay"] = send_time - scheduled_time
+            finished_at = time.perf_counter()
+            metrics["phases"] = task_phases(scheduled_time, submitted_time, task_start, send_time,
+                                            request_context["sent_time"], headers_time, end_time, finished_at)
+            metrics["finished_at"] = finished_at
+            return metrics
+
+        except Exception as e:
+            end_time = time.perf_counter()
+            return {
+                "prompt": prompt,
+                "latency": end_time - start_time,
+                "tokens_sec": 0,
+                "error": str(e) or type(e).__name__
+            }
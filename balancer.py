@@ -0,0 +1,65 @@
+import bisect
+import hashlib
+import threading
+
+# Client-side load balancing across a fleet of endpoints (e.g. several Ollama
+# replicas). Both engines ask the balancer for an endpoint before each request
+# and hand it back when the request is done.
+
+BALANCERS = ["round_robin", "least_outstanding", "consistent_hash"]
+
+VIRTUAL_NODES = 100  # Points per endpoint on the consistent hash ring
+SLOW_REPLICA = 1.5  # Median latency this many times the fleet's marks a replica as slow
+
+
+def parse_endpoints(text):
+    # "http://a:11434, http://b:11434" -> ["http://a:11434", "http://b:11434"]
+    return [endpoint.strip().rstrip("/") for endpoint in (text or "").replace(" ", ",").split(",")
+            if endpoint.strip()]
+
+
+def endpoint_list(api_config):
+    return api_config.get("endpoints") or [api_config["endpoint"]]
+
+
+def _hash(text):
+    return int.from_bytes(hashlib.md5(text.encode("utf-8")).digest()[:8], "big")
+
+
+class EndpointBalancer:
+    def __init__(self, endpoints, strategy="round_robin"):
+        if strategy not in BALANCERS:
+            raise ValueError(f"Unknown load balancer: {strategy}")
+        self.endpoints = list(endpoints)
+        self.strategy = strategy
+        self.lock = threading.Lock()
+        self.next_index = 0
+        self.outstanding = {endpoint: 0 for endpoint in self.endpoints}
+        # The same prompt always lands on the same endpoint, and adding or
+        # removing one endpoint only moves the prompts that hashed to it
+        self.ring = sorted((_hash(f"{endpoint}#{i}"), endpoint)
+                           for endpoint in self.endpoints for i in range(VIRTUAL_NODES))
+        self.ring_keys = [key for key, _ in self.ring]
+
+    def acquire(self, prompt):
+        with self.lock:
+            if len(self.endpoints) == 1:
+                endpoint = self.endpoints[0]
+            elif self.strategy == "least_outstanding":
+                # Ties go round-robin so an idle fleet still spreads the load
+                count = len(self.endpoints)
+                order = [self.endpoints[(self.next_index + i) % count] for i in range(count)]
+                endpoint = min(order, key=lambda candidate: self.outstanding[candidate])
+                self.next_index = (self.endpoints.index(endpoint) + 1) % count
+            elif self.strategy == "consistent_hash":
+                index = bisect.bisect(self.ring_keys, _hash(prompt)) % len(self.ring)
+                endpoint = self.ring[index][1]
+            else:
+                endpoint = self.endpoints[self.next_index]
+                self.next_index = (self.next_index + 1) % len(self.endpoints)
+            self.outstanding[endpoint] += 1
+            return endpoint
+
+    def release(self, endpoint):
+        with self.lock:
+            self.outstanding[endpoint] -= 1
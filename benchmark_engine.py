@@ -0,0 +1,831 @@
+import time
+import json
+import random
+import itertools
+import threading
+import collections
+import concurrent.futures
+import requests
+from prompts import BENCHMARK_PROMPTS
+from corpus import load_corpus
+from streaming import enable_streaming, read_stream, decode_tokens_per_sec, stream_summary
+from stats import ResultStats, Timeline, LiveStats
+from result_log import ResultLog
+from balancer import EndpointBalancer, parse_endpoints, endpoint_list
+from http_pool import (ConnectionStats, create_session, prewarm_session, start_request, opened_new_connection,
+                       request_sent_time)
+
+# Plain-Python benchmark engine shared by the GUIs and the headless CLI.
+# Nothing in here may import PyQt5.
+
+# Default configuration
+WARMUP_RUNS = 1  # Initial runs to warm up the model
+CONCURRENCY_LEVEL = 10  # Default number of concurrent requests
+REQUEST_TIMEOUT = 60  # Seconds
+KEEP_RESULTS = 10000  # Most recent per-task results kept for the report; aggregates cover every task
+DEFAULT_MAX_TOKENS = 512  # Output limit for APIs that need one; Ollama has none unless max_tokens is set
+
+# Ollama server-side timings summarised per run (see ollama_timings); decode
+# speed is tokens_sec
+SERVER_TIMINGS = ("load_duration", "prompt_eval_duration", "eval_duration", "total_duration", "server_gap",
+                  "prompt_eval_count", "eval_count", "prefill_tokens_sec")
+
+# What tokens_sec measured, by summary["tokens_sec_basis"] (see token_rate_basis)
+TOKEN_RATE_BASES = {
+    "server": "decode, server timing",
+    "stream": "decode, stream timing",
+    "end_to_end": "end to end, no stream"
+}
+
+DEFAULT_API_CONFIG = {
+    "Ollama": {
+        "endpoint": "http://localhost:11434",
+        "api_key": "",
+        "path": "/api/generate"
+    },
+    "OpenAI": {
+        "endpoint": "https://api.openai.com",
+        "api_key": "",
+        "path": "/v1/chat/completions"
+    },
+    "Anthropic": {
+        "endpoint": "https://api.anthropic.com",
+        "api_key": "",
+        "path": "/v1/messages"
+    },
+    "Mistral": {
+        "endpoint": "https://api.mistral.ai",
+        "api_key": "",
+        "path": "/v1/chat/completions"
+    },
+    "Custom": {
+        "endpoint": "http://localhost:8000",
+        "api_key": "",
+        "path": "/v1/chat/completions"
+    }
+}
+
+API_TYPES = list(DEFAULT_API_CONFIG)
+
+# Open-loop arrival processes: requests are fired on a schedule no matter how
+# many are still outstanding
+ARRIVAL_PROCESSES = ["poisson", "constant"]
+
+# Load engines: "thread" uses a blocking thread pool, "asyncio" runs every
+# request as a coroutine on one event loop (needs aiohttp)
+ENGINE_TYPES = ["thread", "asyncio"]
+
+
+def make_api_config(api_type, endpoint=None, api_key=None, path=None):
+    # endpoint may list several comma-separated replicas to balance across
+    defaults = DEFAULT_API_CONFIG[api_type]
+    endpoints = parse_endpoints(endpoint) or [defaults["endpoint"]]
+    return {
+        "type": api_type,
+        "endpoint": endpoints[0],
+        "endpoints": endpoints,
+        "api_key": api_key if api_key is not None else defaults["api_key"],
+        "path": path or defaults["path"]
+    }
+
+
+def list_ollama_models(endpoint, timeout=5):
+    response = requests.get(f"{endpoint}/api/tags", timeout=timeout)
+    response.raise_for_status()
+    return [model['name'] for model in response.json().get('models', [])]
+
+
+def build_request(api_config, model_name, prompt, stream=False, endpoint=None, num_ctx=None, max_tokens=None):
+    api_type = api_config["type"]
+    api_key = api_config["api_key"]
+    url = f"{endpoint or api_config['endpoint']}{api_config['path']}"
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}" if api_key else ""
+    }
+
+    # API-specific payloads
+    if api_type == "Ollama":
+        payload = {
+            "model": model_name,
+            "prompt": prompt,
+            "stream": False,
+            "options": {"temperature": 0.0}  # For consistent results
+        }
+        # Context window; Ollama reloads the model when it changes
+        if num_ctx:
+            payload["options"]["num_ctx"] = num_ctx
+        if max_tokens:
+            payload["options"]["num_predict"] = max_tokens
+    elif api_type in ["OpenAI", "Mistral"]:
+        payload = {
+            "model": model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens or DEFAULT_MAX_TOKENS,
+            "temperature": 0.0,
+            "stream": False
+        }
+    elif api_type == "Anthropic":
+        payload = {
+            "model": model_name,
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": max_tokens or DEFAULT_MAX_TOKENS,
+            "temperature": 0.0
+        }
+    else:  # Custom API
+        payload = {
+            "model": model_name,
+            "prompt": prompt,
+            "max_tokens": max_tokens or DEFAULT_MAX_TOKENS,
+            "temperature": 0.0,
+            "stream": False
+        }
+
+    if stream:
+        enable_streaming(api_type, payload)
+
+    return url, headers, payload
+
+
+def ollama_timings(data, latency):
+    # Ollama's own breakdown of a request, in seconds: model load, prompt
+    # processing (prefill) and generation (decode). Whatever the client saw
+    # beyond total_duration was spent on the network or queued in the server.
+    timings = {name: data.get(name, 0) / 1e9
+               for name in ("total_duration", "load_duration", "prompt_eval_duration", "eval_duration")}
+    timings["prompt_eval_count"] = data.get("prompt_eval_count", 0)
+    timings["eval_count"] = data.get("eval_count", 0)
+    if timings["prompt_eval_duration"] > 0:
+        timings["prefill_tokens_sec"] = timings["prompt_eval_count"] / timings["prompt_eval_duration"]
+    if timings["total_duration"] > 0:
+        timings["server_gap"] = latency - timings["total_duration"]
+    return timings
+
+
+def format_server_timing(summary):
+    # Human-readable lines for a summary's server_timing block
+    timing = summary["server_timing"]
+
+    def avg(name):
+        return timing.get(name, {}).get("avg", 0)
+
+    return [
+        f"Server (avg):     load {avg('load_duration'):.4f} s | "
+        f"prefill {avg('prompt_eval_duration'):.4f} s ({avg('prompt_eval_count'):.0f} tok, "
+        f"{avg('prefill_tokens_sec'):.1f} tok/s) | decode {avg('eval_duration'):.4f} s "
+        f"({avg('eval_count'):.0f} tok, {summary['tokens_sec_avg']:.1f} tok/s)",
+        f"Server total:     {avg('total_duration'):.4f} s avg; network + queueing "
+        f"{avg('server_gap'):.4f} s avg, {timing.get('server_gap', {}).get('p99', 0):.4f} s p99"
+    ]
+
+
+def token_rate_basis(api_type, stream):
+    # What tokens_sec measures: Ollama's own decode timing, the decode phase
+    # of a stream, or, for non-streaming runs against APIs without server
+    # timings, output tokens over the whole request (prefill, network and
+    # queueing included)
+    if api_type == "Ollama":
+        return "server"
+    return "stream" if stream else "end_to_end"
+
+
+def format_token_rates(summary):
+    # Human-readable lines for a summary's output and input token rates
+    basis = TOKEN_RATE_BASES.get(summary.get("tokens_sec_basis"))
+    lines = [f"Avg tokens/s:     {summary['tokens_sec_avg']:.2f}" + (f" output ({basis})" if basis else "")]
+    if "output_tokens_avg" in summary:
+        limit = f" (limit {summary['max_tokens']})" if "max_tokens" in summary else ""
+        lines.append(f"Output tokens:    {summary['output_tokens_avg']:.1f} avg{limit}, "
+                     f"{summary['e2e_tokens_sec_avg']:.2f} tok/s end to end")
+    if "input_tokens_avg" in summary:
+        prefill = (f", {summary['input_tokens_sec_avg']:.1f} tok/s prefill"
+                   if "input_tokens_sec_avg" in summary else "")
+        lines.append(f"Input tokens:     {summary['input_tokens_avg']:.1f} avg{prefill}")
+    return lines
+
+
+def parse_metrics(api_type, prompt, data, latency, stream_metrics=None):
+    # Token rates that compare across providers: tokens_sec counts output
+    # tokens only (see token_rate_basis), e2e_tokens_sec is output tokens over
+    # the whole request and input_tokens_sec is the prefill rate
+    metrics = {
+        "prompt": prompt,
+        "latency": latency
+    }
+
+    # Token counts, as the provider reported them
+    usage = data.get('usage', {})
+    input_tokens = data.get('prompt_eval_count') or usage.get('prompt_tokens') or usage.get('input_tokens')
+    output_tokens = data.get('eval_count') or usage.get('completion_tokens') or usage.get('output_tokens')
+    if input_tokens:
+        metrics["input_tokens"] = input_tokens
+    if output_tokens:
+        metrics["output_tokens"] = output_tokens
+        metrics["e2e_tokens_sec"] = output_tokens / latency if latency > 0 else 0
+
+    if stream_metrics:
+        metrics.update(stream_summary(stream_metrics))
+        # Falls back to the chunk count when the stream carried no usage
+        metrics["decode_tokens_sec"] = decode_tokens_per_sec(stream_metrics, output_tokens)
+
+    if api_type == "Ollama":
+        metrics.update(ollama_timings(data, latency))
+        eval_duration = metrics["eval_duration"]
+        tokens_sec = metrics["eval_count"] / eval_duration if eval_duration > 0 else None
+        if "prefill_tokens_sec" in metrics:
+            metrics["input_tokens_sec"] = metrics["prefill_tokens_sec"]
+    elif stream_metrics:
+        # No server timings, so the stream's chunk timing stands in for them;
+        # prefill is the prompt over the time to first token, network included
+        tokens_sec = metrics["decode_tokens_sec"] or None  # 0: fewer than two chunks
+        if input_tokens and metrics["ttft"] > 0:
+            metrics["input_tokens_sec"] = input_tokens / metrics["ttft"]
+    else:
+        tokens_sec = metrics.get("e2e_tokens_sec")
+
+    # Left out when there was no token count or timing to measure it with, so
+    # the run's tokens/s is not dragged down by zeros
+    if tokens_sec is not None:
+        metrics["tokens_sec"] = tokens_sec
+
+    return metrics
+
+
+def builtin_prompts(rng):
+    order = list(BENCHMARK_PROMPTS)
+    while True:
+        rng.shuffle(order)
+        yield from order
+
+
+def arrival_offsets(rate, count, process="poisson", phase=0.0):
+    # Send times in seconds relative to the start of the run; count=None
+    # never runs out. phase shifts a constant schedule so several load
+    # generator processes interleave instead of firing together.
+    offset = 0.0
+    for i in (range(count) if count is not None else itertools.count()):
+        if process == "constant":
+            yield phase + i / rate
+        else:
+            yield offset
+            offset += random.expovariate(rate)
+
+
+def task_phases(scheduled_time, submitted_time, task_start, send_time, sent_time, headers_time, end_time,
+                finished_at):
+    # perf_counter() timestamps of one task -> seconds per phase (see
+    # stats.PHASES). handoff is filled in when the result is collected.
+    sent_time = sent_time or send_time
+    phases = {
+        "build": send_time - task_start,
+        "send": sent_time - send_time,
+        "wait": headers_time - sent_time,
+        "read": end_time - headers_time,
+        "parse": finished_at - end_time
+    }
+    # In an open loop, waiting for a free worker means the server is not
+    # keeping up with the arrival rate rather than client overhead; that
+    # time is part of queue_delay instead
+    if scheduled_time is None:
+        phases["queued"] = task_start - submitted_time if submitted_time is not None else 0
+    return phases
+
+
+def endpoint_summary(endpoint_stats, total_time, fleet_latency_p50):
+    # Per-replica share of the work and latency; slowdown compares each
+    # replica's median latency with the fleet's
+    summary = {}
+    total = sum(stats.completed for stats in endpoint_stats.values())
+    for endpoint, stats in endpoint_stats.items():
+        latency = stats.histograms["latency"]
+        p50 = latency.percentile(50)
+        summary[endpoint] = {
+            "completed": stats.completed,
+            "share": stats.completed / total if total else 0,
+            "error_count": stats.errors,
+            "throughput": stats.completed / total_time if total_time > 0 else 0,
+            "latency_avg": latency.mean(),
+            "latency_p50": p50,
+            "latency_p90": latency.percentile(90),
+            "latency_p99": latency.percentile(99),
+            "tokens_sec_avg": stats.histograms["tokens_sec"].mean(),
+            "slowdown": p50 / fleet_latency_p50 if fleet_latency_p50 > 0 else 0
+        }
+    return summary
+
+
+def summarize(run_config, total_time, result_stats, results, connection_stats=None, timeline=None,
+              endpoint_stats=None):
+    # Averages and percentiles only cover tasks that succeeded
+    completed = result_stats.completed
+
+    summary = dict(run_config)
+    summary.update({
+        "completed": completed,
+        "total_time": total_time,
+        "throughput": completed / total_time if total_time > 0 else 0,
+        "error_count": result_stats.errors
+    })
+    summary.update(result_stats.summary("latency"))
+    summary.update(result_stats.summary("tokens_sec"))
+
+    # Open-loop latency is measured from the scheduled send time; queue_delay
+    # is how late the request actually left the client
+    if run_config.get("load_mode") == "open":
+        queue_delay = result_stats.histograms["queue_delay"]
+        summary["queue_delay_avg"] = queue_delay.mean()
+        summary["queue_delay_max"] = queue_delay.max or 0
+
+    # Token counts and the rates that only some providers or modes measure
+    summary["tokens_sec_basis"] = token_rate_basis(run_config["api_type"], run_config["stream"])
+    for name in ("input_tokens", "output_tokens", "input_tokens_sec", "e2e_tokens_sec"):
+        if result_stats.histograms[name].count:
+            summary[f"{name}_avg"] = result_stats.histograms[name].mean()
+
+    # Streaming-only metrics, over tasks that produced tokens
+    if run_config["stream"]:
+        summary.update(result_stats.summary("ttft"))
+        # Over every gap of the run; logs only have the per-task averages
+        if result_stats.histograms["itl"].count:
+            summary.update(result_stats.summary("itl"))
+        else:
+            summary["itl_avg"] = result_stats.histograms["itl_avg"].mean()
+        summary["decode_tokens_sec_avg"] = result_stats.histograms["decode_tokens_sec"].mean()
+
+    # Ollama's server-side timings, over tasks that reported them
+    if result_stats.histograms["total_duration"].count:
+        summary["server_timing"] = result_stats.group_summary(SERVER_TIMINGS)
+
+    if result_stats.phases:
+        summary["phases"], summary["harness_overhead_share"] = result_stats.phase_summary()
+
+    if endpoint_stats:
+        summary["endpoint_stats"] = endpoint_summary(endpoint_stats, total_time, summary["latency_p50"])
+
+    if connection_stats:
+        summary["connections"] = connection_stats
+
+    if timeline:
+        summary["timeline"] = timeline.summary(total_time)
+
+    # Long runs only keep the most recent per-task results
+    summary["results"] = list(results)
+    if len(summary["results"]) < completed:
+        summary["results_dropped"] = completed - len(summary["results"])
+    return summary
+
+
+class BenchmarkEngine:
+    def __init__(self, api_config, model_name, task_count, concurrency=CONCURRENCY_LEVEL,
+                 stream=False, warmup_runs=WARMUP_RUNS, prewarm=False, arrival_rate=None,
+                 arrival_process="poisson", duration=None, result_log=None, balancer="round_robin",
+                 prompt_file=None, prompt_bucket=None, seed=None, prefix_tokens=None, prefix_reuse=1.0,
+                 prompt_tokens=None, num_ctx=None, max_tokens=None, progress_callback=None):
+        self.api_config = api_config
+        self.model_name = model_name
+        # task_count 0/None runs until the duration is up (or until cancelled)
+        self.task_count = task_count or None
+        self.duration = duration or None
+        self.concurrency = concurrency
+        self.stream = stream
+        self.warmup_runs = warmup_runs
+        self.prewarm = prewarm
+        self.arrival_rate = arrival_rate
+        self.arrival_process = arrival_process
+        self.result_log = result_log  # JSONL file every finished task is appended to
+        # Prompts come from the built-in list or a corpus file, optionally
+        # only one length bucket of it; the same seed sends the same prompts
+        self.prompt_file = prompt_file
+        self.prompt_bucket = prompt_bucket
+        self.seed = seed
+        self.corpus = None
+        # Shared-prefix workload: every prompt gets a prefix_tokens prefix,
+        # the shared one for a prefix_reuse share of them (see prefix_cache)
+        self.prefix_tokens = prefix_tokens
+        self.prefix_reuse = prefix_reuse
+        # Synthetic prompts of about prompt_tokens tokens instead of the
+        # built-in ones or a corpus (see context_sweep); num_ctx is Ollama's
+        # context window
+        self.prompt_tokens = prompt_tokens
+        self.num_ctx = num_ctx
+        # Output length limit: num_predict for Ollama, max_tokens elsewhere
+        self.max_tokens = max_tokens
+        self.log = None
+        self.progress_callback = progress_callback
+        self.cancelled = False
+        self.executor = None
+        self.live = None  # Per-second buckets for the live charts, once the timed phase starts
+        self.started = None  # Wall clock start of the timed phase, for the history store
+        # Set when this engine is one of several load generator processes
+        self.start_barrier = None
+        self.arrival_phase = 0.0
+        self.prompt_share = (0, 1)  # (index, processes): every processes-th prompt from index
+        self.endpoints = endpoint_list(api_config)
+        self.balancer = EndpointBalancer(self.endpoints, balancer)
+        self.connection_stats = ConnectionStats()
+        self.session = create_session(concurrency, self.connection_stats, len(self.endpoints))
+
+    def report(self, value, message):
+        if self.progress_callback:
+            self.progress_callback(value, message)
+
+    def run_config(self):
+        config = {
+            "api_type": self.api_config["type"],
+            "endpoint": ", ".join(self.endpoints),
+            "model": self.model_name,
+            "task_count": self.task_count,
+            "duration": self.duration,
+            "concurrency": self.concurrency,
+            "stream": self.stream,
+            "load_mode": "open" if self.arrival_rate else "closed"
+        }
+        if self.arrival_rate:
+            config["arrival_rate"] = self.arrival_rate
+            config["arrival_process"] = self.arrival_process
+        if len(self.endpoints) > 1:
+            config["endpoints"] = self.endpoints
+            config["balancer"] = self.balancer.strategy
+        if self.prompt_file:
+            config["prompt_file"] = self.prompt_file
+            if self.prompt_bucket:
+                config["prompt_bucket"] = self.prompt_bucket
+        if self.seed is not None:
+            config["seed"] = self.seed
+        if self.prefix_tokens:
+            config["prefix_tokens"] = self.prefix_tokens
+            config["prefix_reuse"] = self.prefix_reuse
+        if self.prompt_tokens:
+            config["prompt_tokens"] = self.prompt_tokens
+        if self.num_ctx:
+            config["num_ctx"] = self.num_ctx
+        if self.max_tokens:
+            config["max_tokens"] = self.max_tokens
+        return config
+
+    def start_results(self):
+        # Memory stays bounded however long the run: histograms and timeline
+        # windows have a fixed size, and only the latest results are kept
+        self.results = collections.deque(maxlen=KEEP_RESULTS)
+        # perf_counter() time each kept result was collected; the clock is
+        # machine-wide, so the multi-process engine can interleave processes
+        self.collected_at = collections.deque(maxlen=KEEP_RESULTS)
+        self.result_stats = ResultStats()
+        self.endpoint_stats = {endpoint: ResultStats(("latency", "tokens_sec")) for endpoint in self.endpoints
+                               if len(self.endpoints) > 1}
+        self.timeline = Timeline()
+        self.run_start = time.perf_counter()
+        self.started = time.time()
+        self.live = LiveStats(self.run_start)
+        if self.result_log:
+            self.log = ResultLog(self.result_log, self.run_config(), self.started)
+
+    def deadline_passed(self):
+        return self.duration is not None and time.perf_counter() - self.run_start >= self.duration
+
+    def collect(self, result):
+        # Called once per finished task, in completion order. The time the
+        # result waited to get here is the last phase of the task. Tasks
+        # still in flight when the run was cancelled were cut off, not
+        # failed, so they are left out.
+        if self.cancelled:
+            return
+        now = time.perf_counter()
+        finished_at = result.pop("finished_at", None)
+        if finished_at is not None and "phases" in result:
+            result["phases"]["handoff"] = now - finished_at
+        # Gaps go into the run's histogram only, so kept results, logs and
+        # process handoffs stay small however long the answers are
+        gaps = result.pop("inter_token_latencies", None)
+        elapsed = now - self.run_start
+        self.results.append(result)
+        self.collected_at.append(now)
+        self.result_stats.record(result)
+        if gaps and "error" not in result:
+            self.result_stats.record_gaps(gaps)
+        if "endpoint" in result:
+            self.endpoint_stats[result["endpoint"]].record(result)
+        self.timeline.record(result, elapsed)
+        self.live.record(result, elapsed)
+        if self.log:
+            self.log.write(result, elapsed)
+        completed = self.result_stats.completed
+
+        if self.task_count and not self.duration:
+            progress = int((completed / self.task_count) * 100)
+            self.report(progress, f"Completed {completed}/{self.task_count} tasks")
+            return
+
+        # Soak runs report the most recent window rather than a task count
+        progress = min(int(elapsed / self.duration * 100), 100) if self.duration else 0
+        window = self.timeline.latest(elapsed)
+        self.report(progress, f"{elapsed:.0f}s: completed {completed} tasks, "
+                              f"{window['throughput']:.2f} tasks/s, p99 {window['latency_p99']:.3f}s "
+                              f"over the last {window['end'] - window['start']:.0f}s")
+
+    def collect_futures(self, futures):
+        for future in futures:
+            if not future.cancelled():
+                self.collect(future.result())
+
+    def summarize(self, total_time):
+        summary = summarize(self.run_config(), total_time, self.result_stats, self.results,
+                            self.connection_stats.snapshot(), self.timeline, self.endpoint_stats)
+        summary["started"] = self.started
+        if self.cancelled:
+            # Partial result: only the tasks that finished before the cancel
+            summary["cancelled"] = True
+        if self.log:
+            self.log.close(summary)
+        return summary
+
+    def close_log(self):
+        # Cancelled or failed runs keep what was logged, without a footer
+        if self.log:
+            self.log.close()
+
+    def load_prompts(self):
+        # Indexing a large corpus takes a while, so it is done before the
+        # timed phase rather than when the engine is created
+        if self.prompt_file:
+            self.report(0, f"Indexing prompts in {self.prompt_file}...")
+            self.corpus = load_corpus(self.prompt_file)
+            # Fail before warm-up on a bucket the corpus has no prompts in
+            self.corpus.select(self.prompt_bucket)
+
+    def select_prompts(self):
+        # The built-in prompts in shuffled passes, so none repeats before all
+        # were sent once, or a sample of the corpus. The sequence only
+        # depends on the seed; load generator processes each take their
+        # share of it, so the workload is the same for any process count.
+        rng = random.Random(self.seed)
+        if self.prompt_tokens:
+            from context_sweep import context_prompts
+            prompts = context_prompts(rng, self.prompt_tokens)
+        elif self.corpus:
+            prompts = self.corpus.sample(rng, self.prompt_bucket)
+        else:
+            prompts = builtin_prompts(rng)
+        if self.prefix_tokens:
+            from prefix_cache import prefixed_prompts
+            prompts = prefixed_prompts(prompts, random.Random(rng.random()), self.prefix_tokens,
+                                       self.prefix_reuse)
+        index, processes = self.prompt_share
+        prompts = itertools.islice(prompts, index, None, processes)
+        if self.task_count is not None:
+            prompts = itertools.islice(prompts, self.task_count)
+        return prompts
+
+    def warm_up(self):
+        # Every replica has to load the model
+        for endpoint in self.endpoints:
+            for i in range(self.warmup_runs):
+                if self.cancelled:
+                    return
+                self.report(0, self.warm_up_message(i, endpoint))
+                metrics = self.run_task("Warm up run", endpoint=endpoint)
+                if self.cancelled:
+                    return
+                if "error" in metrics:
+                    raise Exception(f"Warm-up failed: {metrics['error']}")
+
+    def warm_up_message(self, index, endpoint):
+        if len(self.endpoints) > 1:
+            return f"Warming up model on {endpoint} ({index+1}/{self.warmup_runs})..."
+        return f"Warming up model ({index+1}/{self.warmup_runs})..."
+
+    def prewarm_connections(self):
+        # Only the timed phase counts towards the connection statistics
+        self.connection_stats.reset()
+        if self.prewarm:
+            self.report(0, f"Opening {self.concurrency} connections...")
+            for endpoint in self.endpoints:
+                prewarm_session(self.session, endpoint, self.connections_per_endpoint(), self.connection_stats)
+
+    def wait_for_peers(self):
+        # Multi-process runs start every process's timed phase together, once
+        # the model is warm and every process has its connections
+        if self.start_barrier is None:
+            return
+        try:
+            self.start_barrier.wait()
+        except threading.BrokenBarrierError:
+            # Cancelled, or another process failed and reports why itself
+            self.cancelled = True
+
+    def connections_per_endpoint(self):
+        return -(-self.concurrency // len(self.endpoints))
+
+    def run(self):
+        # Returns the run summary; a run cancelled during the timed phase
+        # returns the tasks finished so far, marked "cancelled", and one
+        # cancelled before it returns None
+        try:
+            return self._run()
+        finally:
+            self.close_log()
+            self.session.close()
+
+    def _run(self):
+        self.load_prompts()
+        self.warm_up()
+        if self.cancelled:
+            return None
+        self.prewarm_connections()
+        self.wait_for_peers()
+        if self.cancelled:
+            return None
+
+        # Select random prompts for the benchmark
+        selected_prompts = self.select_prompts()
+
+        # Prepare for benchmark
+        self.report(0, f"Preparing {self.task_count or 'unlimited'} tasks...")
+        start_time = time.time()
+        self.start_results()
+
+        # Run benchmark with thread pool
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            self.executor = executor
+            if self.arrival_rate:
+                futures = self._dispatch_open_loop(executor, selected_prompts)
+            else:
+                futures = self._dispatch_closed_loop(executor, selected_prompts)
+
+            for future in concurrent.futures.as_completed(futures):
+                if self.cancelled:
+                    break
+
+                self.collect(future.result())
+
+        # Calculate overall metrics
+        total_time = time.time() - start_time
+        return self.summarize(total_time)
+
+    def _dispatch_closed_loop(self, executor, prompts):
+        # Keep exactly `concurrency` tasks submitted, topping up as they
+        # finish, so prompts are only drawn when needed and unbounded runs
+        # do not queue up futures
+        pending = set()
+        for prompt in prompts:
+            while len(pending) >= self.concurrency:
+                done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                self.collect_futures(done)
+            if self.cancelled or self.deadline_passed():
+                break
+            try:
+                pending.add(executor.submit(self.run_task, prompt, submitted_time=time.perf_counter()))
+            except RuntimeError:
+                # cancel() shut the pool down in the meantime
+                break
+
+        return pending
+
+    def _dispatch_open_loop(self, executor, prompts):
+        # Submit each prompt at its scheduled time, whether or not earlier
+        # requests have finished. Requests that wait for a free worker keep
+        # their scheduled time, so the queueing shows up in their latency.
+        pending = set()
+        run_start = time.perf_counter()
+        schedule = arrival_offsets(self.arrival_rate, self.task_count, self.arrival_process, self.arrival_phase)
+
+        for prompt, offset in zip(prompts, schedule):
+            if self.duration is not None and offset >= self.duration:
+                break
+            scheduled_time = run_start + offset
+            while not self.cancelled:
+                delay = scheduled_time - time.perf_counter()
+                if delay <= 0:
+                    break
+                if not pending:
+                    time.sleep(min(delay, 0.1))
+                    continue
+                # Collect completions while waiting for the next send time
+                done, pending = concurrent.futures.wait(pending, timeout=min(delay, 0.1),
+                                                        return_when=concurrent.futures.FIRST_COMPLETED)
+                self.collect_futures(done)
+            if self.cancelled:
+                break
+            try:
+                pending.add(executor.submit(self.run_task, prompt, scheduled_time, time.perf_counter()))
+            except RuntimeError:
+                break
+
+        return pending
+
+    def run_task(self, prompt, scheduled_time=None, submitted_time=None, endpoint=None):
+        # Warm-up passes an explicit endpoint; timed tasks ask the balancer
+        task_start = time.perf_counter()
+        balanced = endpoint is None
+        if balanced:
+            endpoint = self.acquire_endpoint(prompt)
+        try:
+            metrics = self._run_task(prompt, endpoint, scheduled_time, submitted_time, task_start)
+        finally:
+            if balanced:
+                self.release_endpoint(endpoint)
+        if len(self.endpoints) > 1:
+            metrics["endpoint"] = endpoint
+        return metrics
+
+    def acquire_endpoint(self, prompt):
+        # The balancer's outstanding counts are the requests in flight
+        endpoint = self.balancer.acquire(prompt)
+        self.sample_in_flight()
+        return endpoint
+
+    def release_endpoint(self, endpoint):
+        self.balancer.release(endpoint)
+        self.sample_in_flight()
+
+    def sample_in_flight(self):
+        if self.live is not None:
+            self.live.sample_in_flight(sum(self.balancer.outstanding.values()),
+                                       time.perf_counter() - self.run_start)
+
+    def _run_task(self, prompt, endpoint, scheduled_time, submitted_time, task_start):
+        api_type = self.api_config["type"]
+        url, headers, payload = build_request(self.api_config, self.model_name, prompt, self.stream, endpoint,
+                                              self.num_ctx, self.max_tokens)
+        # Encode here rather than inside requests so it counts as build time
+        body = json.dumps(payload)
+
+        if self.cancelled:
+            # Picked up by a worker after the cancel; never sent
+            return {"prompt": prompt, "latency": 0, "tokens_sec": 0, "error": "Cancelled"}
+
+        start_request()
+        self.connection_stats.request_sent()
+        send_time = time.perf_counter()
+        # Open-loop runs measure from the scheduled send time (coordinated
+        # omission correction); closed-loop runs from the actual send
+        start_time = scheduled_time if scheduled_time is not None else send_time
+        try:
+            # Always stream so the body read is timed separately from the
+            # wait for the response headers
+            response = self.session.post(
+                url,
+                data=body,
+                headers=headers,
+                timeout=REQUEST_TIMEOUT,
+                stream=True
+            )
+            headers_time = time.perf_counter()
+
+            if response.status_code != 200:
+                raise Exception(f"API Error ({response.status_code}): {response.text}")
+
+            stream_metrics = None
+            if self.stream:
+                # Streamed lines are parsed as they arrive, so that is read time
+                with response:
+                    stream_metrics = read_stream(response, api_type, start_time)
+                end_time = stream_metrics["end_time"]
+                # Ollama's final object carries the counters; SSE providers only send usage
+                data = stream_metrics["final"] if api_type == "Ollama" else {"usage": stream_metrics["final"]}
+            else:
+                raw = response.content
+                end_time = time.perf_counter()
+                data = json.loads(raw)
+
+            metrics = parse_metrics(api_type, prompt, data, end_time - start_time, stream_metrics)
+            metrics["connection_reused"] = not opened_new_connection()
+            if scheduled_time is not None:
+                metrics["queue_delay"] = send_time - scheduled_time
+            finished_at = time.perf_counter()
+            metrics["phases"] = task_phases(scheduled_time, submitted_time, task_start, send_time,
+                                            request_sent_time(), headers_time, end_time, finished_at)
+            metrics["finished_at"] = finished_at
+            return metrics
+
+        except Exception as e:
+            end_time = time.perf_counter()
+            return {
+                "prompt": prompt,
+                "latency": end_time - start_time,
+                "tokens_sec": 0,
+                "error": str(e)
+            }
+
+    def cancel(self):
+        # Safe to call from any thread. Queued tasks are dropped and in-flight
+        # requests are cut off, freeing the server within milliseconds.
+        self.cancelled = True
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self.connection_stats.abort()
+
+
+def create_engine(engine_type, *args, processes=1, **kwargs):
+    # processes > 1 runs that many copies of the engine in separate processes
+    # and merges their results
+    if processes > 1:
+        from multiprocess_engine import MultiProcessEngine
+        return MultiProcessEngine(engine_type, processes, *args, **kwargs)
+    if engine_type == "asyncio":
+        from async_engine import AsyncBenchmarkEngine
+        return AsyncBenchmarkEngine(*args, **kwargs)
+    if engine_type != "thread":
+        raise ValueError(f"Unknown engine type: {engine_type}")
+    return BenchmarkEngine(*args, **kwargs)
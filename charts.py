@@ -0,0 +1,118 @@
+import math
+from PyQt5.QtWidgets import QWidget
+from PyQt5.QtCore import Qt, QPointF, QRectF
+from PyQt5.QtGui import QPainter, QPen, QColor, QFont, QPolygonF
+
+# Minimal dark-theme line chart drawn with QPainter, so charts need nothing
+# beyond PyQt5 itself
+
+SERIES_COLORS = [QColor(97, 218, 251), QColor(144, 238, 144), QColor(255, 179, 71),
+                 QColor(255, 128, 128), QColor(200, 162, 255)]
+
+
+class LineChart(QWidget):
+    def __init__(self, title, x_label="", y_label="", log_x=False, parent=None):
+        super().__init__(parent)
+        self.title = title
+        self.x_label = x_label
+        self.y_label = y_label
+        self.log_x = log_x
+        self.series = []
+        self.marker = None
+        self.setMinimumHeight(180)
+
+    def set_series(self, series):
+        # series: list of (name, [(x, y), ...]); colours are assigned in order
+        self.series = [(name, points) for name, points in series if points]
+        self.update()
+
+    def set_marker(self, x, label=""):
+        # Vertical marker, e.g. the saturation knee; None to clear
+        self.marker = (x, label) if x is not None else None
+        self.update()
+
+    def clear(self):
+        self.series = []
+        self.marker = None
+        self.update()
+
+    def _x(self, value):
+        return math.log2(value) if self.log_x and value > 0 else value
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor(37, 37, 37))
+        painter.setFont(QFont("Arial", 8))
+
+        # Title
+        painter.setPen(QColor(97, 218, 251))
+        painter.drawText(QRectF(0, 4, self.width(), 16), Qt.AlignCenter, self.title)
+
+        plot = QRectF(55, 26, self.width() - 70, self.height() - 56)
+        if plot.width() <= 0 or plot.height() <= 0:
+            return
+
+        points = [p for _, series_points in self.series for p in series_points]
+        if not points:
+            painter.setPen(QColor(153, 153, 153))
+            painter.drawText(plot, Qt.AlignCenter, "No data")
+            return
+
+        xs = [self._x(x) for x, _ in points]
+        x_min, x_max = min(xs), max(xs)
+        if x_max == x_min:
+            x_max = x_min + 1
+        y_min, y_max = 0, max(y for _, y in points) * 1.1 or 1
+
+        def to_screen(x, y):
+            sx = plot.left() + (self._x(x) - x_min) / (x_max - x_min) * plot.width()
+            sy = plot.bottom() - (y - y_min) / (y_max - y_min) * plot.height()
+            return QPointF(sx, sy)
+
+        # Grid and y-axis labels
+        for i in range(5):
+            y = y_min + (y_max - y_min) * i / 4
+            sy = plot.bottom() - plot.height() * i / 4
+            painter.setPen(QPen(QColor(68, 68, 68), 1))
+            painter.drawLine(QPointF(plot.left(), sy), QPointF(plot.right(), sy))
+            painter.setPen(QColor(180, 180, 180))
+            painter.drawText(QRectF(0, sy - 8, plot.left() - 5, 16), Qt.AlignRight | Qt.AlignVCenter, f"{y:.3g}")
+
+        # X-axis labels at the data points of the first series
+        painter.setPen(QColor(180, 180, 180))
+        labelled = sorted({x for x, _ in self.series[0][1]})
+        step = max(1, len(labelled) // 8)
+        for x in labelled[::step]:
+            sx = to_screen(x, 0).x()
+            painter.drawText(QRectF(sx - 30, plot.bottom() + 2, 60, 14), Qt.AlignCenter, f"{x:.4g}")
+        painter.drawText(QRectF(plot.left(), plot.bottom() + 14, plot.width(), 14), Qt.AlignCenter, self.x_label)
+
+        painter.save()
+        painter.translate(10, plot.center().y())
+        painter.rotate(-90)
+        painter.drawText(QRectF(-plot.height() / 2, -8, plot.height(), 16), Qt.AlignCenter, self.y_label)
+        painter.restore()
+
+        # Marker
+        if self.marker:
+            x, label = self.marker
+            sx = to_screen(x, 0).x()
+            painter.setPen(QPen(QColor(246, 211, 45), 1, Qt.DashLine))
+            painter.drawLine(QPointF(sx, plot.top()), QPointF(sx, plot.bottom()))
+            painter.drawText(QRectF(sx + 4, plot.top(), 120, 14), Qt.AlignLeft, label)
+
+        # Series and legend
+        for index, (name, series_points) in enumerate(self.series):
+            color = SERIES_COLORS[index % len(SERIES_COLORS)]
+            screen_points = [to_screen(x, y) for x, y in sorted(series_points)]
+            painter.setPen(QPen(color, 2))
+            painter.drawPolyline(QPolygonF(screen_points))
+            if len(screen_points) <= 64:
+                painter.setBrush(color)
+                for point in screen_points:
+                    painter.drawEllipse(point, 2.5, 2.5)
+                painter.setBrush(Qt.NoBrush)
+            painter.drawText(QRectF(plot.left() + 8, plot.top() + 2 + index * 14, 200, 14), Qt.AlignLeft, name)
+
+        painter.end()
@@ -0,0 +1,597 @@
+import sys
+import json
+import time
+import signal
+import sqlite3
+import argparse
+from benchmark_engine import (API_TYPES, ENGINE_TYPES, ARRIVAL_PROCESSES, CONCURRENCY_LEVEL, WARMUP_RUNS,
+                              create_engine, make_api_config, list_ollama_models, format_server_timing,
+                              format_token_rates)
+from stats import format_percentiles
+from result_log import load_result_log
+from balancer import BALANCERS, SLOW_REPLICA
+from sweep import ConcurrencySweep, concurrency_levels, parse_levels, write_sweep_csv
+from corpus import BUCKETS, load_corpus
+from prefix_cache import PrefixCacheComparison, DEFAULT_PREFIX_LENGTHS
+from cold_start import ColdStartComparison, STEADY_WINDOW
+from context_sweep import ContextSweep, context_lengths
+from decode_sweep import OutputLengthSweep, DEFAULT_OUTPUT_LENGTHS, MIN_PINNED_SHARE
+from compare import REGRESSION_THRESHOLD, regression_report
+from results_store import DEFAULT_STORE, ResultStore
+
+# Headless benchmark runner. Imports no GUI libraries, so it runs in slim
+# containers without PyQt5 or an X server:
+#
+#   python cli.py --model llama3 --tasks 50 --concurrency 8
+#   python cli.py --model llama3 --tasks 5000 --concurrency 1000 --engine asyncio
+#   python cli.py --model llama3 --tasks 20000 --concurrency 400 --processes 4
+#   python cli.py --api-type OpenAI --model gpt-4 --api-key $KEY --output run.json
+#   python cli.py --model llama3 --tasks 64 --sweep 64 --csv sweep.csv
+#   python cli.py --model llama3 --tasks 100 --rate 5 --concurrency 100
+#   python cli.py --model llama3 --tasks 0 --duration 7200 --log soak.jsonl
+#   python cli.py --load-log soak.jsonl
+#   python cli.py --model llama3 --endpoint http://gpu1:11434,http://gpu2:11434 --balancer least_outstanding
+#   python cli.py --model llama3 --tasks 500 --prompts corpus.jsonl --prompt-bucket 256-1024 --seed 42
+#   python cli.py --corpus-info corpus.jsonl
+#   python cli.py --model llama3 --tasks 50 --stream --prefix-compare 256,1024,4096 --prefix-reuse 0.9
+#   python cli.py --model llama3 --tasks 200 --concurrency 4 --cold-start 5
+#   python cli.py --model llama3 --tasks 20 --concurrency 4 --stream --context-sweep
+#   python cli.py --model llama3 --tasks 20 --stream --prompts stories.jsonl --decode-sweep 64,256,1024
+#   python cli.py --compare baseline.json candidate.json --threshold 5
+#   python cli.py --model llama3 --tasks 50 --store
+#   python cli.py --history --model llama3 --host gpu1:11434 --days 30
+
+
+REGRESSION_EXIT = 3  # Exit code of --compare when a metric regressed
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark LLM inference endpoints from the command line")
+    parser.add_argument("--model", help="Model name to benchmark")
+    parser.add_argument("--tasks", type=int, default=20,
+                        help="Number of benchmark tasks, 0 for no limit (default: 20)")
+    parser.add_argument("--duration", type=float,
+                        help="Soak test: stop starting new tasks after this many seconds")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY_LEVEL,
+                        help=f"Concurrent requests (default: {CONCURRENCY_LEVEL})")
+    parser.add_argument("--engine", choices=ENGINE_TYPES, default="thread",
+                        help="Load engine: thread pool or asyncio event loop (default: thread)")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="Split the load over this many processes to get past the GIL; their results "
+                             "are merged (default: 1)")
+    parser.add_argument("--api-type", choices=API_TYPES, default="Ollama", help="API flavour (default: Ollama)")
+    parser.add_argument("--endpoint",
+                        help="Base URL of the API, or several comma-separated replicas (default depends on --api-type)")
+    parser.add_argument("--balancer", choices=BALANCERS, default="round_robin",
+                        help="How requests are spread over several endpoints (default: round_robin)")
+    parser.add_argument("--path", help="Request path (default depends on --api-type)")
+    parser.add_argument("--api-key", help="API key for hosted providers")
+    parser.add_argument("--warmup", type=int, default=WARMUP_RUNS,
+                        help=f"Warm-up requests before timing (default: {WARMUP_RUNS})")
+    parser.add_argument("--prewarm", action="store_true",
+                        help="Open one keep-alive connection per worker before the timed phase")
+    parser.add_argument("--rate", type=float,
+                        help="Open-loop mode: fire requests at this many per second regardless of "
+                             "outstanding ones; --concurrency caps requests in flight")
+    parser.add_argument("--arrival", choices=ARRIVAL_PROCESSES, default="poisson",
+                        help="Open-loop arrival process (default: poisson)")
+    parser.add_argument("--stream", action="store_true", help="Stream responses to measure TTFT and inter-token latency")
+    parser.add_argument("--prompts", metavar="FILE",
+                        help="Prompt corpus: one prompt per line, or JSON Lines (.jsonl) with a \"prompt\" or "
+                             "\"text\" key (default: the built-in prompts)")
+    parser.add_argument("--prompt-bucket", choices=BUCKETS,
+                        help="Only send corpus prompts of this estimated token length")
+    parser.add_argument("--seed", type=int,
+                        help="Seed for prompt sampling; runs with the same seed send the same prompts")
+    parser.add_argument("--prefix-tokens", type=int,
+                        help="Shared-prefix workload: put a prefix of about this many tokens before every prompt")
+    parser.add_argument("--prefix-reuse", type=float, default=1.0,
+                        help="Share of prompts whose prefix is the shared one; the rest get a unique prefix "
+                             "of the same length (default: 1.0)")
+    parser.add_argument("--prefix-compare", metavar="LENGTHS", nargs="?",
+                        const=",".join(str(length) for length in DEFAULT_PREFIX_LENGTHS),
+                        help="Prompt cache benefit: run each prefix length with unique and with shared prefixes "
+                             "and compare prefill time and TTFT (default lengths: %(const)s)")
+    parser.add_argument("--cold-start", metavar="N", type=int,
+                        help="Unload the model (Ollama keep_alive 0) and run cold, then warm, N times; compares "
+                             "first-request latency, load_duration and time to steady-state throughput. Use "
+                             f"enough tasks for runs of at least {2 * STEADY_WINDOW} seconds")
+    parser.add_argument("--context-sweep", metavar="LENGTHS", nargs="?", const="",
+                        help="Context-length sweep with synthetic prompts of 128, 256 ... tokens up to a maximum "
+                             "or a comma-separated list of lengths (default: up to the model's context length); "
+                             "Ollama gets a num_ctx to match each length")
+    parser.add_argument("--max-tokens", type=int,
+                        help="Pin the output length: num_predict for Ollama, max_tokens for the other APIs "
+                             "(default: no limit for Ollama, 512 elsewhere)")
+    parser.add_argument("--decode-sweep", metavar="LENGTHS", nargs="?",
+                        const=",".join(str(length) for length in DEFAULT_OUTPUT_LENGTHS),
+                        help="Output-length sweep: run with the output pinned to each length and report decode "
+                             "tok/s and per-token latency (default lengths: %(const)s); prompts must ask for "
+                             "long answers, see --prompts")
+    parser.add_argument("--corpus-info", metavar="FILE",
+                        help="Print how many prompts of each length bucket a corpus holds, and exit")
+    parser.add_argument("--sweep", metavar="LEVELS",
+                        help="Concurrency sweep: a maximum (1, 2, 4 ... N) or a comma-separated list of levels")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--csv", help="Write the concurrency sweep table to this CSV file")
+    parser.add_argument("--log", help="Append every finished task to this JSON Lines file as the run goes")
+    parser.add_argument("--load-log", metavar="FILE",
+                        help="Print the runs recorded in a --log file, including interrupted ones, and exit")
+    parser.add_argument("--compare", metavar="RUN", nargs="+",
+                        help="Compare saved runs (JSON exports or --log files; FILE#N picks the Nth run, "
+                             "default the last) against the first one and exit, with code "
+                             f"{REGRESSION_EXIT} if any regressed")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD * 100,
+                        help="Regression threshold for --compare, in percent; changes must also be "
+                             f"significant (default: {REGRESSION_THRESHOLD * 100:g})")
+    parser.add_argument("--store", metavar="DB", nargs="?", const=DEFAULT_STORE,
+                        help=f"Save the run to this SQLite history database (default: {DEFAULT_STORE}); "
+                             "also the database --history and --import use")
+    parser.add_argument("--history", action="store_true",
+                        help="Print the runs in the history database and exit; --model, --host and --days filter")
+    parser.add_argument("--host", help="Only show runs against this host[:port] with --history")
+    parser.add_argument("--days", type=float, help="Only show runs of the last N days with --history")
+    parser.add_argument("--import", dest="import_files", metavar="FILE", nargs="+",
+                        help="Add runs from JSON exports, reports or --log files to the history database and exit")
+    parser.add_argument("--list-models", action="store_true", help="List models installed in Ollama and exit")
+    parser.add_argument("--quiet", action="store_true", help="Do not print progress updates")
+    args = parser.parse_args(argv)
+
+    if (not args.list_models and not args.load_log and not args.corpus_info and not args.compare
+            and not args.history and not args.import_files and not args.model):
+        parser.error("--model is required")
+    if args.compare and len(args.compare) < 2:
+        parser.error("--compare needs a baseline and at least one run to compare with it")
+    if args.prompt_bucket and not args.prompts:
+        parser.error("--prompt-bucket needs --prompts")
+    if not 0 < args.prefix_reuse <= 1:
+        parser.error("--prefix-reuse must be above 0 and at most 1")
+    modes = (args.prefix_compare, args.sweep, args.cold_start, args.context_sweep is not None, args.decode_sweep)
+    if sum(1 for mode in modes if mode) > 1:
+        parser.error("--prefix-compare, --sweep, --cold-start, --context-sweep and --decode-sweep cannot be combined")
+    if args.csv and not args.sweep:
+        parser.error("--csv needs --sweep; other modes are saved with --output")
+    if args.max_tokens is not None and args.max_tokens < 1:
+        parser.error("--max-tokens must be at least 1")
+    if args.max_tokens and args.decode_sweep:
+        parser.error("--decode-sweep sets the output length itself; drop --max-tokens")
+    if args.cold_start is not None and args.cold_start < 1:
+        parser.error("--cold-start needs at least one repetition")
+    if args.cold_start and args.api_type != "Ollama":
+        parser.error("--cold-start needs --api-type Ollama, the only API that can unload a model")
+    return args
+
+
+def print_progress(value, message):
+    print(f"[{value:3d}%] {message}", file=sys.stderr)
+
+
+def print_summary(results):
+    if results.get("cancelled"):
+        print("Cancelled run, tasks finished before the cancel")
+    print(f"API:              {results['api_type']} ({results['endpoint']})")
+    print(f"Model:            {results['model']}")
+    if "prompt_file" in results:
+        bucket = f", {results['prompt_bucket']} tokens" if "prompt_bucket" in results else ""
+        print(f"Prompts:          {results['prompt_file']}{bucket}")
+    if "seed" in results:
+        print(f"Seed:             {results['seed']}")
+    if "prefix_tokens" in results:
+        print(f"Prefix:           {results['prefix_tokens']} tokens, {results['prefix_reuse'] * 100:.0f}% shared")
+    print(f"Tasks:            {results['completed']} ({results['error_count']} failed)")
+    if results["load_mode"] == "open":
+        print(f"Load:             open loop, {results['arrival_rate']:.2f} req/s {results['arrival_process']} arrivals")
+    else:
+        print(f"Load:             closed loop, concurrency {results['concurrency']}")
+    if results.get("processes", 1) > 1:
+        print(f"Processes:        {results['processes']} load generators, results merged")
+    print(f"Total time:       {results['total_time']:.2f} s")
+    print(f"Throughput:       {results['throughput']:.2f} tasks/s")
+    print(f"Avg latency:      {results['latency_avg']:.4f} s")
+    print(f"Latency (s):      {format_percentiles(results, 'latency')}")
+    token_rates = format_token_rates(results)
+    print(token_rates[0])
+    print(f"Tokens/s:         {format_percentiles(results, 'tokens_sec', 2)}")
+    for line in token_rates[1:]:
+        print(line)
+    if results["load_mode"] == "open":
+        print(f"Queue delay:      {results['queue_delay_avg']:.4f} s avg, {results['queue_delay_max']:.4f} s max")
+    if "server_timing" in results:
+        for line in format_server_timing(results):
+            print(line)
+    if "phases" in results:
+        phases = " | ".join(f"{name} {phase['avg'] * 1000:.2f}" for name, phase in results["phases"].items())
+        print(f"Phases (avg ms):  {phases}")
+        print(f"Harness overhead: {results['harness_overhead_share'] * 100:.1f}% of task time")
+    if "connections" in results:
+        connections = results["connections"]
+        print(f"Connections:      {connections['connections_opened']} opened "
+              f"({connections['connections_prewarmed']} pre-opened), "
+              f"{connections['reuse_rate'] * 100:.1f}% reuse")
+    if results["stream"]:
+        print(f"Avg TTFT:         {results['ttft_avg']:.4f} s")
+        print(f"TTFT (s):         {format_percentiles(results, 'ttft')}")
+        print(f"Avg ITL:          {results['itl_avg'] * 1000:.1f} ms")
+        if "itl_p50" in results:
+            print(f"ITL (s):          {format_percentiles(results, 'itl')}")
+        print(f"Avg decode tok/s: {results['decode_tokens_sec_avg']:.2f}")
+    if "endpoint_stats" in results:
+        print_endpoints(results)
+    if results["duration"] or not results["task_count"]:
+        print_timeline(results["timeline"])
+
+
+def print_endpoints(results):
+    print(f"Balancer:         {results['balancer']}")
+    print(f"{'Endpoint':<32} {'Tasks':>7} {'Share':>6} {'Tasks/s':>9} {'p50 (s)':>9} {'p90 (s)':>9} {'p99 (s)':>9} {'Errors':>6}")
+    for endpoint, stats in results["endpoint_stats"].items():
+        # Flag replicas whose median latency is well above the fleet's
+        marker = "  <- slow" if stats["slowdown"] > SLOW_REPLICA else ""
+        print(f"{endpoint:<32} {stats['completed']:>7} {stats['share'] * 100:>5.1f}% {stats['throughput']:>9.2f} "
+              f"{stats['latency_p50']:>9.4f} {stats['latency_p90']:>9.4f} {stats['latency_p99']:>9.4f} "
+              f"{stats['error_count']:>6}{marker}")
+
+
+def print_timeline(timeline):
+    print(f"{'Window (s)':>15} {'Tasks':>7} {'Tasks/s':>9} {'p50 (s)':>9} {'p99 (s)':>9} {'Tok/s':>9} {'Errors':>6}")
+    for row in timeline:
+        window = f"{row['start']:.0f}-{row['end']:.0f}"
+        print(f"{window:>15} {row['completed']:>7} {row['throughput']:>9.2f} {row['latency_p50']:>9.4f} "
+              f"{row['latency_p99']:>9.4f} {row['tokens_sec_avg']:>9.2f} {row['error_count']:>6}")
+
+
+def print_sweep(report):
+    print(f"API:   {report['api_type']} ({report['endpoint']})")
+    print(f"Model: {report['model']}")
+    print(f"{'Concurrency':>11} {'Tasks/s':>9} {'Tok/s':>9} {'p50 (s)':>9} {'p90 (s)':>9} {'p99 (s)':>9} {'Errors':>6}")
+    knee = report["knee"]
+    for point in report["points"]:
+        marker = "  <- knee" if knee and point["concurrency"] == knee["concurrency"] else ""
+        print(f"{point['concurrency']:>11} {point['throughput']:>9.2f} {point['tokens_sec_avg']:>9.2f} "
+              f"{point['latency_p50']:>9.4f} {point['latency_p90']:>9.4f} {point['latency_p99']:>9.4f} "
+              f"{point['error_count']:>6}{marker}")
+    if report["cancelled"]:
+        print("Sweep cancelled; only levels that ran to completion are shown")
+    elif report["saturated"]:
+        print(f"Throughput saturates at concurrency {knee['concurrency']} ({knee['throughput']:.2f} tasks/s)")
+    else:
+        print("Throughput was still rising at the highest level; sweep further to find the knee")
+
+
+def print_prefix_comparison(report):
+    print(f"API:   {report['api_type']} ({report['endpoint']})")
+    print(f"Model: {report['model']}")
+    print(f"Unique prefixes vs {report['reuse'] * 100:.0f}% shared, {report['task_count']} tasks each")
+
+    def cell(value, scale=1, digits=4):
+        return "-" if value is None else f"{value * scale:.{digits}f}"
+
+    def change(value):
+        return "-" if value is None else f"{-value * 100:+.1f}%"
+
+    print(f"{'Prefix tok':>10} {'Prefill unique':>14} {'Prefill shared':>14} {'Change':>8} "
+          f"{'Eval tok (u/s)':>14} {'TTFT unique':>11} {'TTFT shared':>11} {'Change':>8}")
+    for point in report["points"]:
+        unique, shared = point["unique"], point["shared"]
+        tokens = f"{cell(unique['prompt_eval_count_avg'], digits=0)}/{cell(shared['prompt_eval_count_avg'], digits=0)}"
+        print(f"{point['prefix_tokens']:>10} {cell(unique['prefill_avg']):>14} {cell(shared['prefill_avg']):>14} "
+              f"{change(point['prefill_saving']):>8} {tokens:>14} {cell(unique['ttft_avg']):>11} "
+              f"{cell(shared['ttft_avg']):>11} {change(point['ttft_saving']):>8}")
+    if report["cancelled"]:
+        print("Comparison cancelled; only prefix lengths run both ways are shown")
+    if report["points"][0]["unique"]["prefill_avg"] is None:
+        print("Prefill times are only reported by Ollama; use --stream to compare TTFT")
+
+
+def print_cold_start(report):
+    print(f"API:   {report['api_type']} ({report['endpoint']})")
+    print(f"Model: {report['model']}")
+    print(f"Cold (model unloaded) vs warm runs of {report['task_count']} tasks; steady state is "
+          f"{report['steady_share'] * 100:.0f}% of the warm throughput")
+
+    def pair(point, metric, digits=3):
+        cold, warm = point["cold"][metric], point["warm"][metric]
+        return "/".join("-" if value is None else f"{value:.{digits}f}" for value in (cold, warm))
+
+    print(f"{'Repetition':>10} {'First req (s)':>15} {'Load (s)':>13} {'Steady after (s)':>16} "
+          f"{'Tasks/s':>15} {'p50 (s)':>13} {'p99 (s)':>13}")
+    rows = [(str(point["repetition"]), point) for point in report["points"]]
+    rows.append(("avg", {"cold": report["cold"], "warm": report["warm"]}))
+    for label, point in rows:
+        print(f"{label:>10} {pair(point, 'first_latency'):>15} {pair(point, 'load_duration'):>13} "
+              f"{pair(point, 'steady_time', 0):>16} {pair(point, 'throughput', 2):>15} "
+              f"{pair(point, 'latency_p50'):>13} {pair(point, 'latency_p99'):>13}")
+    print("Values are cold/warm")
+    cold, warm = report["cold"], report["warm"]
+    if cold["first_latency"] is not None and warm["first_latency"] is not None:
+        print(f"Cold start adds {cold['first_latency'] - warm['first_latency']:.3f} s to the first request"
+              + (f", {cold['load_duration']:.3f} s of it loading the model" if cold["load_duration"] else ""))
+    if cold["error_count"] or warm["error_count"]:
+        print(f"Failed requests per run: {cold['error_count']:.1f} cold, {warm['error_count']:.1f} warm"
+              + ("; no cold request succeeded, so the cold columns are empty" if cold["first_latency"] is None
+                 else ""))
+    if cold["steady_time"] is None:
+        print("Cold runs never reached steady-state throughput; use more tasks")
+    if report["cancelled"]:
+        print("Comparison cancelled; only repetitions run both ways are shown")
+
+
+def print_context_sweep(report):
+    print(f"API:   {report['api_type']} ({report['endpoint']})")
+    print(f"Model: {report['model']}" + (f" (context length {report['context_limit']})"
+                                         if report["context_limit"] else ""))
+
+    def cell(value, digits=4):
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    print(f"{'Tokens':>7} {'num_ctx':>7} {'Eval tok':>8} {'Prefill (s)':>11} {'Prefill tok/s':>13} "
+          f"{'TTFT p50':>9} {'p50 (s)':>9} {'p99 (s)':>9} {'Tasks/s':>9} {'Errors':>6}")
+    falloff = report["falloff"]
+    for point in report["points"]:
+        marker = "  <- falloff" if falloff and point["context_tokens"] == falloff["context_tokens"] else ""
+        print(f"{point['context_tokens']:>7} {point['num_ctx'] or '-':>7} {cell(point['prompt_eval_count_avg'], 0):>8} "
+              f"{cell(point['prefill_avg']):>11} {cell(point['prefill_tokens_sec'], 1):>13} "
+              f"{cell(point['ttft_p50']):>9} {point['latency_p50']:>9.4f} {point['latency_p99']:>9.4f} "
+              f"{point['throughput']:>9.2f} {point['error_count']:>6}{marker}")
+    if report.get("dropped_lengths"):
+        print(f"Skipped {', '.join(str(tokens) for tokens in report['dropped_lengths'])} tokens: longer than the "
+              f"context length of {report['context_limit']} less room for the answer")
+    if report["cancelled"]:
+        print("Sweep cancelled; only lengths that ran to completion are shown")
+    elif falloff:
+        print(f"Throughput falls below {report['falloff_share'] * 100:.0f}% of the shortest prompts' at "
+              f"{falloff['context_tokens']} tokens ({falloff['throughput']:.2f} tasks/s)")
+    else:
+        print(f"Throughput stayed above {report['falloff_share'] * 100:.0f}% of the shortest prompts' "
+              f"at every length")
+    if report["points"][0]["prefill_avg"] is None and report["points"][0]["ttft_p50"] is None:
+        print("Prefill times are only reported by Ollama; use --stream to see TTFT")
+
+
+def print_decode_sweep(report):
+    print(f"API:   {report['api_type']} ({report['endpoint']})")
+    print(f"Model: {report['model']}")
+
+    def cell(value, digits=2):
+        return "-" if value is None else f"{value:.{digits}f}"
+
+    print(f"{'Limit':>6} {'Out tok':>8} {'Pinned':>7} {'Decode tok/s':>12} {'ITL (ms)':>9} {'p50 (s)':>9} "
+          f"{'p99 (s)':>9} {'Tasks/s':>9} {'Out tok/s':>10} {'Errors':>6}")
+    for point in report["points"]:
+        pinned = "-" if point["pinned_share"] is None else f"{point['pinned_share'] * 100:.0f}%"
+        itl = None if point["itl_avg"] is None else point["itl_avg"] * 1000
+        print(f"{point['max_tokens']:>6} {cell(point['output_tokens_avg'], 1):>8} {pinned:>7} "
+              f"{cell(point['decode_tokens_sec']):>12} {cell(itl, 1):>9} {point['latency_p50']:>9.4f} "
+              f"{point['latency_p99']:>9.4f} {point['throughput']:>9.2f} {cell(point['output_tokens_sec'], 1):>10} "
+              f"{point['error_count']:>6}")
+    if report["cancelled"]:
+        print("Sweep cancelled; only lengths that ran to completion are shown")
+    fit = report["latency_fit"]
+    if fit:
+        print(f"Latency fit: {fit['overhead']:.4f} s fixed + {fit['per_token'] * 1000:.2f} ms per output token")
+    short = [point["max_tokens"] for point in report["points"]
+             if point["pinned_share"] is not None and point["pinned_share"] < MIN_PINNED_SHARE]
+    if short:
+        print(f"Most answers stopped short of the limit at {', '.join(str(length) for length in short)} tokens; "
+              "use --prompts with prompts that ask for long answers")
+    if report["points"][0]["decode_tokens_sec"] is None:
+        print("Decode tok/s needs --stream, or Ollama's server timings")
+
+
+def print_regression_report(report):
+    print(f"Baseline: {report['baseline']} ({report['baseline_label']})")
+    print(f"Regression: worse by more than {report['threshold'] * 100:g}% and, where tested, outside the "
+          f"{report['confidence'] * 100:.0f}% bootstrap interval of no change")
+
+    def interval(row):
+        if row["interval"] is None:
+            return "-"
+        low, high = row["interval"]
+        return f"[{low * 100:+.1f}%, {high * 100:+.1f}%]"
+
+    for comparison in report["comparisons"]:
+        print()
+        print(f"Run: {comparison['path']} ({comparison['label']})")
+        print(f"{'Metric':<16} {'Baseline':>10} {'Run':>10} {'Change':>8} {'95% interval':>20} {'MWU p':>7}")
+        for row in comparison["rows"]:
+            change = f"{row['change'] * 100:+.1f}%" if row["change"] is not None else "-"
+            p_value = f"{row['p_value']:.3f}" if row["p_value"] is not None else "-"
+            marker = "  <- regression" if row["regression"] else ""
+            print(f"{row['metric']:<16} {row['baseline']:>10.4f} {row['candidate']:>10.4f} {change:>8} "
+                  f"{interval(row):>20} {p_value:>7}{marker}")
+        if comparison["regressions"]:
+            print(f"Regressed: {', '.join(comparison['regressions'])}")
+        else:
+            print("No regressions")
+
+
+def print_history(runs):
+    print(f"{'Started':<16} {'Model':<20} {'Host':<22} {'Conc':>5} {'Tasks':>6} {'Tasks/s':>9} "
+          f"{'p50 (s)':>9} {'p99 (s)':>9} {'Tok/s':>9} {'Errors':>6}")
+    for run in runs:
+        started = time.strftime("%Y-%m-%d %H:%M", time.localtime(run["started"]))
+        concurrency = f"{run['arrival_rate']:g}/s" if run["load_mode"] == "open" else run["concurrency"]
+        marker = "  (cancelled)" if run["cancelled"] else ""
+        print(f"{started:<16} {str(run['model'])[:20]:<20} {str(run['host'])[:22]:<22} {concurrency:>5} "
+              f"{run['completed'] or 0:>6} {run['throughput'] or 0:>9.2f} {run['latency_p50'] or 0:>9.4f} "
+              f"{run['latency_p99'] or 0:>9.4f} {run['tokens_sec_avg'] or 0:>9.2f} {run['error_count'] or 0:>6}{marker}")
+    if not runs:
+        print("No runs match")
+
+
+def store_results(path, results):
+    # Sweeps and comparisons store each of their runs
+    store = ResultStore(path)
+    try:
+        for run in results.get("runs", [results]):
+            store.add_run(run)
+    finally:
+        store.close()
+
+
+def build_runner(args, api_config):
+    progress_callback = None if args.quiet else print_progress
+    engine_options = {"stream": args.stream, "prewarm": args.prewarm, "duration": args.duration,
+                      "result_log": args.log, "balancer": args.balancer, "processes": args.processes,
+                      "arrival_rate": args.rate, "arrival_process": args.arrival,
+                      "prompt_file": args.prompts, "prompt_bucket": args.prompt_bucket, "seed": args.seed,
+                      "max_tokens": args.max_tokens}
+
+    if args.prefix_compare:
+        runner = PrefixCacheComparison(args.engine, api_config, args.model, args.tasks,
+                                       parse_levels(args.prefix_compare),
+                                       reuse=args.prefix_reuse,
+                                       concurrency=args.concurrency,
+                                       warmup_runs=args.warmup,
+                                       progress_callback=progress_callback,
+                                       **engine_options)
+        return runner, print_prefix_comparison
+    engine_options["prefix_tokens"] = args.prefix_tokens
+    engine_options["prefix_reuse"] = args.prefix_reuse
+
+    if args.cold_start:
+        runner = ColdStartComparison(args.engine, api_config, args.model, args.tasks, args.cold_start,
+                                     concurrency=args.concurrency,
+                                     progress_callback=progress_callback,
+                                     **engine_options)
+        return runner, print_cold_start
+
+    if args.context_sweep is not None:
+        lengths = parse_levels(args.context_sweep) if args.context_sweep else None
+        if lengths and len(lengths) == 1:
+            lengths = context_lengths(lengths[0])
+        runner = ContextSweep(args.engine, api_config, args.model, args.tasks, lengths,
+                              concurrency=args.concurrency,
+                              warmup_runs=args.warmup,
+                              progress_callback=progress_callback,
+                              **engine_options)
+        return runner, print_context_sweep
+
+    if args.decode_sweep:
+        del engine_options["max_tokens"]
+        runner = OutputLengthSweep(args.engine, api_config, args.model, args.tasks,
+                                   parse_levels(args.decode_sweep),
+                                   concurrency=args.concurrency,
+                                   warmup_runs=args.warmup,
+                                   progress_callback=progress_callback,
+                                   **engine_options)
+        return runner, print_decode_sweep
+
+    if args.sweep:
+        levels = parse_levels(args.sweep)
+        if len(levels) == 1:
+            levels = concurrency_levels(levels[0])
+        runner = ConcurrencySweep(args.engine, api_config, args.model, args.tasks, levels,
+                                  warmup_runs=args.warmup,
+                                  progress_callback=progress_callback,
+                                  **engine_options)
+        return runner, print_sweep
+
+    runner = create_engine(args.engine, api_config, args.model, args.tasks,
+                           concurrency=args.concurrency,
+                           warmup_runs=args.warmup,
+                           progress_callback=progress_callback,
+                           **engine_options)
+    return runner, print_summary
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    api_config = make_api_config(args.api_type, args.endpoint, args.api_key, args.path)
+
+    if args.list_models:
+        for model in list_ollama_models(api_config["endpoint"]):
+            print(model)
+        return 0
+
+    if args.compare:
+        try:
+            report = regression_report(args.compare, args.threshold / 100)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print_regression_report(report)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"Comparison saved to {args.output}")
+        return REGRESSION_EXIT if report["regressed"] else 0
+
+    if args.import_files or args.history:
+        try:
+            store = ResultStore(args.store or DEFAULT_STORE)
+            for path in args.import_files or []:
+                added, skipped = store.import_file(path)
+                print(f"{path}: {added} runs added" + (f", {skipped} already stored" if skipped else ""))
+            if args.history:
+                print_history(store.runs(args.model, args.host, args.days))
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        return 0
+
+    if args.corpus_info:
+        try:
+            corpus = load_corpus(args.corpus_info)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 1
+        print(f"{args.corpus_info}: {len(corpus)} prompts")
+        print(f"{'Tokens (est.)':>13} {'Prompts':>9}")
+        for bucket, count in corpus.bucket_counts().items():
+            print(f"{bucket:>13} {count:>9}")
+        return 0
+
+    if args.load_log:
+        for index, results in enumerate(load_result_log(args.load_log)):
+            if index:
+                print()
+            if results.get("partial"):
+                print("Interrupted run, rebuilt from the logged tasks")
+            print_summary(results)
+        return 0
+
+    runner, print_report = build_runner(args, api_config)
+
+    # The first Ctrl+C cancels the run, which stops at once and still reports
+    # the tasks finished so far; a second one quits outright
+    def interrupt(signum, frame):
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        print("Cancelling, press Ctrl+C again to quit", file=sys.stderr)
+        runner.cancel()
+
+    signal.signal(signal.SIGINT, interrupt)
+    try:
+        results = runner.run()
+    except KeyboardInterrupt:
+        print("Benchmark cancelled", file=sys.stderr)
+        return 130
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if results is None:
+        print("Benchmark cancelled", file=sys.stderr)
+        return 130
+
+    print_report(results)
+
+    if args.output:
+        # Same layout as the GUI exports: a list of run summaries
+        with open(args.output, 'w') as f:
+            json.dump([results], f, indent=2)
+        print(f"Benchmark results saved to {args.output}")
+
+    if args.csv and args.sweep:
+        write_sweep_csv(results, args.csv)
+        print(f"Sweep table saved to {args.csv}")
+
+    if args.store:
+        store_results(args.store, results)
+        print(f"Run saved to {args.store}")
+
+    return 130 if results.get("cancelled") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import time
+import requests
+from balancer import endpoint_list
+from sweep import SweepRunner
+
+# Cold-start benchmark. Warm-up runs hide the cost of loading a model, which
+# is what users see after an autoscaler adds a replica or Ollama evicts an
+# idle model. Each repetition unloads the model (keep_alive 0), runs the
+# workload cold, then runs it again with the model loaded, and compares:
+#
+#   first_latency   latency of the first successful request to complete;
+#                   failed ones (a timeout while the model loads) are skipped
+#   load_duration   longest model load Ollama reported for a request
+#   error_count     failed requests, so a cold run that never got a model
+#                   loaded shows up instead of leaving the columns empty
+#   steady_time     seconds until throughput reached STEADY_SHARE of the
+#                   warm run's, over STEADY_WINDOW-second windows
+#
+# Unloading is an Ollama API, so other providers are not supported.
+
+DEFAULT_REPETITIONS = 3
+STEADY_SHARE = 0.9
+STEADY_WINDOW = 5  # Seconds; runs shorter than twice this use half their length
+UNLOAD_TIMEOUT = 60  # Seconds to wait for the model to leave memory
+UNLOAD_POLL = 0.25
+
+COLD_START_METRICS = ("first_latency", "load_duration", "steady_time", "throughput", "latency_p50", "latency_p99",
+                      "error_count")
+
+
+def loaded_models(endpoint, timeout=5):
+    # Names of the models Ollama holds in memory; None if /api/ps is missing
+    response = requests.get(f"{endpoint}/api/ps", timeout=timeout)
+    if response.status_code == 404:
+        return None
+    response.raise_for_status()
+    return {name for model in response.json().get("models", [])
+            for name in (model.get("name"), model.get("model")) if name}
+
+
+def unload_model(endpoint, model_name, timeout=UNLOAD_TIMEOUT):
+    # A request without a prompt and keep_alive 0 makes Ollama unload the
+    # model; it leaves memory shortly after, so wait until /api/ps agrees
+    response = requests.post(f"{endpoint}/api/generate", json={"model": model_name, "keep_alive": 0},
+                             timeout=timeout)
+    response.raise_for_status()
+    names = (model_name, f"{model_name}:latest")
+    deadline = time.monotonic() + timeout
+    while True:
+        loaded = loaded_models(endpoint)
+        if loaded is None or not loaded.intersection(names):
+            return
+        if time.monotonic() > deadline:
+            raise Exception(f"{model_name} still loaded on {endpoint} after {timeout}s")
+        time.sleep(UNLOAD_POLL)
+
+
+def steady_state_time(completions, target, share=STEADY_SHARE, window=STEADY_WINDOW):
+    # Start (seconds into the run) of the first window whose completion rate
+    # reaches `share` of `target` tasks/s; None if none did. The second the
+    # run ended in is partial, so it is left out.
+    counts = [completed for _, completed in completions[:-1]] or [completed for _, completed in completions]
+    window = max(min(window, len(counts) // 2), 1)
+    for start in range(len(counts) - window + 1):
+        if sum(counts[start:start + window]) / window >= share * target:
+            return float(start)
+    return None
+
+
+def start_metrics(summary, completions, target):
+    # Results are in completion order
+    results = [result for result in summary.get("results", []) if "error" not in result]
+    loads = [result["load_duration"] for result in results if "load_duration" in result]
+    return {
+        "first_latency": results[0]["latency"] if results else None,
+        "load_duration": max(loads) if loads else None,
+        "steady_time": steady_state_time(completions, target),
+        "throughput": summary["throughput"],
+        "latency_p50": summary["latency_p50"],
+        "latency_p99": summary["latency_p99"],
+        "error_count": summary["error_count"]
+    }
+
+
+def average_metrics(points, start):
+    # Mean of each metric over the repetitions that measured it
+    averages = {}
+    for metric in COLD_START_METRICS:
+        values = [point[start][metric] for point in points if point[start][metric] is not None]
+        averages[metric] = sum(values) / len(values) if values else None
+    return averages
+
+
+class ColdStartComparison(SweepRunner):
+    mode = "cold_start"
+
+    def __init__(self, engine_type, api_config, model_name, task_count, repetitions=DEFAULT_REPETITIONS,
+                 **kwargs):
+        if api_config["type"] != "Ollama":
+            raise ValueError("Cold-start runs need Ollama, the only API that can unload a model")
+        super().__init__(engine_type, api_config, model_name, task_count, **kwargs)
+        self.repetitions = repetitions
+        self.cold_completions = []
+
+    def steps(self):
+        # No warm-up: it would load the model before the timed phase
+        return [{"label": f"repetition {repetition + 1}/{self.repetitions}, {start}",
+                 "options": {"warmup_runs": 0}, "repetition": repetition + 1, "start": start}
+                for repetition in range(self.repetitions) for start in ("cold", "warm")]
+
+    def before_step(self, index, step):
+        if step["start"] == "cold":
+            self.report(int(index * 100 / (2 * self.repetitions)),
+                        f"[repetition {step['repetition']}/{self.repetitions}] Unloading {self.model_name}...")
+            for endpoint in endpoint_list(self.api_config):
+                unload_model(endpoint, self.model_name)
+
+    def point(self, index, step, summary):
+        summary["start"] = step["start"]
+        if step["start"] == "cold":
+            self.cold_completions = self.engine.live.completions()
+            return None
+        # Steady state means the throughput the loaded model sustains
+        cold = self.runs[-2]
+        return {
+            "repetition": step["repetition"],
+            "cold": start_metrics(cold, self.cold_completions, summary["throughput"]),
+            "warm": start_metrics(summary, self.engine.live.completions(), summary["throughput"])
+        }
+
+    def report_fields(self, points):
+        return {
+            "repetitions": self.repetitions,
+            "steady_share": STEADY_SHARE,
+            "cold": average_metrics(points, "cold"),
+            "warm": average_metrics(points, "warm")
+        }
@@ -0,0 +1,168 @@
+import os
+import json
+import math
+import random
+from result_log import load_result_log
+
+# Run-to-run regression checks. Loads saved runs (JSON exports of the GUIs and
+# the CLI, or JSON Lines run logs), compares each against the first one and
+# flags metrics that got worse by more than a threshold. A change only counts
+# when it is also significant: the bootstrap confidence interval of the
+# relative change must exclude zero. Mann-Whitney U p-values tell whether the
+# per-task distributions moved at all.
+
+BOOTSTRAP_SAMPLES = 500
+MAX_SAMPLES = 2000  # Per-task values per run used for the tests; more are subsampled
+CONFIDENCE = 0.95
+REGRESSION_THRESHOLD = 0.05  # Relative change that counts as a regression
+SEED = 0  # Tests are seeded, so the same files always give the same verdict
+
+# (summary key, per-task metric, statistic, higher is better). Throughput is
+# one number per run, so it has no test.
+COMPARED_METRICS = [
+    ("throughput", None, None, True),
+    ("latency_p50", "latency", 50, False),
+    ("latency_p90", "latency", 90, False),
+    ("latency_p99", "latency", 99, False),
+    ("tokens_sec_avg", "tokens_sec", "mean", True),
+    ("ttft_p50", "ttft", 50, False),
+    ("ttft_p99", "ttft", 99, False)
+]
+
+
+def read_runs(path):
+    # Every run in a JSON export, sweep or comparison report, or run log
+    if os.path.splitext(path)[1].lower() == ".jsonl":
+        return load_result_log(path)
+    with open(path) as f:
+        data = json.load(f)
+    runs = data if isinstance(data, list) else [data]
+    # Sweep and comparison reports keep their runs one level down
+    return [run for entry in runs for run in (entry["runs"] if "runs" in entry else [entry])]
+
+
+def load_runs(path):
+    # "runs.json" -> its last run; "runs.json#2" -> its second run (1-based)
+    path, _, index = path.partition("#")
+    runs = read_runs(path)
+    if not runs:
+        raise ValueError(f"No runs in {path}")
+    if not index:
+        return runs[-1]
+    if not 1 <= int(index) <= len(runs):
+        raise ValueError(f"{path} holds {len(runs)} runs, not {index}")
+    return runs[int(index) - 1]
+
+
+def task_values(run, metric, rng):
+    values = [result[metric] for result in run.get("results", []) if "error" not in result and metric in result]
+    if len(values) > MAX_SAMPLES:
+        values = rng.sample(values, MAX_SAMPLES)
+    return values
+
+
+def statistic(values, stat):
+    # stat: "mean" or a nearest-rank percentile, like the run summaries
+    if stat == "mean":
+        return sum(values) / len(values)
+    ordered = sorted(values)
+    return ordered[max(math.ceil(stat / 100 * len(ordered)), 1) - 1]
+
+
+def bootstrap_interval(baseline, candidate, stat, rng, samples=BOOTSTRAP_SAMPLES, confidence=CONFIDENCE):
+    # Percentile bootstrap of the relative change candidate/baseline - 1
+    changes = []
+    for _ in range(samples):
+        before = statistic(rng.choices(baseline, k=len(baseline)), stat)
+        after = statistic(rng.choices(candidate, k=len(candidate)), stat)
+        if before:
+            changes.append(after / before - 1)
+    if not changes:
+        return None
+    changes.sort()
+    tail = (1 - confidence) / 2
+    return changes[int(tail * (len(changes) - 1))], changes[int((1 - tail) * (len(changes) - 1))]
+
+
+def mann_whitney(baseline, candidate):
+    # Two-sided p-value of the Mann-Whitney U test, normal approximation with
+    # tie correction
+    n1, n2 = len(baseline), len(candidate)
+    combined = sorted([(value, 0) for value in baseline] + [(value, 1) for value in candidate])
+    ranks = [0.0] * len(combined)
+    ties = 0.0
+    start = 0
+    while start < len(combined):
+        end = start
+        while end + 1 < len(combined) and combined[end + 1][0] == combined[start][0]:
+            end += 1
+        for i in range(start, end + 1):
+            ranks[i] = (start + end) / 2 + 1
+        count = end - start + 1
+        ties += count ** 3 - count
+        start = end + 1
+    rank_sum = sum(rank for rank, (_, group) in zip(ranks, combined) if group == 0)
+    u = rank_sum - n1 * (n1 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2) / math.sqrt(variance)
+    return math.erfc(abs(z) / math.sqrt(2))
+
+
+def compare_metric(baseline, candidate, key, metric, stat, higher_is_better, threshold, rng):
+    before, after = baseline.get(key), candidate.get(key)
+    if before is None or after is None:
+        return None
+    row = {"metric": key, "baseline": before, "candidate": after,
+           "change": after / before - 1 if before else None,
+           "interval": None, "p_value": None, "significant": None}
+
+    if metric is not None:
+        before_values = task_values(baseline, metric, rng)
+        after_values = task_values(candidate, metric, rng)
+        if len(before_values) >= 2 and len(after_values) >= 2:
+            row["interval"] = bootstrap_interval(before_values, after_values, stat, rng)
+            row["p_value"] = mann_whitney(before_values, after_values)
+            if row["interval"] is not None:
+                low, high = row["interval"]
+                row["significant"] = low > 0 or high < 0
+
+    # Worse by more than the threshold, and not within the noise if tested
+    worse = row["change"] is not None and (-row["change"] if higher_is_better else row["change"]) > threshold
+    row["regression"] = worse and row["significant"] is not False
+    return row
+
+
+def compare_runs(baseline, candidate, threshold=REGRESSION_THRESHOLD, seed=SEED):
+    rng = random.Random(seed)
+    rows = [compare_metric(baseline, candidate, key, metric, stat, higher_is_better, threshold, rng)
+            for key, metric, stat, higher_is_better in COMPARED_METRICS]
+    return [row for row in rows if row is not None]
+
+
+def run_label(run):
+    label = f"{run.get('model', '?')} @ {run.get('endpoint', '?')}, {run.get('completed', 0)} tasks"
+    if run.get("load_mode") == "open":
+        return f"{label}, {run['arrival_rate']:.2f} req/s"
+    return f"{label}, concurrency {run.get('concurrency', '?')}"
+
+
+def regression_report(paths, threshold=REGRESSION_THRESHOLD, seed=SEED):
+    # The first path is the baseline; every other run is compared to it
+    runs = [load_runs(path) for path in paths]
+    comparisons = []
+    for path, run in zip(paths[1:], runs[1:]):
+        rows = compare_runs(runs[0], run, threshold, seed)
+        comparisons.append({"path": path, "label": run_label(run), "rows": rows,
+                            "regressions": [row["metric"] for row in rows if row["regression"]]})
+    return {
+        "mode": "regression_check",
+        "baseline": paths[0],
+        "baseline_label": run_label(runs[0]),
+        "threshold": threshold,
+        "confidence": CONFIDENCE,
+        "comparisons": comparisons,
+        "regressed": any(comparison["regressions"] for comparison in comparisons)
+    }
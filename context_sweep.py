@@ -0,0 +1,144 @@
+import requests
+from corpus import CHARS_PER_TOKEN
+from prefix_cache import prefix_text
+from sweep import SweepRunner
+
+# Context-length sweep: the same benchmark with synthetic prompts of growing
+# length, 128 tokens up to the model's context window, to see how prefill
+# time, TTFT and latency grow and where throughput falls off. Ollama gets a
+# num_ctx that fits each length, so short levels do not pay for a huge KV
+# cache; it reloads the model whenever num_ctx changes, so every level
+# warms up again.
+
+MIN_CONTEXT = 128
+DEFAULT_MAX_CONTEXT = 8192  # When the model's context length is unknown
+OUTPUT_HEADROOM = 512  # Tokens of num_ctx left for the answer and token estimate errors
+FALLOFF_SHARE = 0.5  # Below half the shortest length's throughput counts as fallen off
+
+CONTEXT_QUESTION = "\n\nIn one sentence, what is the text above about?"
+
+
+def context_lengths(max_tokens, min_tokens=MIN_CONTEXT):
+    # 128, 256, 512 ... up to and including max_tokens
+    lengths = []
+    length = min_tokens
+    while length < max_tokens:
+        lengths.append(length)
+        length *= 2
+    lengths.append(max_tokens)
+    return lengths
+
+
+def context_prompts(rng, tokens):
+    # Endless unique prompts of about `tokens` tokens, estimated like corpus
+    # length buckets; the random tag keeps prompt caches from sharing them
+    filler = max(tokens - len(CONTEXT_QUESTION) // CHARS_PER_TOKEN - 5, 1)
+    while True:
+        yield f"[{rng.getrandbits(64):016x}] {prefix_text(filler, rng)}{CONTEXT_QUESTION}"
+
+
+def context_window(tokens, limit=None):
+    # num_ctx for prompts of `tokens` tokens, within the model's limit
+    window = tokens + OUTPUT_HEADROOM
+    return min(window, limit) if limit else window
+
+
+def model_context_length(endpoint, model_name, timeout=10):
+    # The model's trained context length from Ollama's /api/show, or None
+    response = requests.post(f"{endpoint}/api/show", json={"model": model_name}, timeout=timeout)
+    response.raise_for_status()
+    for key, value in response.json().get("model_info", {}).items():
+        if key.endswith(".context_length"):
+            return int(value)
+    return None
+
+
+def default_lengths(api_config, model_name):
+    # 128 ... the model's context length less room for the answer, and that
+    # context length; Ollama reports it, other APIs get DEFAULT_MAX_CONTEXT
+    limit = None
+    if api_config["type"] == "Ollama":
+        try:
+            limit = model_context_length(api_config["endpoint"], model_name)
+        except (requests.RequestException, ValueError):
+            pass
+    return context_lengths(limit - OUTPUT_HEADROOM if limit else DEFAULT_MAX_CONTEXT), limit
+
+
+def context_point(tokens, num_ctx, summary):
+    # Prefill comes from Ollama's prompt_eval_duration, TTFT from streaming
+    # runs; either is None when not measured
+    timing = summary.get("server_timing", {})
+    prefill = timing.get("prompt_eval_duration", {})
+    return {
+        "context_tokens": tokens,
+        "num_ctx": num_ctx,
+        "prompt_eval_count_avg": timing.get("prompt_eval_count", {}).get("avg"),
+        "prefill_avg": prefill.get("avg"),
+        "prefill_p99": prefill.get("p99"),
+        "prefill_tokens_sec": timing.get("prefill_tokens_sec", {}).get("avg"),
+        "ttft_p50": summary.get("ttft_p50"),
+        "ttft_p99": summary.get("ttft_p99"),
+        "latency_p50": summary["latency_p50"],
+        "latency_p99": summary["latency_p99"],
+        "throughput": summary["throughput"],
+        "tokens_sec_avg": summary["tokens_sec_avg"],
+        "error_count": summary["error_count"]
+    }
+
+
+def find_falloff(points, share=FALLOFF_SHARE):
+    # First length whose throughput dropped below `share` of the shortest's
+    if not points or points[0]["throughput"] <= 0:
+        return None
+    for point in points[1:]:
+        if point["throughput"] < share * points[0]["throughput"]:
+            return point
+    return None
+
+
+class ContextSweep(SweepRunner):
+    mode = "context_sweep"
+
+    def __init__(self, engine_type, api_config, model_name, task_count, lengths=None, **kwargs):
+        super().__init__(engine_type, api_config, model_name, task_count, **kwargs)
+        self.lengths = lengths  # None for default_lengths
+        self.context_limit = None  # The model's context length, if known
+        self.dropped = []  # Requested lengths that do not fit the context length
+
+    def steps(self):
+        self.report(0, f"Looking up the context length of {self.model_name}...")
+        lengths, self.context_limit = default_lengths(self.api_config, self.model_name)
+        if self.lengths and self.context_limit:
+            # A prompt longer than num_ctx would be truncated without a word
+            # and still be reported under its nominal length, so leave it out
+            fits = self.context_limit - OUTPUT_HEADROOM
+            self.dropped = [tokens for tokens in self.lengths if tokens > fits]
+            self.lengths = [tokens for tokens in self.lengths if tokens <= fits]
+            if not self.lengths:
+                raise ValueError(f"No requested length fits {self.model_name}'s context length of "
+                                 f"{self.context_limit} tokens; the longest that fits is {fits}")
+            if self.dropped:
+                self.report(0, f"Skipping {', '.join(str(tokens) for tokens in self.dropped)} tokens: "
+                               f"longer than {fits}, the context length less room for the answer")
+        self.lengths = self.lengths or lengths
+        ollama = self.api_config["type"] == "Ollama"
+        steps = []
+        for tokens in self.lengths:
+            num_ctx = context_window(tokens, self.context_limit) if ollama else None
+            # Every level warms up: a new num_ctx reloads the model
+            steps.append({"label": f"{tokens} tokens", "context_tokens": tokens, "num_ctx": num_ctx,
+                          "options": {"warmup_runs": self.warmup_runs, "prompt_tokens": tokens, "num_ctx": num_ctx}})
+        return steps
+
+    def point(self, index, step, summary):
+        return context_point(step["context_tokens"], step["num_ctx"], summary)
+
+    def report_fields(self, points):
+        return {
+            "lengths": self.lengths,
+            "context_limit": self.context_limit,
+            "dropped_lengths": self.dropped,
+            "falloff_share": FALLOFF_SHARE,
+            "falloff": find_falloff(points)
+        }
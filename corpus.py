@@ -0,0 +1,147 @@
+import os
+import json
+import array
+import threading
+
+# External prompt corpora. A corpus file is indexed once, in a single pass:
+# only the byte offset of each prompt is kept, grouped by estimated token
+# length, and prompts are read back from disk as they are sent. Memory is
+# 8 bytes per prompt, so corpora of millions of prompts are fine.
+#
+# Plain text files hold one prompt per line. JSON Lines files (.jsonl) hold
+# one prompt per line as a JSON string or an object with a "prompt" or
+# "text" key. Blank lines are skipped.
+
+CHARS_PER_TOKEN = 4  # Rough estimate; no tokenizer needed
+# Upper bounds (estimated tokens) of the length buckets; the last bucket is open
+TOKEN_BUCKETS = (64, 256, 1024, 4096)
+# Corpora up to this size are sampled in shuffled passes, so no prompt repeats
+# before every prompt was sent once. Larger ones are sampled with
+# replacement, which needs no per-prompt state and rarely repeats.
+SHUFFLE_LIMIT = 100000
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def bucket_names(bounds=TOKEN_BUCKETS):
+    # (64, 256) -> ["<64", "64-256", ">=256"]
+    names = [f"<{bounds[0]}"]
+    names += [f"{low}-{high}" for low, high in zip(bounds, bounds[1:])]
+    names.append(f">={bounds[-1]}")
+    return names
+
+
+BUCKETS = bucket_names()
+
+
+def estimate_tokens(text):
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def bucket_of(tokens, bounds=TOKEN_BUCKETS):
+    for index, bound in enumerate(bounds):
+        if tokens < bound:
+            return index
+    return len(bounds)
+
+
+def _is_jsonl(path):
+    return os.path.splitext(path)[1].lower() in (".jsonl", ".ndjson")
+
+
+def _parse_line(line, jsonl):
+    # bytes -> prompt text, or None for a blank line
+    text = line.decode("utf-8").strip()
+    if not text or not jsonl:
+        return text or None
+    record = json.loads(text)
+    if isinstance(record, dict):
+        record = record.get("prompt", record.get("text"))
+    if not isinstance(record, str):
+        raise ValueError("expected a string or an object with a \"prompt\" or \"text\" key")
+    return record or None
+
+
+class PromptCorpus:
+    def __init__(self, path):
+        self.path = path
+        self.jsonl = _is_jsonl(path)
+        self.offsets = [array.array("q") for _ in BUCKETS]
+        with open(path, "rb") as f:
+            offset = 0
+            for number, line in enumerate(f, 1):
+                try:
+                    prompt = _parse_line(line, self.jsonl)
+                except ValueError as e:
+                    raise ValueError(f"{path}, line {number}: {e}")
+                if prompt is not None:
+                    self.offsets[bucket_of(estimate_tokens(prompt))].append(offset)
+                offset += len(line)
+        if not len(self):
+            raise ValueError(f"No prompts in {path}")
+
+    def __len__(self):
+        return sum(len(offsets) for offsets in self.offsets)
+
+    def bucket_counts(self):
+        return {name: len(offsets) for name, offsets in zip(BUCKETS, self.offsets)}
+
+    def select(self, bucket=None):
+        # Offsets to sample from: one length bucket, or the whole corpus.
+        # None for a whole corpus too large to list.
+        if bucket is None:
+            if len(self) > SHUFFLE_LIMIT:
+                return None
+            return [offset for offsets in self.offsets for offset in offsets]
+        if bucket not in BUCKETS:
+            raise ValueError(f"Unknown prompt length bucket: {bucket} (choose from {', '.join(BUCKETS)})")
+        offsets = self.offsets[BUCKETS.index(bucket)]
+        if not offsets:
+            raise ValueError(f"No prompts of {bucket} tokens in {self.path}")
+        return offsets
+
+    def offset_at(self, index):
+        # index over the whole corpus, bucket by bucket
+        for offsets in self.offsets:
+            if index < len(offsets):
+                return offsets[index]
+            index -= len(offsets)
+        raise IndexError(index)
+
+    def sample(self, rng, bucket=None):
+        # Endless stream of prompts drawn with `rng`. The order only depends
+        # on the seed, not on how many prompts are taken, so a run split
+        # across processes sends the same prompts as a single process.
+        offsets = self.select(bucket)
+        with open(self.path, "rb") as f:
+            def read(offset):
+                f.seek(offset)
+                return _parse_line(f.readline(), self.jsonl)
+
+            if offsets is None:
+                total = len(self)
+                while True:
+                    yield read(self.offset_at(rng.randrange(total)))
+            elif len(offsets) > SHUFFLE_LIMIT:
+                while True:
+                    yield read(offsets[rng.randrange(len(offsets))])
+            else:
+                order = list(offsets)
+                while True:
+                    rng.shuffle(order)
+                    for offset in order:
+                        yield read(offset)
+
+
+def load_corpus(path):
+    # Indexed corpora are kept while the file is unchanged, so the levels of a
+    # sweep do not index the same file again
+    stat = os.stat(path)
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        if key not in _cache:
+            _cache.clear()
+            _cache[key] = PromptCorpus(path)
+        return _cache[key]
+
@@ -0,0 +1,90 @@
+from sweep import SweepRunner
+
+# Output-length sweep: the same benchmark with the generation length pinned
+# to each of several values (num_predict for Ollama, max_tokens elsewhere),
+# to see how decode speed and per-token latency change as answers get
+# longer. A limit only caps the answer, so the prompts have to ask for more
+# than the longest length; short answers show up as a low pinned share.
+#
+# Latency is fitted against the tokens actually generated,
+#
+#   latency = fixed overhead + per-token latency * output tokens
+#
+# where the fixed part is the request, queueing and prefill, and the slope
+# is the decode cost of one more token.
+
+DEFAULT_OUTPUT_LENGTHS = [32, 64, 128, 256, 512, 1024]
+PINNED_SHARE = 0.9  # Answers with at least 90% of the limit count as pinned
+MIN_PINNED_SHARE = 0.5  # Below this the level mostly measured short answers
+
+
+def pinned_share(results, max_tokens):
+    # Share of the results that generated close to `max_tokens` tokens; None
+    # if the API reported no token counts
+    counts = [result["output_tokens"] for result in results if "output_tokens" in result]
+    if not counts:
+        return None
+    return sum(1 for count in counts if count >= PINNED_SHARE * max_tokens) / len(counts)
+
+
+def output_point(max_tokens, summary):
+    # Decode speed comes from stream chunk timing, or from Ollama's
+    # eval_duration (tokens_sec) on non-streaming runs
+    output_tokens = summary.get("output_tokens_avg")
+    decode = summary.get("decode_tokens_sec_avg")
+    if decode is None and summary.get("api_type") == "Ollama":
+        decode = summary["tokens_sec_avg"]
+    return {
+        "max_tokens": max_tokens,
+        "output_tokens_avg": output_tokens,
+        "pinned_share": pinned_share(summary.get("results", []), max_tokens),
+        "decode_tokens_sec": decode,
+        "itl_avg": summary.get("itl_avg"),
+        "ttft_p50": summary.get("ttft_p50"),
+        "latency_avg": summary["latency_avg"],
+        "latency_p50": summary["latency_p50"],
+        "latency_p99": summary["latency_p99"],
+        "throughput": summary["throughput"],
+        "output_tokens_sec": summary["throughput"] * output_tokens if output_tokens else None,
+        "error_count": summary["error_count"]
+    }
+
+
+def fit_latency(points):
+    # Least-squares line through (output tokens, average latency):
+    # {"overhead": seconds, "per_token": seconds per token}, or None with
+    # fewer than two distinct output lengths
+    pairs = [(point["output_tokens_avg"], point["latency_avg"]) for point in points
+             if point["output_tokens_avg"]]
+    if len(pairs) < 2:
+        return None
+    mean_x = sum(x for x, _ in pairs) / len(pairs)
+    mean_y = sum(y for _, y in pairs) / len(pairs)
+    spread = sum((x - mean_x) ** 2 for x, _ in pairs)
+    if spread <= 0:
+        return None
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in pairs) / spread
+    return {"overhead": mean_y - slope * mean_x, "per_token": slope}
+
+
+class OutputLengthSweep(SweepRunner):
+    # The model stays loaded across lengths, so only the first warms up
+    mode = "output_length_sweep"
+
+    def __init__(self, engine_type, api_config, model_name, task_count, lengths=None, **kwargs):
+        super().__init__(engine_type, api_config, model_name, task_count, **kwargs)
+        self.lengths = lengths or DEFAULT_OUTPUT_LENGTHS
+
+    def steps(self):
+        return [{"label": f"{max_tokens} tokens", "options": {"max_tokens": max_tokens}, "max_tokens": max_tokens}
+                for max_tokens in self.lengths]
+
+    def point(self, index, step, summary):
+        return output_point(step["max_tokens"], summary)
+
+    def report_fields(self, points):
+        return {
+            "lengths": self.lengths,
+            "pinned_threshold": PINNED_SHARE,
+            "latency_fit": fit_latency(points)
+        }
@@ -0,0 +1,169 @@
+import time
+import socket
+import weakref
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Shared keep-alive HTTP sessions for the thread engine. The pool is sized to
+# the concurrency level so every worker thread keeps its own connection open,
+# and every new TCP/TLS connection is counted so the report can tell server
+# latency apart from handshake overhead.
+
+# Set by the connection pool when the current thread's request had to open a
+# new connection, and by the connection once the request has been written
+_local = threading.local()
+
+
+class ConnectionStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Connections currently lent out to a request, so a cancelled run can
+        # cut them off mid-request. Weak, because failed requests drop their
+        # connection without handing it back.
+        self.active = weakref.WeakSet()
+        self.aborted = False
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.opened = 0
+            self.prewarmed = 0
+
+    def connection_opened(self):
+        with self.lock:
+            self.opened += 1
+
+    def request_sent(self):
+        with self.lock:
+            self.requests += 1
+
+    def checked_out(self, connection):
+        with self.lock:
+            if self.aborted:
+                raise ConnectionAbortedError("Run cancelled")
+            self.active.add(connection)
+
+    def checked_in(self, connection):
+        with self.lock:
+            self.active.discard(connection)
+
+    def abort(self):
+        # Shut down every in-flight connection: requests blocked on them fail
+        # at once and the server sees the client go away, so it can stop
+        # generating. No new connections are lent out afterwards.
+        with self.lock:
+            self.aborted = True
+            connections = list(self.active)
+        for connection in connections:
+            sock = getattr(connection, "sock", None)
+            if sock is None:
+                continue
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def snapshot(self):
+        with self.lock:
+            # Pre-opened connections are counted as reused on first use
+            reused = max(self.requests - (self.opened - self.prewarmed), 0)
+            return {
+                "requests": self.requests,
+                "connections_opened": self.opened,
+                "connections_prewarmed": self.prewarmed,
+                "reuse_rate": reused / self.requests if self.requests else 0
+            }
+
+
+def _counting_pool_class(base, stats):
+    class TimedConnection(base.ConnectionCls):
+        def request(self, *args, **kwargs):
+            super().request(*args, **kwargs)
+            _local.sent_time = time.perf_counter()
+
+    class CountingConnectionPool(base):
+        ConnectionCls = TimedConnection
+
+        def _new_conn(self):
+            stats.connection_opened()
+            _local.new_connection = True
+            return super()._new_conn()
+
+        def _get_conn(self, timeout=None):
+            connection = super()._get_conn(timeout)
+            try:
+                stats.checked_out(connection)
+            except ConnectionAbortedError:
+                # urllib3 returns an empty slot to the pool in its place
+                connection.close()
+                raise
+            return connection
+
+        def _put_conn(self, connection):
+            if connection is not None:
+                stats.checked_in(connection)
+            super()._put_conn(connection)
+
+    return CountingConnectionPool
+
+
+def create_session(concurrency, stats, host_count=1):
+    # One adapter for both schemes; pool_maxsize keeps one idle connection per
+    # worker so none is thrown away when it is returned to the pool, and
+    # pool_connections keeps one pool per host of a fleet
+    adapter = HTTPAdapter(pool_connections=max(10, host_count), pool_maxsize=concurrency)
+    adapter.poolmanager.pool_classes_by_scheme = {
+        "http": _counting_pool_class(HTTPConnectionPool, stats),
+        "https": _counting_pool_class(HTTPSConnectionPool, stats)
+    }
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def prewarm_session(session, url, count, stats):
+    # Open `count` connections to the host of `url` and park them in the pool,
+    # so the timed phase does not pay for TCP/TLS handshakes. Expects the
+    # stats to have been reset just before.
+    adapter = session.get_adapter(url)
+    if hasattr(adapter, "get_connection_with_tls_context"):
+        # requests >= 2.32 keys pools by TLS settings, so look the pool up the
+        # same way a real request would
+        request = requests.Request("GET", url).prepare()
+        settings = session.merge_environment_settings(url, {}, None, None, None)
+        pool = adapter.get_connection_with_tls_context(request, settings["verify"], settings["proxies"], settings["cert"])
+    else:
+        pool = adapter.get_connection(url)
+    connections = []
+    try:
+        for _ in range(count):
+            connection = pool._get_conn()
+            if connection.sock is None:
+                connection.connect()
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            pool._put_conn(connection)
+    # Connections left over from the warm-up are reused, not opened
+    with stats.lock:
+        stats.prewarmed = stats.opened
+    return len(connections)
+
+
+def start_request():
+    _local.new_connection = False
+    _local.sent_time = None
+
+
+def opened_new_connection():
+    return getattr(_local, "new_connection", False)
+
+
+def request_sent_time():
+    # perf_counter() when the current thread's request was fully written
+    return getattr(_local, "sent_time", None)
@@ -0,0 +1,496 @@
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import collections
+
+# Stand-in LLM server for testing the harness without a model. Speaks enough
+# of the Ollama, OpenAI and Anthropic APIs for the benchmark engines:
+#
+#   GET  /api/tags              Ollama model list
+#   GET  /api/ps                Ollama loaded models (see --load-time)
+#   POST /api/show              Ollama model details (context length only)
+#   POST /api/generate          Ollama, streaming (NDJSON) and non-streaming
+#   POST /v1/chat/completions   OpenAI / Mistral, streaming (SSE) and non-streaming
+#   POST /v1/messages           Anthropic, streaming (SSE) and non-streaming
+#
+# Every request waits for a time-to-first-token drawn from the configured
+# latency distribution, then "decodes" its output tokens at a fixed rate. A
+# concurrency limit queues requests like OLLAMA_NUM_PARALLEL does, and a
+# share of requests can fail. With --latency 0 --tokens-per-sec 0 it answers
+# instantly, which measures the highest request rate the harness can drive.
+#
+# With --prefill-tokens-per-sec, prompt tokens add to the time to first
+# token, and --prompt-cache N keeps the last N prompts like a server's
+# per-slot KV cache: a prompt only pays for the tokens after its longest
+# common prefix with one of them, and prompt_eval_count only counts those,
+# as Ollama does.
+#
+# With --load-time, the first request for a model waits for it to load and
+# reports the wait as load_duration; a request with keep_alive 0 and no
+# prompt unloads it again, so cold starts can be repeated.
+#
+# The server is a single asyncio event loop speaking HTTP/1.1 with
+# keep-alive, using only the standard library, so it can hold thousands of
+# open connections without becoming the bottleneck itself.
+#
+#   python mock_server.py --port 11434 --latency 0.2 --tokens-per-sec 40
+#   python mock_server.py --latency-dist lognormal --error-rate 0.01 --max-concurrency 4
+
+LATENCY_DISTRIBUTIONS = ["fixed", "uniform", "exponential", "lognormal"]
+
+WORDS = ("the quick brown fox jumps over a lazy dog while the model keeps "
+         "generating plausible looking text for the benchmark ").split()
+
+DISCONNECT_POLL = 0.05  # Seconds between checks for a client that hung up mid-request
+
+STATUS_TEXT = {200: "OK", 404: "Not Found", 405: "Method Not Allowed", 400: "Bad Request",
+               411: "Length Required", 500: "Internal Server Error"}
+
+
+def sample_latency(distribution, mean, jitter=0.5):
+    # Time to first token in seconds; jitter is the relative spread for the
+    # uniform and lognormal distributions
+    if mean <= 0:
+        return 0.0
+    if distribution == "uniform":
+        return random.uniform(mean * (1 - jitter), mean * (1 + jitter))
+    if distribution == "exponential":
+        return random.expovariate(1 / mean)
+    if distribution == "lognormal":
+        # Parameters chosen so the distribution's mean is `mean`
+        sigma = jitter
+        return random.lognormvariate(math.log(mean) - sigma ** 2 / 2, sigma)
+    return mean
+
+
+def count_tokens(text):
+    # Rough whitespace token count; good enough for realistic-looking usage fields
+    return max(len(text.split()), 1)
+
+
+def prompt_text(path, request):
+    if path == "/api/generate":
+        return request.get("prompt", "")
+    messages = request.get("messages", [])
+    return " ".join(str(message.get("content", "")) for message in messages)
+
+
+def requested_tokens(path, request, default):
+    # Honour num_predict / max_tokens when they ask for fewer tokens
+    if path == "/api/generate":
+        limit = request.get("options", {}).get("num_predict")
+    else:
+        limit = request.get("max_tokens")
+    if isinstance(limit, int) and limit > 0:
+        return min(limit, default)
+    return default
+
+
+class MockServer:
+    def __init__(self, host="127.0.0.1", port=11434, latency=0.1, latency_dist="fixed", jitter=0.5,
+                 tokens_per_sec=50.0, output_tokens=64, error_rate=0.0, max_concurrency=0,
+                 models=("mock",), load_time=0.0, prefill_tokens_per_sec=0.0, prompt_cache=0,
+                 context_length=8192, quiet=False):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.latency_dist = latency_dist
+        self.jitter = jitter
+        self.tokens_per_sec = tokens_per_sec
+        self.output_tokens = output_tokens
+        self.error_rate = error_rate
+        self.max_concurrency = max_concurrency
+        self.models = list(models)
+        self.load_time = load_time  # Paid by the first request for each model
+        self.loaded = set()
+        self.load_lock = None
+        self.prefill_tokens_per_sec = prefill_tokens_per_sec
+        self.prompt_cache = collections.deque(maxlen=prompt_cache) if prompt_cache > 0 else None
+        self.cached_tokens = 0  # Prompt tokens served from the cache
+        self.context_length = context_length  # Reported by /api/show
+        self.quiet = quiet
+        self.slots = None
+        self.requests = 0
+        self.errors = 0
+        self.abandoned = 0  # Requests whose client hung up before the response was done
+        self.active = 0
+        self.peak_active = 0
+
+    # --- HTTP plumbing ---
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, version = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                if headers.get("transfer-encoding", "").lower() == "chunked":
+                    await self.send_json(writer, 411, {"error": "chunked request bodies are not supported"})
+                    break
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                if not await self.until_disconnect(reader, self.dispatch(writer, method, path.split("?", 1)[0], body)):
+                    break
+                if headers.get("connection", "").lower() == "close" or version.strip() == "HTTP/1.0":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def until_disconnect(self, reader, request):
+        # Runs one request, but like a real server stops generating once the
+        # client hangs up (a cancelled benchmark). Clients do not pipeline, so
+        # EOF while the request runs means they went away.
+        task = asyncio.ensure_future(request)
+        while not task.done():
+            await asyncio.wait({task}, timeout=DISCONNECT_POLL)
+            if reader.at_eof() and not task.done():
+                task.cancel()
+                self.abandoned += 1
+                return False
+        task.result()
+        return True
+
+    def start_response(self, writer, status, content_type, length=None):
+        head = [f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}",
+                f"Content-Type: {content_type}"]
+        head.append(f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+    async def send_json(self, writer, status, data):
+        body = json.dumps(data).encode()
+        self.start_response(writer, status, "application/json", len(body))
+        writer.write(body)
+        await writer.drain()
+
+    async def send_chunk(self, writer, text):
+        data = text.encode()
+        writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+        await writer.drain()
+
+    async def end_chunks(self, writer):
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def dispatch(self, writer, method, path, body):
+        if method == "GET":
+            if path == "/api/tags":
+                await self.send_json(writer, 200, {"models": [{"name": name, "model": name} for name in self.models]})
+            elif path == "/api/ps":
+                await self.send_json(writer, 200, {"models": [{"name": name, "model": name} for name in self.loaded]})
+            elif path == "/v1/models":
+                await self.send_json(writer, 200, {"object": "list",
+                                                   "data": [{"id": name, "object": "model"} for name in self.models]})
+            else:
+                # GET / is what Ollama answers with "Ollama is running"
+                await self.send_json(writer, 200, {"status": "mock server is running"})
+            return
+
+        if method != "POST":
+            await self.send_json(writer, 405, {"error": f"{method} not allowed"})
+            return
+        if path == "/api/show":
+            await self.send_json(writer, 200, {"model_info": {"general.architecture": "mock",
+                                                              "mock.context_length": self.context_length}})
+            return
+        if path not in ("/api/generate", "/v1/chat/completions", "/v1/messages"):
+            await self.send_json(writer, 404, {"error": f"unknown path {path}"})
+            return
+        try:
+            request = json.loads(body or b"{}")
+        except ValueError:
+            await self.send_json(writer, 400, {"error": "invalid JSON body"})
+            return
+
+        # Ollama unloads a model on a request with keep_alive 0 and no prompt
+        if path == "/api/generate" and not request.get("prompt") and request.get("keep_alive") in (0, "0", "0s"):
+            model = request.get("model", self.models[0])
+            self.loaded.discard(model)
+            await self.send_json(writer, 200, {"model": model, "response": "", "done": True,
+                                               "done_reason": "unload"})
+            return
+
+        self.requests += 1
+        if self.slots:
+            async with self.slots:
+                await self.generate(writer, path, request)
+        else:
+            await self.generate(writer, path, request)
+
+    # --- Generation ---
+
+    async def generate(self, writer, path, request):
+        self.active += 1
+        self.peak_active = max(self.peak_active, self.active)
+        try:
+            model = request.get("model", self.models[0])
+            started = time.perf_counter()
+            load = await self.load_model(model)
+            prefill_start = time.perf_counter()
+            prompt_tokens = self.evaluated_tokens(prompt_text(path, request))
+            ttft = sample_latency(self.latency_dist, self.latency, self.jitter)
+            if self.prefill_tokens_per_sec > 0:
+                ttft += prompt_tokens / self.prefill_tokens_per_sec
+            if ttft:
+                await asyncio.sleep(ttft)
+
+            if random.random() < self.error_rate:
+                self.errors += 1
+                await self.send_error(writer, path)
+                return
+
+            tokens = requested_tokens(path, request, self.output_tokens)
+            job = {
+                "model": model,
+                "started": started,
+                "load": load,
+                "prefill": time.perf_counter() - prefill_start,
+                "prompt_tokens": prompt_tokens,
+                "tokens": tokens,
+                "include_usage": request.get("stream_options", {}).get("include_usage", False)
+            }
+            if request.get("stream"):
+                await self.stream_response(writer, path, job)
+            else:
+                await self.decode(tokens)
+                job["decode"] = time.perf_counter() - prefill_start - job["prefill"]
+                await self.send_json(writer, 200, self.final_body(path, job, self.text(tokens)))
+        finally:
+            self.active -= 1
+
+    def evaluated_tokens(self, prompt):
+        # Prompt tokens that need evaluating, after the longest prefix shared
+        # with a cached prompt
+        if self.prompt_cache is None:
+            return count_tokens(prompt)
+        tokens = prompt.split() or [""]
+        cached = 0
+        for previous in self.prompt_cache:
+            common = 0
+            for mine, theirs in zip(tokens, previous):
+                if mine != theirs:
+                    break
+                common += 1
+            cached = max(cached, common)
+        # The last token is always evaluated, even for a repeated prompt
+        cached = min(cached, len(tokens) - 1)
+        self.prompt_cache.append(tokens)
+        self.cached_tokens += cached
+        return len(tokens) - cached
+
+    async def load_model(self, model):
+        # The first request for a model waits for it to load, like a cold
+        # Ollama; requests arriving meanwhile wait for the same load
+        if model in self.loaded or self.load_time <= 0:
+            return 0.0
+        started = time.perf_counter()
+        async with self.load_lock:
+            if model not in self.loaded:
+                await asyncio.sleep(self.load_time)
+                self.loaded.add(model)
+        return time.perf_counter() - started
+
+    async def decode(self, tokens):
+        if self.tokens_per_sec > 0:
+            await asyncio.sleep(tokens / self.tokens_per_sec)
+
+    def text(self, tokens):
+        return " ".join(WORDS[i % len(WORDS)] for i in range(tokens))
+
+    async def send_error(self, writer, path):
+        message = "mock server: injected failure"
+        if path == "/api/generate":
+            body = {"error": message}
+        elif path == "/v1/messages":
+            body = {"type": "error", "error": {"type": "api_error", "message": message}}
+        else:
+            body = {"error": {"message": message, "type": "server_error"}}
+        await self.send_json(writer, 500, body)
+
+    def final_body(self, path, job, text):
+        # Non-streaming response bodies with the counters each API reports
+        if path == "/api/generate":
+            body = {"model": job["model"], "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                    "response": text, "done": True, "done_reason": "stop"}
+            body.update(self.ollama_counters(job))
+            return body
+        if path == "/v1/messages":
+            return {"id": "msg_mock", "type": "message", "role": "assistant", "model": job["model"],
+                    "content": [{"type": "text", "text": text}], "stop_reason": "end_turn",
+                    "usage": {"input_tokens": job["prompt_tokens"], "output_tokens": job["tokens"]}}
+        return {"id": "chatcmpl-mock", "object": "chat.completion", "created": int(time.time()),
+                "model": job["model"],
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": text},
+                             "finish_reason": "stop"}],
+                "usage": self.openai_usage(job)}
+
+    def ollama_counters(self, job):
+        # Durations in nanoseconds, split the way Ollama reports them
+        ns = 1e9
+        return {
+            "total_duration": int((job["load"] + job["prefill"] + job["decode"]) * ns),
+            "load_duration": int(job["load"] * ns),
+            "prompt_eval_count": job["prompt_tokens"],
+            "prompt_eval_duration": int(job["prefill"] * ns),
+            "eval_count": job["tokens"],
+            "eval_duration": int(job["decode"] * ns)
+        }
+
+    def openai_usage(self, job):
+        return {"prompt_tokens": job["prompt_tokens"], "completion_tokens": job["tokens"],
+                "total_tokens": job["prompt_tokens"] + job["tokens"]}
+
+    async def stream_response(self, writer, path, job):
+        if path == "/api/generate":
+            self.start_response(writer, 200, "application/x-ndjson")
+        else:
+            self.start_response(writer, 200, "text/event-stream")
+
+        def sse(data, event=None):
+            prefix = f"event: {event}\n" if event else ""
+            return f"{prefix}data: {json.dumps(data)}\n\n"
+
+        if path == "/v1/messages":
+            await self.send_chunk(writer, sse({"type": "message_start", "message": {
+                "id": "msg_mock", "type": "message", "role": "assistant", "model": job["model"], "content": [],
+                "usage": {"input_tokens": job["prompt_tokens"], "output_tokens": 1}}}, "message_start"))
+            await self.send_chunk(writer, sse({"type": "content_block_start", "index": 0,
+                                               "content_block": {"type": "text", "text": ""}}, "content_block_start"))
+
+        delay = 1 / self.tokens_per_sec if self.tokens_per_sec > 0 else 0
+        for i in range(job["tokens"]):
+            if i and delay:
+                await asyncio.sleep(delay)
+            word = WORDS[i % len(WORDS)] + " "
+            if path == "/api/generate":
+                chunk = json.dumps({"model": job["model"], "response": word, "done": False}) + "\n"
+            elif path == "/v1/messages":
+                chunk = sse({"type": "content_block_delta", "index": 0,
+                             "delta": {"type": "text_delta", "text": word}}, "content_block_delta")
+            else:
+                chunk = sse({"id": "chatcmpl-mock", "object": "chat.completion.chunk", "model": job["model"],
+                             "choices": [{"index": 0, "delta": {"content": word}, "finish_reason": None}]})
+            await self.send_chunk(writer, chunk)
+
+        job["decode"] = time.perf_counter() - job["started"] - job["load"] - job["prefill"]
+        if path == "/api/generate":
+            final = {"model": job["model"], "response": "", "done": True, "done_reason": "stop"}
+            final.update(self.ollama_counters(job))
+            await self.send_chunk(writer, json.dumps(final) + "\n")
+        elif path == "/v1/messages":
+            await self.send_chunk(writer, sse({"type": "content_block_stop", "index": 0}, "content_block_stop"))
+            await self.send_chunk(writer, sse({"type": "message_delta", "delta": {"stop_reason": "end_turn"},
+                                               "usage": {"output_tokens": job["tokens"]}}, "message_delta"))
+            await self.send_chunk(writer, sse({"type": "message_stop"}, "message_stop"))
+        else:
+            await self.send_chunk(writer, sse({"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                                               "model": job["model"],
+                                               "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}))
+            # Only sent when asked for, like the real API
+            if job["include_usage"]:
+                await self.send_chunk(writer, sse({"id": "chatcmpl-mock", "object": "chat.completion.chunk",
+                                                   "model": job["model"], "choices": [],
+                                                   "usage": self.openai_usage(job)}))
+            await self.send_chunk(writer, "data: [DONE]\n\n")
+        await self.end_chunks(writer)
+
+    # --- Lifecycle ---
+
+    async def report_loop(self, interval=5.0):
+        # Requests/s over the last interval, printed only while there is traffic
+        last = self.requests
+        while True:
+            await asyncio.sleep(interval)
+            served = self.requests - last
+            last = self.requests
+            if served:
+                print(f"{served / interval:.1f} req/s, {self.active} active (peak {self.peak_active}), "
+                      f"{self.requests} total, {self.errors} injected errors, {self.abandoned} abandoned",
+                      file=sys.stderr)
+
+    async def serve(self):
+        self.slots = asyncio.Semaphore(self.max_concurrency) if self.max_concurrency > 0 else None
+        self.load_lock = asyncio.Lock()
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port, backlog=4096)
+        if not self.quiet:
+            print(f"Mock LLM server listening on http://{self.host}:{self.port} "
+                  f"(models: {', '.join(self.models)})", file=sys.stderr)
+            asyncio.get_running_loop().create_task(self.report_loop())
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        try:
+            asyncio.run(self.serve())
+        except KeyboardInterrupt:
+            pass
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Mock Ollama / OpenAI / Anthropic server for offline benchmarking")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=11434, help="Port to listen on (default: 11434, Ollama's)")
+    parser.add_argument("--latency", type=float, default=0.1,
+                        help="Mean time to first token in seconds, 0 for none (default: 0.1)")
+    parser.add_argument("--latency-dist", choices=LATENCY_DISTRIBUTIONS, default="fixed",
+                        help="Distribution of the time to first token (default: fixed)")
+    parser.add_argument("--jitter", type=float, default=0.5,
+                        help="Relative spread for uniform/lognormal latency (default: 0.5)")
+    parser.add_argument("--tokens-per-sec", type=float, default=50.0,
+                        help="Decode speed per request, 0 for instant (default: 50)")
+    parser.add_argument("--output-tokens", type=int, default=64,
+                        help="Tokens per response unless the request asks for fewer (default: 64)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of requests answered with HTTP 500 (default: 0)")
+    parser.add_argument("--max-concurrency", type=int, default=0,
+                        help="Requests generated at once; the rest queue. 0 for no limit (default: 0)")
+    parser.add_argument("--load-time", type=float, default=0.0,
+                        help="Seconds the first request for each model waits for it to load (default: 0)")
+    parser.add_argument("--prefill-tokens-per-sec", type=float, default=0.0,
+                        help="Prompt evaluation speed; prompt tokens add to the time to first token. "
+                             "0 for free prefill (default: 0)")
+    parser.add_argument("--prompt-cache", type=int, default=0,
+                        help="Cache the prefixes of this many recent prompts, like a KV cache per slot. "
+                             "0 to disable (default: 0)")
+    parser.add_argument("--context-length", type=int, default=8192,
+                        help="Context length /api/show reports for every model (default: 8192)")
+    parser.add_argument("--models", default="mock", help="Comma-separated model names for /api/tags (default: mock)")
+    parser.add_argument("--quiet", action="store_true", help="Do not print request rates")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    MockServer(args.host, args.port,
+               latency=args.latency,
+               latency_dist=args.latency_dist,
+               jitter=args.jitter,
+               tokens_per_sec=args.tokens_per_sec,
+               output_tokens=args.output_tokens,
+               error_rate=args.error_rate,
+               max_concurrency=args.max_concurrency,
+               models=[name.strip() for name in args.models.split(",") if name.strip()],
+               load_time=args.load_time,
+               prefill_tokens_per_sec=args.prefill_tokens_per_sec,
+               prompt_cache=args.prompt_cache,
+               context_length=args.context_length,
+               quiet=args.quiet).run()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+import os
+import time
+import queue
+import threading
+import multiprocessing
+from benchmark_engine import BenchmarkEngine, KEEP_RESULTS, create_engine, summarize
+from stats import ResultStats, Timeline, LiveStats
+from result_log import ResultLog
+
+# Multi-process load generation. One Python process tops out at a few hundred
+# requests per second because JSON handling and bookkeeping share the GIL
+# (with the Qt event loop too, in the GUIs). This engine runs N copies of the
+# thread or asyncio engine in separate processes, each with its own share of
+# the tasks, concurrency and arrival rate, and merges their histograms and
+# counters into one summary.
+
+PROGRESS_INTERVAL = 0.2  # Seconds between progress messages from each process
+CANCEL_POLL_INTERVAL = 0.1  # Seconds
+JOIN_TIMEOUT = 5  # Seconds to wait for a process to exit before killing it
+
+
+def split_evenly(total, parts):
+    # 10 over 3 -> [4, 3, 3]
+    return [total // parts + (1 if i < total % parts else 0) for i in range(parts)]
+
+
+def process_log_name(filename, index):
+    # run.jsonl -> run.p0.jsonl: each process logs its own tasks, so no two
+    # processes write to the same file
+    root, ext = os.path.splitext(filename)
+    return f"{root}.p{index}{ext or '.jsonl'}"
+
+
+def merge_connections(snapshots):
+    requests = sum(snapshot["requests"] for snapshot in snapshots)
+    reused = sum(snapshot["reuse_rate"] * snapshot["requests"] for snapshot in snapshots)
+    return {
+        "requests": requests,
+        "connections_opened": sum(snapshot["connections_opened"] for snapshot in snapshots),
+        "connections_prewarmed": sum(snapshot["connections_prewarmed"] for snapshot in snapshots),
+        "reuse_rate": reused / requests if requests else 0
+    }
+
+
+def _watch_cancel(cancel_event, engine, barrier):
+    # Polled rather than waited on: a process that exits while blocked in
+    # Event.wait() leaves a sleeper behind, and the parent's Event.set() then
+    # blocks forever waiting for it to wake up
+    while not cancel_event.is_set():
+        time.sleep(CANCEL_POLL_INTERVAL)
+    engine.cancel()
+    # Release processes still waiting for the timed phase to start
+    barrier.abort()
+
+
+def _run_process(index, processes, engine_type, args, options, arrival_phase, messages, cancel_event, barrier):
+    # Entry point of each load generator process. Everything sent back is
+    # pickled: progress tuples, then the raw aggregates of the run.
+    engine = None
+    last_report = 0.0
+    live_sent = 0  # Seconds of live chart data already sent
+
+    def report(value, message):
+        nonlocal last_report, live_sent
+        stats = getattr(engine, "result_stats", None)
+        if stats is None:
+            # Warm-up and setup messages are rare; pass them all on
+            messages.put(("progress", index, (value, message, None, [])))
+            return
+        now = time.monotonic()
+        if now - last_report >= PROGRESS_INTERVAL or value >= 100:
+            last_report = now
+            # Closed seconds are never touched again, so they can be
+            # pickled after this returns
+            live = engine.live.closed(live_sent, time.perf_counter() - engine.run_start)
+            if live:
+                live_sent = live[-1]["second"] + 1
+            messages.put(("progress", index, (value, message, stats.completed, live)))
+
+    try:
+        engine = create_engine(engine_type, *args, progress_callback=report, **options)
+        engine.start_barrier = barrier
+        engine.arrival_phase = arrival_phase
+        engine.prompt_share = (index, processes)
+        threading.Thread(target=_watch_cancel, args=(cancel_event, engine, barrier), daemon=True).start()
+        summary = engine.run()
+    except Exception as e:
+        barrier.abort()
+        messages.put(("error", index, str(e)))
+        return
+
+    if summary is None:
+        messages.put(("cancelled", index, None))
+        return
+    messages.put(("done", index, {
+        "total_time": summary["total_time"],
+        "result_stats": engine.result_stats,
+        "endpoint_stats": engine.endpoint_stats,
+        "timeline": engine.timeline,
+        "connections": summary["connections"],
+        "results": list(zip(engine.collected_at, engine.results))
+    }))
+
+
+class MultiProcessEngine(BenchmarkEngine):
+    def __init__(self, engine_type, processes, api_config, model_name, task_count, **kwargs):
+        super().__init__(api_config, model_name, task_count, **kwargs)
+        self.engine_type = engine_type
+        # Every process needs at least one worker and one task
+        self.processes = max(min(processes, self.concurrency, self.task_count or processes), 1)
+        self.cancel_event = None
+
+    def run_config(self):
+        config = super().run_config()
+        config["processes"] = self.processes
+        return config
+
+    def process_options(self, index):
+        # Each process gets an even share of the workload. Least-outstanding
+        # balancing only sees the requests of its own process.
+        # Prompts are drawn from one seeded sequence, every process taking
+        # every Nth prompt of it (see select_prompts).
+        options = {
+            "concurrency": split_evenly(self.concurrency, self.processes)[index],
+            "stream": self.stream,
+            # The model only needs loading once; the other processes wait for
+            # the first at the start barrier
+            "warmup_runs": self.warmup_runs if index == 0 else 0,
+            "prewarm": self.prewarm,
+            "arrival_rate": self.arrival_rate / self.processes if self.arrival_rate else None,
+            "arrival_process": self.arrival_process,
+            "duration": self.duration,
+            "result_log": process_log_name(self.result_log, index) if self.result_log else None,
+            "balancer": self.balancer.strategy,
+            "prompt_file": self.prompt_file,
+            "prompt_bucket": self.prompt_bucket,
+            "seed": self.seed,
+            "prefix_tokens": self.prefix_tokens,
+            "prefix_reuse": self.prefix_reuse,
+            "prompt_tokens": self.prompt_tokens,
+            "num_ctx": self.num_ctx,
+            "max_tokens": self.max_tokens
+        }
+        task_count = split_evenly(self.task_count, self.processes)[index] if self.task_count else None
+        args = (self.api_config, self.model_name, task_count)
+        # Interleave constant arrivals: process i fires i/rate after process 0
+        phase = index / self.arrival_rate if self.arrival_rate else 0.0
+        return args, options, phase
+
+    def run(self):
+        # spawn rather than fork: the GUIs run this from a QThread, and forking
+        # a threaded Qt process is not safe
+        context = multiprocessing.get_context("spawn")
+        messages = context.Queue()
+        self.cancel_event = context.Event()
+        if self.cancelled:
+            return None
+        # Fed with the closed seconds each process sends with its progress
+        self.live = LiveStats()
+        self.started = time.time()
+        barrier = context.Barrier(self.processes)
+        workers = []
+        for index in range(self.processes):
+            args, options, phase = self.process_options(index)
+            workers.append(context.Process(target=_run_process, daemon=True,
+                                           args=(index, self.processes, self.engine_type, args, options, phase,
+                                                 messages, self.cancel_event, barrier)))
+
+        self.report(0, f"Starting {self.processes} load generator processes...")
+        if self.result_log:
+            # The main log only holds the merged summary; tasks are in the
+            # per-process logs
+            self.log = ResultLog(self.result_log, self.run_config(), self.started)
+        try:
+            for worker in workers:
+                worker.start()
+            parts = self.gather(messages, workers)
+            if parts is None:
+                return None
+            return self.merge(parts)
+        finally:
+            self.cancel_event.set()
+            for worker in workers:
+                if worker.pid is not None:
+                    worker.join(JOIN_TIMEOUT)
+                    if worker.is_alive():
+                        worker.terminate()
+            self.close_log()
+            self.session.close()
+
+    def gather(self, messages, workers):
+        # Relays progress until every process has reported its results.
+        # Returns the results in process order; after a cancel only those of
+        # processes that got to the timed phase, or None if none did.
+        parts = {}
+        progress = {}
+        while len(parts) < self.processes:
+            try:
+                kind, index, payload = messages.get(timeout=0.5)
+            except queue.Empty:
+                for index, worker in enumerate(workers):
+                    if index not in parts and worker.exitcode not in (None, 0):
+                        raise Exception(f"Load generator process {index} exited with code {worker.exitcode}")
+                continue
+
+            if kind == "progress":
+                progress[index] = payload[:3]
+                self.live.merge(payload[3])
+                self.report_progress(index, progress)
+            elif kind == "error":
+                if self.cancelled:
+                    parts[index] = None
+                    continue
+                self.cancel_event.set()
+                raise Exception(f"Load generator process {index}: {payload}")
+            elif kind == "cancelled":
+                parts[index] = None
+            else:
+                parts[index] = payload
+
+        parts = [parts[index] for index in range(self.processes) if parts[index] is not None]
+        return parts or None
+
+    def report_progress(self, index, progress):
+        value, message, completed = progress[index]
+        if completed is None:
+            # Before the timed phase, the first process speaks for all
+            if index == 0:
+                self.report(value, message)
+            return
+        timed = [entry for entry in progress.values() if entry[2] is not None]
+        total = sum(entry[2] for entry in timed)
+        value = sum(entry[0] for entry in timed) // self.processes
+        if self.task_count and not self.duration:
+            self.report(value, f"Completed {total}/{self.task_count} tasks ({self.processes} processes)")
+        else:
+            self.report(value, f"Completed {total} tasks ({self.processes} processes)")
+
+    def merge(self, parts):
+        # Histograms and counters add up exactly; the processes started their
+        # timed phase together, so the run took as long as the slowest one.
+        # Kept results are interleaved by collection time, so they stay in
+        # completion order and the cap keeps the run's latest, not the last
+        # process's.
+        result_stats = ResultStats()
+        timeline = Timeline()
+        endpoint_stats = {}
+        timed_results = []
+        for part in parts:
+            result_stats.merge(part["result_stats"])
+            timeline.merge(part["timeline"])
+            for endpoint, stats in part["endpoint_stats"].items():
+                if endpoint in endpoint_stats:
+                    endpoint_stats[endpoint].merge(stats)
+                else:
+                    endpoint_stats[endpoint] = stats
+            timed_results.extend(part["results"])
+        timed_results.sort(key=lambda entry: entry[0])
+        results = [result for _, result in timed_results[-KEEP_RESULTS:]]
+
+        total_time = max(part["total_time"] for part in parts)
+        summary = summarize(self.run_config(), total_time, result_stats, results,
+                            merge_connections([part["connections"] for part in parts]), timeline, endpoint_stats)
+        summary["started"] = self.started
+        if self.cancelled:
+            summary["cancelled"] = True
+        if self.log:
+            self.log.close(summary)
+        return summary
+
+    def cancel(self):
+        self.cancelled = True
+        if self.cancel_event is not None:
+            self.cancel_event.set()
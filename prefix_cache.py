@@ -0,0 +1,105 @@
+import random
+from corpus import CHARS_PER_TOKEN
+from sweep import SweepRunner
+
+# Shared-prefix workloads. Production prompts often start with the same long
+# system prompt or few-shot examples, and servers that cache the KV state of
+# a prompt prefix (Ollama keeps it per slot) skip most of the prefill for
+# them. Each prompt here is a prefix of a fixed length followed by one of the
+# usual prompts; a share of the requests (the reuse ratio) get the same
+# shared prefix, the rest a unique one of the same length, so prompt length
+# stays constant and only cacheability changes.
+#
+# The comparison runs each prefix length twice, with fully unique prefixes
+# and with the shared one, and reports how prefill time and TTFT change.
+
+DEFAULT_PREFIX_LENGTHS = [256, 1024, 4096]
+
+PREFIX_WORDS = ("you are a helpful assistant answer the user clearly and concisely using the context "
+                "below when it is relevant cite the section you relied on and say so when the context "
+                "does not contain the answer policy example question response summary details").split()
+
+
+def prefix_text(tokens, rng):
+    # About `tokens` tokens of system-prompt-like text, estimated the same
+    # way as corpus length buckets
+    words = []
+    length = 0
+    while length < tokens * CHARS_PER_TOKEN:
+        word = rng.choice(PREFIX_WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)
+
+
+def shared_prefix(tokens):
+    # The same text for a given length in every run and process
+    return prefix_text(tokens, random.Random(tokens))
+
+
+def prefixed_prompts(prompts, rng, tokens, reuse):
+    # Unique prefixes start with a random tag so not even their first tokens
+    # match the shared prefix or each other
+    shared = shared_prefix(tokens)
+    for prompt in prompts:
+        if rng.random() < reuse:
+            prefix = shared
+        else:
+            prefix = f"[{rng.getrandbits(64):016x}] {prefix_text(tokens, rng)}"
+        yield f"{prefix}\n\n{prompt}"
+
+
+def comparison_metrics(summary):
+    # Prefill comes from Ollama's prompt_eval_duration; other providers only
+    # show the cache through TTFT on streaming runs
+    timing = summary.get("server_timing", {})
+    prefill = timing.get("prompt_eval_duration", {})
+    return {
+        "prefill_avg": prefill.get("avg"),
+        "prefill_p50": prefill.get("p50"),
+        "prompt_eval_count_avg": timing.get("prompt_eval_count", {}).get("avg"),
+        "ttft_avg": summary.get("ttft_avg"),
+        "ttft_p50": summary.get("ttft_p50"),
+        "latency_p50": summary["latency_p50"],
+        "throughput": summary["throughput"]
+    }
+
+
+def saving(unique, shared):
+    # Share of the unique-prefix time the cache saved; None when not measured
+    if not unique or shared is None:
+        return None
+    return 1 - shared / unique
+
+
+class PrefixCacheComparison(SweepRunner):
+    # Each prefix length runs with unique prefixes, then with the shared one
+    mode = "prefix_cache"
+
+    def __init__(self, engine_type, api_config, model_name, task_count, prefix_lengths=DEFAULT_PREFIX_LENGTHS,
+                 reuse=1.0, **kwargs):
+        super().__init__(engine_type, api_config, model_name, task_count, **kwargs)
+        self.prefix_lengths = prefix_lengths
+        self.reuse = reuse
+
+    def steps(self):
+        return [{"label": f"{tokens}-token prefix, " + (f"{reuse:.0%} shared" if reuse else "unique"),
+                 "options": {"prefix_tokens": tokens, "prefix_reuse": reuse}, "prefix_tokens": tokens}
+                for tokens in self.prefix_lengths for reuse in (0.0, self.reuse)]
+
+    def point(self, index, step, summary):
+        # One point per length, once its shared run is in
+        if index % 2 == 0:
+            return None
+        unique = comparison_metrics(self.runs[-2])
+        shared = comparison_metrics(summary)
+        return {
+            "prefix_tokens": step["prefix_tokens"],
+            "unique": unique,
+            "shared": shared,
+            "prefill_saving": saving(unique["prefill_avg"], shared["prefill_avg"]),
+            "ttft_saving": saving(unique["ttft_avg"], shared["ttft_avg"])
+        }
+
+    def report_fields(self, points):
+        return {"prefix_lengths": self.prefix_lengths, "reuse": self.reuse}
@@ -0,0 +1,121 @@
+import os
+import json
+import time
+import collections
+from stats import ResultStats, Timeline
+
+# Crash-safe run log. Every finished task is appended to a JSON Lines file as
+# it completes, so a crash or a killed process loses at most the last flush
+# interval. Each run in the file is framed by a "run" header line and, if it
+# finished, a "summary" footer line; a file may hold several runs (e.g. the
+# levels of a concurrency sweep).
+#
+#   {"type": "run", "started": ..., "api_type": ..., "model": ..., ...}
+#   {"type": "result", "elapsed": 0.41, "prompt": ..., "latency": ..., ...}
+#   {"type": "summary", "total_time": ..., "throughput": ..., ...}
+
+FLUSH_INTERVAL = 1.0  # Seconds between flushes to disk
+
+
+class ResultLog:
+    def __init__(self, filename, run_config, started=None, flush_interval=FLUSH_INTERVAL):
+        self.filename = filename
+        self.flush_interval = flush_interval
+        # Line buffered writes would flush every task; a large buffer plus
+        # timed flushes keeps the per-task cost to a json.dumps
+        self.file = open(filename, 'a', buffering=1024 * 1024)
+        self.last_flush = time.monotonic()
+        # The engine's own start time, so the log and the exported summary
+        # are recognisably the same run
+        self.write_line(dict(run_config, type="run", started=started or time.time()))
+        self.flush()
+
+    def write_line(self, record):
+        self.file.write(json.dumps(record) + "\n")
+
+    def write(self, result, elapsed):
+        self.write_line(dict(result, type="result", elapsed=elapsed))
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.last_flush = time.monotonic()
+
+    def close(self, summary=None):
+        # The footer is only written for runs that finished; the per-task
+        # results are already in the file above it
+        if self.file.closed:
+            return
+        if summary is not None:
+            footer = {key: value for key, value in summary.items() if key != "results"}
+            self.write_line(dict(footer, type="summary"))
+        self.flush()
+        self.file.close()
+
+
+def _read_records(filename):
+    with open(filename) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A crash can leave the last line half-written
+                continue
+
+
+class _LoggedRun:
+    # Aggregates one run while reading, so logs of very long runs load in
+    # bounded memory just like the engine ran in it
+    def __init__(self, header, keep_results):
+        self.header = header
+        self.results = collections.deque(maxlen=keep_results)
+        self.result_stats = ResultStats()
+        self.timeline = Timeline()
+        self.total_time = 0
+        self.footer = None
+
+    def add(self, record):
+        result = {key: value for key, value in record.items() if key != "type"}
+        self.results.append(result)
+        self.result_stats.record(result)
+        self.timeline.record(result, result["elapsed"])
+        self.total_time = max(self.total_time, result["elapsed"])
+
+    def summary(self):
+        # benchmark_engine writes these logs, so import it late
+        from benchmark_engine import summarize
+
+        if self.footer is not None:
+            summary = {key: value for key, value in self.footer.items() if key != "type"}
+            summary["results"] = list(self.results)
+        else:
+            run_config = {key: value for key, value in self.header.items() if key not in ("type", "started")}
+            summary = summarize(run_config, self.total_time, self.result_stats, self.results,
+                                timeline=self.timeline)
+            summary["partial"] = True
+        summary["started"] = self.header.get("started")
+        return summary
+
+
+def load_result_log(filename, keep_results=10000):
+    # Returns one summary per run in the file. Runs that finished use their
+    # footer; interrupted runs are rebuilt from the results that made it to
+    # disk and are marked "partial".
+    runs = []
+    run = None
+    for record in _read_records(filename):
+        kind = record.get("type")
+        if kind == "run":
+            if run:
+                runs.append(run.summary())
+            run = _LoggedRun(record, keep_results)
+        elif kind == "result" and run:
+            run.add(record)
+        elif kind == "summary" and run:
+            run.footer = record
+
+    if run:
+        runs.append(run.summary())
+    return runs
@@ -0,0 +1,158 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+# Model behind the task details view. QTableView only asks for the cells it
+# is about to paint, so a run of tens of thousands of tasks costs no more to
+# show than a page of them, and rows are handed to the view in batches as
+# the user scrolls down instead of all at once.
+
+TASK_COLUMNS = ["Prompt", "Latency (s)", "TTFT (s)", "ITL (ms)", "Decode Tok/s", "Tokens/s", "Status", "Error"]
+FETCH_BATCH = 1000  # Rows added to the view per scroll-triggered fetch
+PROMPT_WIDTH = 60  # Longer prompts are truncated; the tooltip shows them whole
+
+GREEN = QColor(144, 238, 144)
+BLUE = QColor(173, 216, 230)
+RED = QColor(255, 128, 128)
+AGGREGATE_BACKGROUND = QColor(70, 70, 70)
+RIGHT = int(Qt.AlignRight | Qt.AlignVCenter)
+
+
+class TaskTableModel(QAbstractTableModel):
+    # Row 0 holds the run's averages, then one row per task. Without an
+    # error column, a failed task's error is the tooltip of its status.
+    def __init__(self, error_column=True, tokens_sec_colors=(100, 50), parent=None):
+        super().__init__(parent)
+        self.columns = TASK_COLUMNS if error_column else TASK_COLUMNS[:-1]
+        self.tokens_sec_colors = tokens_sec_colors  # (green above, blue above)
+        self.run = None
+        self.tasks = []
+        self.loaded = 0
+
+    def set_run(self, results):
+        self.beginResetModel()
+        self.run = results
+        self.tasks = results["results"]
+        self.loaded = min(len(self.tasks), FETCH_BATCH)
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self.run = None
+        self.tasks = []
+        self.loaded = 0
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.run is None:
+            return 0
+        return self.loaded + 1
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section]
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.loaded < len(self.tasks)
+
+    def fetchMore(self, parent):
+        count = min(FETCH_BATCH, len(self.tasks) - self.loaded)
+        # Row 0 is the aggregate, so task i is row i + 1
+        self.beginInsertRows(QModelIndex(), self.loaded + 1, self.loaded + count)
+        self.loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        column = index.column()
+        if role == Qt.TextAlignmentRole:
+            return RIGHT if 1 <= column <= 5 else None
+        if index.row() == 0:
+            return self.aggregate_data(column, role)
+
+        task = self.tasks[index.row() - 1]
+        if role == Qt.DisplayRole:
+            return self.task_text(task, column)
+        if role == Qt.ForegroundRole:
+            return self.task_color(task, column)
+        if role == Qt.ToolTipRole:
+            return self.task_tooltip(task, column)
+        return None
+
+    def task_text(self, task, column):
+        # Streaming columns are blank for non-streaming runs and failed tasks
+        if column == 0:
+            prompt = task["prompt"]
+            return prompt if len(prompt) <= PROMPT_WIDTH else prompt[:PROMPT_WIDTH - 3] + "..."
+        if column == 1:
+            return f"{task['latency']:.4f}"
+        if column == 2:
+            return f"{task['ttft']:.4f}" if "ttft" in task else "-"
+        if column == 3:
+            return f"{task['itl_avg'] * 1000:.1f}" if "itl_avg" in task else "-"
+        if column == 4:
+            return f"{task['decode_tokens_sec']:.2f}" if "decode_tokens_sec" in task else "-"
+        if column == 5:
+            return f"{task['tokens_sec']:.2f}" if "tokens_sec" in task else "-"
+        if column == 6:
+            return "❌ Failed" if "error" in task else "✅ Success"
+        return task.get("error", "")
+
+    def task_color(self, task, column):
+        if column == 5 and "tokens_sec" in task:
+            # Color code tokens/s for performance
+            green, blue = self.tokens_sec_colors
+            if task["tokens_sec"] > green:
+                return GREEN
+            if task["tokens_sec"] > blue:
+                return BLUE
+        if column == 6:
+            return RED if "error" in task else GREEN
+        return None
+
+    def task_tooltip(self, task, column):
+        if column == 0:
+            return task["prompt"]
+        if column == 1 and "total_duration" in task:
+            # Ollama's server-side breakdown of this request
+            return (f"Load {task['load_duration']:.3f} s, "
+                    f"prefill {task['prompt_eval_duration']:.3f} s ({task['prompt_eval_count']} tok), "
+                    f"decode {task['eval_duration']:.3f} s ({task['eval_count']} tok), "
+                    f"network + queueing {task.get('server_gap', 0):.3f} s")
+        if column == 5 and "output_tokens" in task:
+            # The same task's rates over the whole request and for the prompt
+            tooltip = f"{task['output_tokens']} output tokens, {task['e2e_tokens_sec']:.2f} tok/s end to end"
+            if "input_tokens_sec" in task:
+                tooltip += f"\n{task['input_tokens']} input tokens, {task['input_tokens_sec']:.1f} tok/s prefill"
+            return tooltip
+        if column == 6 and len(self.columns) < len(TASK_COLUMNS):
+            return task.get("error")
+        return None
+
+    def aggregate_data(self, column, role):
+        if role == Qt.BackgroundRole:
+            return AGGREGATE_BACKGROUND
+        if role != Qt.DisplayRole:
+            return None
+        # Averages over successful tasks, as computed by the engine
+        results = self.run
+        streamed = results.get("stream", False)
+        if column == 0:
+            return "AVERAGE"
+        if column == 1:
+            return f"{results['latency_avg']:.4f}"
+        if column == 2:
+            return f"{results['ttft_avg']:.4f}" if streamed else "-"
+        if column == 3:
+            return f"{results['itl_avg'] * 1000:.1f}" if streamed else "-"
+        if column == 4:
+            return f"{results['decode_tokens_sec_avg']:.2f}" if streamed else "-"
+        if column == 5:
+            return f"{results['tokens_sec_avg']:.2f}"
+        if column == 6:
+            return "Aggregate"
+        return ""
@@ -0,0 +1,171 @@
+import os
+import json
+import time
+import sqlite3
+from urllib.parse import urlparse
+
+# Benchmark history in a local SQLite database. Every run is one row of
+# headline numbers plus its metadata, indexed by model, host and start time,
+# with its per-task samples in a second table, so questions like "p99 for
+# model X on host Y over the last 30 days" are an index range scan rather
+# than a pass over thousands of JSON files.
+#
+#   runs:  id, started, model, host, endpoint, api_type, concurrency, ...
+#          headline metrics, config (JSON), summary (JSON, without tasks)
+#   tasks: run_id, seq, latency, tokens_sec, ttft, ..., error
+
+DEFAULT_STORE = "benchmark_history.db"
+INSERT_BATCH = 5000  # Task rows per executemany call
+
+# Headline metrics kept as columns, so they can be queried and charted
+RUN_METRICS = ["throughput", "latency_avg", "latency_p50", "latency_p90", "latency_p95", "latency_p99",
+               "latency_max", "tokens_sec_avg", "tokens_sec_p50", "ttft_avg", "ttft_p50", "ttft_p99"]
+TASK_METRICS = ["latency", "tokens_sec", "ttft", "itl_avg", "decode_tokens_sec", "queue_delay",
+                "prompt_eval_duration", "eval_duration", "prompt_eval_count", "eval_count"]
+# Metadata kept as columns; the other run options go into the config JSON
+RUN_COLUMNS = ["api_type", "endpoint", "model", "concurrency", "load_mode", "arrival_rate", "stream",
+               "task_count", "duration", "completed", "error_count", "total_time"]
+# Summary keys that are results rather than options
+RESULT_KEYS = ("started", "throughput", "cancelled", "partial", "results_dropped", "harness_overhead_share")
+RESULT_PREFIXES = ("latency_", "tokens_sec_", "ttft_", "itl_", "decode_tokens_sec_", "queue_delay_",
+                   "input_tokens_", "output_tokens_", "e2e_tokens_sec_")
+# Per-task results and time series are too large for the summary JSON
+SUMMARY_SKIP = ("results", "timeline")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    host TEXT NOT NULL,
+    {", ".join(RUN_COLUMNS)},
+    cancelled INTEGER NOT NULL DEFAULT 0,
+    {", ".join(f"{metric} REAL" for metric in RUN_METRICS)},
+    config TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS runs_identity ON runs (started, model, endpoint);
+CREATE INDEX IF NOT EXISTS runs_model_started ON runs (model, started);
+CREATE INDEX IF NOT EXISTS runs_host_started ON runs (host, started);
+CREATE INDEX IF NOT EXISTS runs_started ON runs (started);
+CREATE TABLE IF NOT EXISTS tasks (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    {", ".join(f"{metric} REAL" for metric in TASK_METRICS)},
+    endpoint TEXT,
+    error TEXT,
+    PRIMARY KEY (run_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+def run_host(endpoint):
+    # "http://gpu1:11434, http://gpu2:11434" -> "gpu1:11434,gpu2:11434"
+    return ",".join(urlparse(part.strip()).netloc or part.strip() for part in (endpoint or "").split(","))
+
+
+def run_options(summary):
+    # Everything about how the run was set up that has no column of its own:
+    # stream, processes, balancer, prompt file, seed, prefix options...
+    return {key: value for key, value in summary.items()
+            if key not in RUN_COLUMNS and key not in RESULT_KEYS and not key.startswith(RESULT_PREFIXES)
+            and not isinstance(value, dict) and key not in SUMMARY_SKIP}
+
+
+class ResultStore:
+    def __init__(self, path=DEFAULT_STORE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        # WAL lets the GUI read history while a CLI run writes to the same file
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA foreign_keys=ON")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def add_run(self, summary, started=None):
+        # Returns the new run's id, or None if the store already has the run.
+        # One transaction per run, with the tasks inserted in batches.
+        started = summary.get("started") or started or time.time()
+        row = {column: summary.get(column) for column in RUN_COLUMNS + RUN_METRICS}
+        row.update(started=started, host=run_host(summary.get("endpoint")),
+                   cancelled=int(bool(summary.get("cancelled"))), config=json.dumps(run_options(summary)),
+                   summary=json.dumps({key: value for key, value in summary.items() if key not in SUMMARY_SKIP}))
+        columns = list(row)
+        with self.db:
+            cursor = self.db.execute(
+                f"INSERT OR IGNORE INTO runs ({', '.join(columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})", [row[column] for column in columns])
+            if not cursor.rowcount:
+                return None
+            run_id = cursor.lastrowid
+            insert = (f"INSERT INTO tasks (run_id, seq, {', '.join(TASK_METRICS)}, endpoint, error) "
+                      f"VALUES ({', '.join('?' for _ in range(len(TASK_METRICS) + 4))})")
+            batch = []
+            for seq, result in enumerate(summary.get("results", [])):
+                batch.append([run_id, seq] + [result.get(metric) for metric in TASK_METRICS]
+                             + [result.get("endpoint"), result.get("error")])
+                if len(batch) >= INSERT_BATCH:
+                    self.db.executemany(insert, batch)
+                    batch = []
+            if batch:
+                self.db.executemany(insert, batch)
+        return run_id
+
+    def import_file(self, path):
+        # Backfills JSON exports and run logs; returns (added, already stored).
+        # Old exports have no start time, so their runs are dated by the file.
+        from compare import read_runs
+
+        added = skipped = 0
+        fallback = os.path.getmtime(path)
+        # Regression and other reports without runs have nothing to import
+        runs = [run for run in read_runs(path) if "throughput" in run]
+        for index, run in enumerate(runs):
+            # Keep runs of one file distinct and in order
+            if self.add_run(run, started=fallback + index * 1e-3) is None:
+                skipped += 1
+            else:
+                added += 1
+        return added, skipped
+
+    def _where(self, model=None, host=None, days=None):
+        clauses, params = [], []
+        if model:
+            clauses.append("model = ?")
+            params.append(model)
+        if host:
+            clauses.append("host = ?")
+            params.append(host)
+        if days:
+            clauses.append("started >= ?")
+            params.append(time.time() - days * 86400)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def runs(self, model=None, host=None, days=None, limit=None):
+        # Headline rows, oldest first
+        where, params = self._where(model, host, days)
+        query = (f"SELECT id, started, model, host, api_type, concurrency, load_mode, arrival_rate, completed, "
+                 f"error_count, cancelled, {', '.join(RUN_METRICS)} FROM runs{where} ORDER BY started")
+        if limit:
+            query = f"SELECT * FROM ({query} DESC LIMIT {int(limit)}) ORDER BY started"
+        return [dict(row) for row in self.db.execute(query, params)]
+
+    def history(self, metric, model=None, host=None, days=None):
+        # [(started, value)] for charting one metric over time
+        if metric not in RUN_METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        where, params = self._where(model, host, days)
+        where += (" AND " if where else " WHERE ") + f"{metric} IS NOT NULL"
+        return [tuple(row) for row in
+                self.db.execute(f"SELECT started, {metric} FROM runs{where} ORDER BY started", params)]
+
+    def tasks(self, run_id):
+        return [dict(row) for row in self.db.execute("SELECT * FROM tasks WHERE run_id = ? ORDER BY seq", (run_id,))]
+
+    def models(self):
+        return [row[0] for row in self.db.execute("SELECT DISTINCT model FROM runs ORDER BY model")]
+
+    def hosts(self):
+        return [row[0] for row in self.db.execute("SELECT DISTINCT host FROM runs ORDER BY host")]
@@ -0,0 +1,387 @@
+import math
+import time
+import threading
+
+# Summary statistics helpers shared by the engines and reports
+
+PERCENTILES = (50, 90, 95, 99, 99.9)
+
+# Per-task values that get a histogram; absent keys (e.g. ttft on
+# non-streaming runs) are simply not recorded. "itl" holds every
+# inter-token gap of the run rather than one value per task.
+RESULT_METRICS = ("latency", "tokens_sec", "ttft", "itl", "itl_avg", "decode_tokens_sec", "queue_delay",
+                  "total_duration", "load_duration", "prompt_eval_duration", "eval_duration",
+                  "prompt_eval_count", "eval_count", "prefill_tokens_sec", "server_gap",
+                  "input_tokens", "output_tokens", "input_tokens_sec", "e2e_tokens_sec")
+
+# Phases of one task, in order: waiting for a worker, building the request,
+# writing it, waiting for the response headers, reading the body, parsing it,
+# and handing the result back to the collecting thread. The harness phases
+# are pure client overhead; the rest is network and server time. Open-loop
+# runs have no queued phase: waiting for a worker there is queue_delay.
+PHASES = ("queued", "build", "send", "wait", "read", "parse", "handoff")
+HARNESS_PHASES = ("queued", "build", "parse", "handoff")
+
+# Timeline windows for soak tests: 10 s each, widened as needed to keep at
+# most 120 of them
+TIMELINE_WINDOW = 10.0
+MAX_TIMELINE_WINDOWS = 120
+
+# Live charts: the last 15 minutes, second by second, drawn with at most 180
+# points per series. Per-second percentiles only need to be rough.
+LIVE_SECONDS = 900
+LIVE_CHART_POINTS = 180
+LIVE_PRECISION = 0.05
+
+
+class Histogram:
+    # Log-bucketed histogram. Bucket i holds values in
+    # [(1 + precision) ** i, (1 + precision) ** (i + 1)), so every percentile
+    # is accurate to within `precision` (relative) and memory depends on the
+    # range of values seen, not on how many were recorded: at 1% precision,
+    # 1 ms to 10 minutes is ~1,300 buckets at most.
+    def __init__(self, precision=0.01):
+        self.precision = precision
+        self.log_base = math.log1p(precision)
+        self.buckets = {}
+        self.zeros = 0  # Values <= 0 have no logarithm
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.floor(math.log(value) / self.log_base)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other):
+        # Histograms with the same precision add up exactly, e.g. across runs
+        # or load generator processes
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge histograms with different precision")
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is not None:
+                self.min = value if self.min is None else min(self.min, value)
+                self.max = value if self.max is None else max(self.max, value)
+        return self
+
+    def mean(self):
+        return self.total / self.count if self.count else 0
+
+    def percentile(self, q):
+        # Nearest-rank percentile, q in [0, 100], reported as the geometric
+        # middle of its bucket and clamped to the exact min/max
+        if not self.count:
+            return 0
+        rank = max(int(math.ceil(q / 100 * self.count)), 1)
+        if rank <= self.zeros:
+            return self.min
+        seen = self.zeros
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                value = math.exp((index + 0.5) * self.log_base)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self, quantiles=PERCENTILES):
+        # {"avg": .., "p50": .., ..., "p99.9": .., "max": ..}
+        summary = {"avg": self.mean()}
+        for q in quantiles:
+            summary[f"p{q:g}"] = self.percentile(q)
+        summary["max"] = self.max if self.max is not None else 0
+        return summary
+
+    def to_dict(self):
+        return {
+            "precision": self.precision,
+            "buckets": {str(index): count for index, count in self.buckets.items()},
+            "zeros": self.zeros,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data["precision"])
+        histogram.buckets = {int(index): count for index, count in data["buckets"].items()}
+        histogram.zeros = data["zeros"]
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+
+class ResultStats:
+    # Aggregates per-task result dicts as they complete. Successful tasks feed
+    # the histograms; failed tasks are only counted.
+    def __init__(self, metrics=RESULT_METRICS):
+        self.histograms = {name: Histogram() for name in metrics}
+        self.phases = {}
+        self.completed = 0
+        self.errors = 0
+
+    def record(self, result):
+        self.completed += 1
+        if "error" in result:
+            self.errors += 1
+            return
+        for name, histogram in self.histograms.items():
+            if name in result:
+                histogram.record(result[name])
+        for name, value in result.get("phases", {}).items():
+            if name not in self.phases:
+                self.phases[name] = Histogram()
+            self.phases[name].record(value)
+
+    def record_gaps(self, gaps):
+        # Inter-token gaps of one streamed task
+        for gap in gaps:
+            self.histograms["itl"].record(gap)
+
+    def merge(self, other):
+        for name, histogram in other.histograms.items():
+            if name in self.histograms:
+                self.histograms[name].merge(histogram)
+            else:
+                self.histograms[name] = Histogram(histogram.precision).merge(histogram)
+        for name, histogram in other.phases.items():
+            if name not in self.phases:
+                self.phases[name] = Histogram(histogram.precision)
+            self.phases[name].merge(histogram)
+        self.completed += other.completed
+        self.errors += other.errors
+        return self
+
+    def summary(self, name):
+        # Flat summary keys for one metric: latency_avg, latency_p50 ... latency_max
+        return {f"{name}_{key}": value for key, value in self.histograms[name].summary().items()}
+
+    def group_summary(self, names):
+        # {name: {"avg": .., "p50": .., "p99": ..}} for a group of related metrics
+        return {name: {"avg": self.histograms[name].mean(),
+                       "p50": self.histograms[name].percentile(50),
+                       "p99": self.histograms[name].percentile(99)}
+                for name in names if self.histograms[name].count}
+
+    def phase_summary(self):
+        # Average and p99 per phase, plus the share of total task time spent
+        # in the harness itself
+        phases = {name: {"avg": self.phases[name].mean(), "p99": self.phases[name].percentile(99)}
+                  for name in PHASES if name in self.phases}
+        total = sum(histogram.total for histogram in self.phases.values())
+        harness = sum(self.phases[name].total for name in HARNESS_PHASES if name in self.phases)
+        return phases, harness / total if total > 0 else 0
+
+
+class Timeline:
+    # Throughput and latency per fixed window of the run, to spot drift over
+    # long soak tests. Once the run outlasts max_windows windows, neighbouring
+    # windows are merged and the window length doubles, so memory stays
+    # bounded however long the run goes.
+    def __init__(self, window=TIMELINE_WINDOW, max_windows=MAX_TIMELINE_WINDOWS):
+        self.window = window
+        self.max_windows = max_windows
+        self.windows = []
+
+    def record(self, result, elapsed):
+        # elapsed: seconds since the start of the timed phase
+        while int(elapsed // self.window) >= self.max_windows:
+            self.compact()
+        index = int(elapsed // self.window)
+        while len(self.windows) <= index:
+            self.windows.append(ResultStats(("latency", "tokens_sec")))
+        self.windows[index].record(result)
+
+    def compact(self):
+        self.windows = [pair[0].merge(pair[1]) if len(pair) > 1 else pair[0]
+                        for pair in (self.windows[i:i + 2] for i in range(0, len(self.windows), 2))]
+        self.window *= 2
+
+    def merge(self, other):
+        # Windows line up when both timelines started at the same time, e.g.
+        # load generator processes released together. `other` may be compacted.
+        while self.window < other.window:
+            self.compact()
+        while other.window < self.window:
+            other.compact()
+        for index, stats in enumerate(other.windows):
+            if index < len(self.windows):
+                self.windows[index].merge(stats)
+            else:
+                self.windows.append(stats)
+        while len(self.windows) > self.max_windows:
+            self.compact()
+        return self
+
+    def row(self, index, elapsed=None):
+        # The window still in progress is cut off at `elapsed`
+        start = index * self.window
+        end = start + self.window
+        if elapsed is not None:
+            end = max(min(end, elapsed), start + 1e-9)
+        stats = self.windows[index]
+        latency = stats.histograms["latency"]
+        return {
+            "start": start,
+            "end": end,
+            "completed": stats.completed,
+            "error_count": stats.errors,
+            "throughput": stats.completed / (end - start),
+            "latency_avg": latency.mean(),
+            "latency_p50": latency.percentile(50),
+            "latency_p99": latency.percentile(99),
+            "tokens_sec_avg": stats.histograms["tokens_sec"].mean()
+        }
+
+    def latest(self, elapsed):
+        # Most recent complete window, or the current one early in the run
+        index = len(self.windows) - 1
+        if index > 0 and elapsed < (index + 1) * self.window:
+            index -= 1
+        return self.row(index, elapsed)
+
+    def summary(self, elapsed=None):
+        return [self.row(index, elapsed) for index in range(len(self.windows))]
+
+
+def result_tokens(result):
+    # Output tokens one task produced, as the provider counted them (Ollama's
+    # eval_count, or the usage block of the other APIs); 0 when not reported
+    return result.get("output_tokens", 0)
+
+
+class LiveStats:
+    # Per-second buckets for the live charts, in a ring buffer: once the run
+    # outlasts `seconds`, the oldest second is dropped, so an hours-long soak
+    # run costs the same as a one-minute one. The collecting thread records
+    # results, workers sample the in-flight count and the GUI reads series
+    # from its own thread, hence the lock.
+    #
+    # Multi-process runs keep one per process and send each closed second to
+    # the parent, whose LiveStats has no clock (start=None) and only holds
+    # merged seconds.
+    def __init__(self, start=None, seconds=LIVE_SECONDS):
+        self.start = start  # perf_counter() at the start of the timed phase
+        self.size = seconds
+        self.buckets = [None] * seconds
+        self.latest = -1
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+    def _bucket(self, second):
+        # Opens every second up to `second`; seconds without events carry
+        # the in-flight count over. None if it already left the ring.
+        if second <= self.latest - self.size:
+            return None
+        for opened in range(max(self.latest + 1, second - self.size + 1), second + 1):
+            self.buckets[opened % self.size] = {"second": opened, "completed": 0, "errors": 0, "tokens": 0,
+                                                "latency": Histogram(LIVE_PRECISION),
+                                                "in_flight": self.in_flight}
+        self.latest = max(self.latest, second)
+        return self.buckets[second % self.size]
+
+    def record(self, result, elapsed):
+        with self.lock:
+            bucket = self._bucket(int(elapsed))
+            bucket["completed"] += 1
+            if "error" in result:
+                bucket["errors"] += 1
+                return
+            bucket["tokens"] += result_tokens(result)
+            bucket["latency"].record(result["latency"])
+
+    def sample_in_flight(self, count, elapsed):
+        # The busiest moment of each second is what shows saturation
+        with self.lock:
+            self.in_flight = count
+            bucket = self._bucket(int(elapsed))
+            bucket["in_flight"] = max(bucket["in_flight"], count)
+
+    def closed(self, since, elapsed):
+        # Seconds from `since` up to, not including, the one in progress
+        with self.lock:
+            self._bucket(int(elapsed))
+            first = max(since, self.latest - self.size + 1)
+            return [self.buckets[second % self.size] for second in range(first, self.latest)]
+
+    def completions(self):
+        # [(second, tasks completed)] for every second still in the ring
+        with self.lock:
+            first = max(self.latest - self.size + 1, 0)
+            return [(second, self.buckets[second % self.size]["completed"])
+                    for second in range(first, self.latest + 1)]
+
+    def merge(self, buckets):
+        # Closed seconds of another process; the in-flight counts add up
+        with self.lock:
+            for other in buckets:
+                bucket = self._bucket(other["second"])
+                if bucket is None:
+                    continue
+                bucket["completed"] += other["completed"]
+                bucket["errors"] += other["errors"]
+                bucket["tokens"] += other["tokens"]
+                bucket["latency"].merge(other["latency"])
+                bucket["in_flight"] += other["in_flight"]
+
+    def series(self, points=LIVE_CHART_POINTS):
+        # Chart series over the ring, decimated to at most `points` per
+        # series: rates are averaged over each group of seconds, in-flight
+        # is its peak and the percentiles come from the merged histograms.
+        # The second in progress is left out so the rates do not dip.
+        with self.lock:
+            if self.start is not None:
+                self._bucket(int(time.perf_counter() - self.start))
+                end = self.latest
+            else:
+                end = self.latest + 1
+            first = max(self.latest - self.size + 1, 0)
+            group = max(math.ceil((end - first) / points), 1)
+            series = {"requests": [], "tokens": [], "in_flight": [], "p50": [], "p99": []}
+            for group_start in range(first, end, group):
+                buckets = [self.buckets[second % self.size]
+                           for second in range(group_start, min(group_start + group, end))]
+                x = group_start + len(buckets) / 2
+                latency = Histogram(LIVE_PRECISION)
+                for bucket in buckets:
+                    latency.merge(bucket["latency"])
+                series["requests"].append((x, sum(bucket["completed"] for bucket in buckets) / len(buckets)))
+                series["tokens"].append((x, sum(bucket["tokens"] for bucket in buckets) / len(buckets)))
+                series["in_flight"].append((x, max(bucket["in_flight"] for bucket in buckets)))
+                if latency.count:
+                    series["p50"].append((x, latency.percentile(50)))
+                    series["p99"].append((x, latency.percentile(99)))
+            return series
+
+
+def format_percentiles(summary, name, digits=4):
+    # "p50 0.1234 | p90 ... | max 0.5678" from a run summary
+    keys = [f"p{q:g}" for q in PERCENTILES] + ["max"]
+    return " | ".join(f"{key} {summary[f'{name}_{key}']:.{digits}f}" for key in keys)
+
+
+def percentile_tooltip(summary):
+    # Multi-line percentile breakdown for table tooltips
+    lines = [f"Latency (s): {format_percentiles(summary, 'latency')}",
+             f"Tokens/s: {format_percentiles(summary, 'tokens_sec', 2)}"]
+    if summary.get("stream"):
+        lines.append(f"TTFT (s): {format_percentiles(summary, 'ttft')}")
+    if "itl_p50" in summary:
+        lines.append(f"ITL (s): {format_percentiles(summary, 'itl')}")
+    return "\n".join(lines)
@@ -0,0 +1,158 @@
+import json
+import time
+
+# Streaming helpers shared by app.py and api_app.py.
+#
+# Ollama streams newline-delimited JSON objects, while OpenAI, Mistral,
+# Anthropic and most OpenAI-compatible servers stream Server-Sent Events
+# ("data: {...}" lines). Every content-bearing chunk is treated as one token
+# arrival so we can measure time-to-first-token and inter-token latency.
+
+
+def enable_streaming(api_type, payload):
+    # Switch an already built request payload to streaming mode
+    payload["stream"] = True
+    if api_type == "OpenAI":
+        # Ask OpenAI to append a final usage chunk to the stream
+        payload["stream_options"] = {"include_usage": True}
+    return payload
+
+
+def _parse_ollama_line(line):
+    data = json.loads(line)
+    if data.get("error"):
+        raise Exception(f"API Error: {data['error']}")
+    return data.get("response", ""), data, bool(data.get("done"))
+
+
+def _parse_sse_line(line):
+    # Ignore "event:", "id:" and comment lines; the payload carries its own type
+    if not line.startswith("data:"):
+        return None
+    body = line[5:].strip()
+    if body == "[DONE]":
+        return "", {}, True
+    data = json.loads(body)
+    if data.get("error"):
+        raise Exception(f"API Error: {data['error']}")
+    return _sse_text(data), data, False
+
+
+def _sse_text(data):
+    # Anthropic message stream
+    if data.get("type") == "content_block_delta":
+        return data.get("delta", {}).get("text", "")
+
+    # OpenAI / Mistral chat completions and completions-style custom servers
+    choices = data.get("choices") or []
+    if choices:
+        choice = choices[0]
+        delta = choice.get("delta") or {}
+        return delta.get("content") or choice.get("text") or ""
+    return ""
+
+
+def _merge_usage(usage, data):
+    # OpenAI/Mistral send usage on the last chunk, Anthropic splits it between
+    # message_start (input tokens) and message_delta (output tokens)
+    if data.get("usage"):
+        usage.update({k: v for k, v in data["usage"].items() if v is not None})
+    message = data.get("message")
+    if isinstance(message, dict) and message.get("usage"):
+        usage.update({k: v for k, v in message["usage"].items() if v is not None})
+
+
+class StreamRecorder:
+    # Collects token arrival times from raw stream lines. start_time is the
+    # perf_counter() value taken just before the request was sent. "final"
+    # holds the last Ollama object, or the accumulated usage block for SSE
+    # providers.
+
+    def __init__(self, api_type, start_time):
+        self.api_type = api_type
+        self.start_time = start_time
+        self.first_token_time = None
+        self.last_token_time = None
+        self.gaps = []
+        self.chunk_count = 0
+        self.final = {}
+        self.done = False
+
+    def feed_line(self, line):
+        # Returns True once the end of the stream has been seen
+        if isinstance(line, bytes):
+            line = line.decode("utf-8")
+        line = line.strip()
+        if not line or self.done:
+            return self.done
+
+        parsed = _parse_ollama_line(line) if self.api_type == "Ollama" else _parse_sse_line(line)
+        if parsed is None:
+            return False
+        text, data, done = parsed
+
+        now = time.perf_counter()
+        if text:
+            if self.first_token_time is None:
+                self.first_token_time = now
+            else:
+                self.gaps.append(now - self.last_token_time)
+            self.last_token_time = now
+            self.chunk_count += 1
+
+        if self.api_type == "Ollama":
+            if done:
+                self.final = data
+        else:
+            _merge_usage(self.final, data)
+        self.done = done
+        return done
+
+    def result(self):
+        end_time = time.perf_counter()
+        ttft = self.first_token_time - self.start_time if self.first_token_time is not None else 0
+        decode_time = self.last_token_time - self.first_token_time if self.chunk_count > 1 else 0
+
+        return {
+            "ttft": ttft,
+            "inter_token_latencies": self.gaps,
+            "chunk_count": self.chunk_count,
+            "decode_time": decode_time,
+            "end_time": end_time,
+            "final": self.final
+        }
+
+
+def read_stream(response, api_type, start_time):
+    # Consume a requests streaming response. The body is always read to the
+    # end so the connection can go back to the keep-alive pool.
+    recorder = StreamRecorder(api_type, start_time)
+    for line in response.iter_lines():
+        recorder.feed_line(line)
+    return recorder.result()
+
+
+async def read_stream_async(response, api_type, start_time):
+    # Consume an aiohttp streaming response
+    recorder = StreamRecorder(api_type, start_time)
+    async for line in response.content:
+        recorder.feed_line(line)
+    return recorder.result()
+
+
+def decode_tokens_per_sec(stream_metrics, token_count=None):
+    # Tokens generated after the first one, divided by the time spent producing them
+    tokens = token_count if token_count else stream_metrics["chunk_count"]
+    decode_time = stream_metrics["decode_time"]
+    return (tokens - 1) / decode_time if decode_time > 0 and tokens > 1 else 0
+
+
+def stream_summary(stream_metrics):
+    # The gaps themselves only ride along until the engine collects the task
+    # into its ITL histogram; results keep just the average
+    gaps = stream_metrics["inter_token_latencies"]
+    return {
+        "ttft": stream_metrics["ttft"],
+        "itl_avg": sum(gaps) / len(gaps) if gaps else 0,
+        "inter_token_latencies": gaps
+    }
@@ -0,0 +1,180 @@
+import csv
+from benchmark_engine import create_engine, WARMUP_RUNS
+from balancer import endpoint_list
+
+# Concurrency sweep: run the same benchmark at increasing concurrency levels
+# and find the saturation knee, i.e. the last level where adding concurrency
+# still raised throughput instead of only raising latency.
+
+MIN_THROUGHPUT_GAIN = 0.10  # Less than 10% more throughput counts as saturated
+
+SWEEP_FIELDS = ["concurrency", "throughput", "tokens_sec_avg", "latency_avg", "latency_p50",
+                "latency_p90", "latency_p95", "latency_p99", "latency_p99.9", "latency_max", "error_count"]
+
+
+def concurrency_levels(max_concurrency):
+    # 1, 2, 4 ... up to and including max_concurrency
+    levels = []
+    level = 1
+    while level < max_concurrency:
+        levels.append(level)
+        level *= 2
+    levels.append(max_concurrency)
+    return levels
+
+
+def parse_levels(text):
+    # "1,2,4,8" -> [1, 2, 4, 8]
+    return sorted({int(part) for part in text.split(",") if part.strip()})
+
+
+def sweep_point(concurrency, summary):
+    point = {field: summary.get(field, 0) for field in SWEEP_FIELDS}
+    point["concurrency"] = concurrency
+    return point
+
+
+def find_knee(points, min_gain=MIN_THROUGHPUT_GAIN):
+    # The knee is the level before the first step whose throughput gain is
+    # below min_gain while latency still rises. None if throughput never
+    # stopped scaling within the swept levels.
+    for previous, current in zip(points, points[1:]):
+        if previous["throughput"] <= 0:
+            continue
+        gain = (current["throughput"] - previous["throughput"]) / previous["throughput"]
+        if gain < min_gain and current["latency_p50"] > previous["latency_p50"]:
+            return previous
+    return None
+
+
+class SweepRunner:
+    # Runs the same benchmark once per step, each with its own engine
+    # options, and turns the runs into one report. Modes supply:
+    #
+    #   steps()                       [{"label": ..., "options": {...}, ...}]
+    #   before_step(index, step)      e.g. unload the model; optional
+    #   point(index, step, summary)   the step's point, or None
+    #   report_fields(points)         the mode's own report fields
+    #
+    # Only the first step warms up unless its options say otherwise. A
+    # cancelled run reports the steps that ran to completion, plus the
+    # cut-short one in "runs", or None if no step produced a point.
+    mode = None
+
+    def __init__(self, engine_type, api_config, model_name, task_count, warmup_runs=WARMUP_RUNS,
+                 progress_callback=None, level_callback=None, **engine_options):
+        self.engine_type = engine_type
+        self.api_config = api_config
+        self.model_name = model_name
+        self.task_count = task_count
+        self.warmup_runs = warmup_runs
+        self.progress_callback = progress_callback
+        self.level_callback = level_callback
+        self.engine_options = engine_options
+        self.engine = None
+        self.runs = []
+        self.cancelled = False
+
+    def report(self, value, message):
+        if self.progress_callback:
+            self.progress_callback(value, message)
+
+    def steps(self):
+        raise NotImplementedError
+
+    def before_step(self, index, step):
+        pass
+
+    def point(self, index, step, summary):
+        raise NotImplementedError
+
+    def report_fields(self, points):
+        return {}
+
+    def run(self):
+        # Steps are worked out here rather than up front, so a GUI thread
+        # never waits for what they need to look up
+        steps = self.steps()
+        self.runs = []
+        points = []
+
+        for index, step in enumerate(steps):
+            if self.cancelled:
+                break
+
+            def step_progress(value, message, index=index, label=step["label"]):
+                self.report(int((index * 100 + value) / len(steps)), f"[{label}] {message}")
+
+            self.before_step(index, step)
+            options = dict(self.engine_options, warmup_runs=self.warmup_runs if index == 0 else 0)
+            options.update(step["options"])
+            self.engine = create_engine(self.engine_type, self.api_config, self.model_name, self.task_count,
+                                        progress_callback=step_progress, **options)
+            if self.cancelled:
+                break
+            summary = self.engine.run()
+            if summary is None:
+                break
+            self.runs.append(summary)
+            # A partial step would skew the comparison, so it gets no point
+            point = self.point(index, step, summary) if not summary.get("cancelled") else None
+            if self.level_callback:
+                self.level_callback(summary)
+            if summary.get("cancelled"):
+                break
+            if point is not None:
+                points.append(point)
+
+        if not points:
+            return None
+        report = {
+            "mode": self.mode,
+            "api_type": self.api_config["type"],
+            "endpoint": ", ".join(endpoint_list(self.api_config)),
+            "model": self.model_name,
+            "task_count": self.task_count
+        }
+        report.update(self.report_fields(points))
+        report.update(points=points, runs=self.runs, cancelled=self.cancelled)
+        return report
+
+    def cancel(self):
+        self.cancelled = True
+        if self.engine:
+            self.engine.cancel()
+
+
+class ConcurrencySweep(SweepRunner):
+    mode = "concurrency_sweep"
+
+    def __init__(self, engine_type, api_config, model_name, task_count, levels,
+                 min_gain=MIN_THROUGHPUT_GAIN, **kwargs):
+        super().__init__(engine_type, api_config, model_name, task_count, **kwargs)
+        self.levels = levels
+        self.min_gain = min_gain
+
+    def steps(self):
+        return [{"label": f"concurrency {level}", "options": {"concurrency": level}, "concurrency": level}
+                for level in self.levels]
+
+    def point(self, index, step, summary):
+        summary["concurrency"] = step["concurrency"]
+        return sweep_point(step["concurrency"], summary)
+
+    def report_fields(self, points):
+        knee = find_knee(points, self.min_gain)
+        return {
+            "levels": self.levels,
+            "min_throughput_gain": self.min_gain,
+            "knee": knee,
+            "saturated": knee is not None
+        }
+
+
+def write_sweep_csv(report, filename):
+    with open(filename, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SWEEP_FIELDS + ["knee"])
+        writer.writeheader()
+        knee = report["knee"]["concurrency"] if report["knee"] else None
+        for point in report["points"]:
+            writer.writerow(dict(point, knee=point["concurrency"] == knee))